@@ -1,602 +1,803 @@
-from flask import Flask, jsonify, send_from_directory, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS, cross_origin
+import atexit
+import gc
 import os
+import threading
+from datetime import datetime, timezone
 
-app = Flask(__name__)
+from article_watcher import ArticleWatcher
+from clustering import StoryClusters
+from compact_corpus import CompactCorpus
+from compression import compress_response
+from discussions import REACTIONS, SORTS, CommentNotFound, DiscussionNotFound, DiscussionThreads
+from feed import decode_cursor, encode_cursor, normalize_category, normalize_source
+from images import DERIVED_DIR, IMMUTABLE_CACHE_CONTROL, DerivativeManifest
+from json_stream import FragmentCache, encode, encode_list, streamed_json
+from metrics import PROMETHEUS_CONTENT_TYPE, RequestMetrics, RoutedRequest, TimedJSONProvider
+from payload_cache import conditional_json, payload_cache
+from personalization import ArticleVectors, UserActivity
+from poll_votes import AlreadyVoted, InvalidOption, PollNotFound, PollVotes, percentages
+from saved_articles import SavedArticles
+from search_index import SearchIndex
+from snapshots import ContentSnapshot, SnapshotStore
+from static_server import StaticServer
+from storage import Repository, parse_posted_date
+from timeline import ArticleTimeline
+from trending import ViewCounter
+import seed_data
+
+# Static files are served by static_files below, not Flask's built-in route.
+app = Flask(__name__, static_folder=None)
 CORS(app)
 
+# NEWSBLEND_PROFILE_SLOW_MS turns on stack sampling for requests slower than that.
+_profile_slow_ms = os.environ.get("NEWSBLEND_PROFILE_SLOW_MS")
+METRICS = RequestMetrics(directory=os.environ.get("NEWSBLEND_METRICS_DIR"),
+                         profile_slow_after=float(_profile_slow_ms) / 1000 if _profile_slow_ms else None)
+app.json = TimedJSONProvider(app)
+app.request_class = RoutedRequest
+app.wsgi_app = METRICS.wrap(app.wsgi_app)
+METRICS.start()
+atexit.register(METRICS.stop)
+
+@app.before_request
+def pin_content():
+    # One consistent version for the whole request, however many publishes happen meanwhile.
+    g.content = CONTENT.current
+
+@app.after_request
+def compress_api_response(response):
+    # Cached bodies come precompressed from conditional_json; this covers the rest.
+    if request.path.startswith("/api/"):
+        response = compress_response(response, request.accept_encodings)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    return Response(METRICS.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.route('/metrics/profile')
+def metrics_profile():
+    return Response(METRICS.render_profile(), content_type="text/plain; charset=utf-8")
+
+STATIC_SERVER = StaticServer(os.path.join(app.root_path, 'static'),
+                             immutable_prefixes=(DERIVED_DIR + "/",),
+                             immutable_cache_control=IMMUTABLE_CACHE_CONTROL)
+
 @app.route('/static/<path:filename>')
 @cross_origin()
 def static_files(filename):
-    return send_from_directory(os.path.join(app.root_path, 'static'), filename)
-
-ARTICLES = {
-    "1": {
-        "title": "South Korea’s worst-ever wildfires double in size, killing at least 28 and incinerating temples",
-        "subtitle": "Blaze that began in central Uiseong county has carved trail of devastation",
-        "category": "Environment",
-        "source": "CBC",
-        "date": "CBC • Posted: Mar 26, 2025 11:27 PM EDT",
-        "image": "1_wildfire.png",
-        "logo": "cbc_logo.png",
-        "content": [
-            "Wildfires raging in South Korea doubled in size on Thursday from a day earlier, as authorities called the blazes the country’s worst natural fire disaster with at least 28 people killed and historic temples incinerated.",
-            "More than 30,000 hectares have been charred or were still burning in the largest of the fires that began in the central Uiseong county. It is the biggest single forest fire in South Korea’s history. The previous record was 24,000 hectares in a March 2000 fire.",
-            "Helicopters dumped water over burning forests in South Korea on Thursday as fire crews struggled to contain the country’s worst-ever wildfires, which have killed at least 28 people, forced at least 300 to flee their homes and destroyed historic temples. Officials say it may take several more days to bring the fires fully under control due to dry and windy conditions.",
-            "Authorities have urged residents in high-risk areas to evacuate immediately. South Korea's president has called for an emergency response team to support those affected and speed up recovery efforts."
-        ]
-    },
-    "2": {
-        "title": "Here’s a breakdown of the newly announced tariffs by country",
-        "subtitle": "Trade tensions rise amid global policy shifts",
-        "category": "politics",
-        "source": "CNN",
-        "date": "CNN • Posted: Mar 20, 2025 2:45 PM EDT",
-        "image": "2_tariff.png",
-        "logo": "cnn_logo.png",
-        "content": [
-            "Governments around the world are introducing new tariffs this quarter, sparking concerns among economists and global industries. Countries including the United States, China, and members of the European Union have announced measures affecting various sectors.",
-            "The U.S. Department of Commerce confirmed a 10% tariff on imported steel and a 5% tariff on select electronic goods from Asia. In response, China imposed retaliatory tariffs on American agricultural products, including soybeans and corn.",
-            "European officials emphasized that the new tariffs are a defensive measure to protect local manufacturing, particularly in the automotive and energy sectors. However, business leaders warn that the changes could lead to increased costs and supply chain disruptions.",
-            "Economists are split on the long-term effects of the policies. Some suggest the moves are part of a broader push toward economic independence, while others fear it could slow down post-pandemic recovery."
-        ]
-    },
-    "3": {
-    "title": "Global CO2 Levels Hit Record High in 2025",
-    "subtitle": "UN warns that rising emissions threaten climate goals",
-    "category": "Climate",
-    "source": "Reuters",
-    "date": "Reuters • Posted: Apr 1, 2025 9:00 AM EDT",
-    "image": "3_climate_co2.png",
-    "logo": "reuters_logo.png",
-    "content": [
-        "The concentration of carbon dioxide in Earth's atmosphere has reached a new record high, according to a recent UN climate report. The findings raise concerns that the world is falling behind its climate targets.",
-        "Measurements from observatories worldwide show atmospheric CO2 levels exceeded 421 ppm in March, a level not seen in over 4 million years. The rise is largely attributed to continued fossil fuel combustion and deforestation.",
-        "The UN Secretary-General urged governments to double down on climate efforts, warning that 'the window to secure a livable future is rapidly closing.'",
-        "Environmental groups called for immediate reforms, including phasing out coal and expanding renewable energy initiatives, especially in industrial nations."
-    ]
-},
-    "4": {
-    "title": "Stock Markets Volatile as Central Banks Hint at Rate Hikes",
-    "subtitle": "Global indices tumble after surprise policy announcements",
-    "category": "Business",
-    "source": "Bloomberg",
-    "date": "Bloomberg • Posted: Apr 2, 2025 1:15 PM EDT",
-    "image": "4_stock_volatility.png",
-    "logo": "bloomberg_logo.png",
-    "content": [
-        "Stock markets worldwide experienced sharp declines after major central banks hinted at upcoming interest rate hikes in an effort to combat inflation.",
-        "The Dow Jones dropped over 600 points while the FTSE and Nikkei saw similar losses. Investors reacted nervously to statements from the U.S. Federal Reserve and European Central Bank.",
-        "Analysts believe the hikes are necessary but warn they could slow down post-pandemic recovery.",
-        "Sectors like tech and real estate were hit hardest, while energy stocks remained relatively stable due to rising oil prices."
-    ]
-},
-"5": {
-    "title": "Breakthrough in Quantum Computing Promises Faster AI Training",
-    "subtitle": "Researchers at MIT unveil a 256-qubit processor",
-    "category": "Tech",
-    "source": "TechCrunch",
-    "date": "TechCrunch • Posted: Apr 3, 2025 9:30 AM EDT",
-    "image": "5_quantum_ai.png",
-    "logo": "techcrunch_logo.png",
-    "content": [
-        "In a major step forward, MIT researchers announced the development of a 256-qubit quantum processor capable of performing machine learning optimizations at unprecedented speeds.",
-        "This innovation could significantly reduce the time and cost required to train large-scale AI models.",
-        "Industry leaders like Google and IBM praised the advancement and hinted at future partnerships to integrate quantum acceleration into commercial systems.",
-        "Critics, however, warned that broader accessibility to such power could further deepen the digital divide."
-    ]
-},
-"6": {
-    "title": "Protests Erupt Worldwide Over Rising Food Prices",
-    "subtitle": "Demonstrators call for government intervention amid economic hardship",
-    "category": "World",
-    "source": "BBC",
-    "date": "BBC • Posted: Apr 4, 2025 6:45 PM EDT",
-    "image": "6_food_protests.png",
-    "logo": "bbc_logo.png",
-    "content": [
-        "Major cities across the globe saw mass protests today as thousands took to the streets demanding urgent action against rising food prices.",
-        "Supply chain disruptions, climate-related crop failures, and ongoing conflicts have contributed to a steep rise in basic food costs.",
-        "Protesters in cities like Cairo, Manila, and Buenos Aires called for subsidies, food aid, and regulatory interventions.",
-        "The World Food Programme warned that without global cooperation, food insecurity could hit unprecedented levels by the end of 2025."
-    ]
-},
-"7": {
-    "title": "New Climate Deal Reached at Global Summit",
-    "subtitle": "Nations commit to aggressive emissions cuts by 2030",
-    "category": "Climate",
-    "source": "Reuters",
-    "date": "Reuters • Posted: Apr 5, 2025 4:00 PM EDT",
-    "image": "7_climate_deal.png",
-    "logo": "reuters_logo.png",
-    "content": [
-        "World leaders have agreed to a landmark climate deal at the 2025 Global Summit, aiming to cut carbon emissions by 50% before 2030.",
-        "The agreement includes binding targets for both developed and developing nations, with a focus on renewable energy and climate finance.",
-        "Critics argue the deal lacks enforcement mechanisms, but environmental groups call it a significant step forward.",
-        "The summit also addressed loss and damage payments for vulnerable countries already affected by climate change."
-    ]
-},
-"8": {
-    "title": "Tech Giants Battle Over Generative AI Dominance",
-    "subtitle": "Companies race to release faster, smarter language models",
-    "category": "Tech",
-    "source": "CNN",
-    "date": "CNN • Posted: Apr 6, 2025 11:15 AM EDT",
-    "image": "8_ai_wars.png",
-    "logo": "cnn_logo.png",
-    "content": [
-        "Major tech companies including OpenAI, Google, and Meta are locked in a competitive sprint to dominate the generative AI market.",
-        "New models claim better reasoning, multimodal support, and improved ethics filtering. Meanwhile, open-source competitors are rapidly closing the gap.",
-        "The U.S. government is considering new regulations around model training data and transparency.",
-        "Analysts warn that unchecked AI deployment could lead to misinformation surges and power concentration."
-    ]
-},
-"9": {
-    "title": "Global Economic Forecast Sees Slower Growth",
-    "subtitle": "IMF revises GDP projections amid uncertainty",
-    "category": "Business",
-    "source": "BBC",
-    "date": "BBC • Posted: Apr 7, 2025 10:00 AM EDT",
-    "image": "9_imf_forecast.png",
-    "logo": "bbc_logo.png",
-    "content": [
-        "The International Monetary Fund has downgraded its global GDP forecast for 2025, citing persistent inflation and geopolitical instability.",
-        "Growth for advanced economies is expected to hover around 1.3%, while emerging markets will grow at 3.9%, down from previous estimates.",
-        "Economists point to sluggish consumer demand and trade disruptions as key factors.",
-        "The IMF has urged governments to balance fiscal discipline with targeted stimulus."
-    ]
-},
-"10": {
-    "title": "Voters Head to Polls in Key European Elections",
-    "subtitle": "Nationalist parties seek gains amid economic discontent",
-    "category": "Politics",
-    "source": "CBC",
-    "date": "CBC • Posted: Apr 8, 2025 7:30 PM EDT",
-    "image": "10_europe_votes.png",
-    "logo": "cbc_logo.png",
-    "content": [
-        "Millions of voters across Europe are casting ballots in elections that could reshape national and EU-wide policies.",
-        "Economic dissatisfaction, immigration, and energy prices are dominating the campaigns.",
-        "Right-wing and nationalist parties are polling stronger than expected, sparking concern among centrist coalitions.",
-        "The results could impact not only domestic policies but also Europe's position on global issues like climate and trade."
-    ]
-}
-
-
-}
-
-POLLS = {
-    "1": {
-        "article_id": "1",
-        "question": "Do you think enough is being done to prevent climate-related disasters like wildfires?",
-        "options": [
-            {"label": "Yes, efforts are sufficient", "percentage": 18},
-            {"label": "More action is needed", "percentage": 72},
-            {"label": "Not sure", "percentage": 8},
-            {"label": "It’s not a priority", "percentage": 2}
-        ]
-    },
-    "2": {
-        "article_id": "2",
-        "question": "How do you think the new tariffs by major economies will affect global trade in the next 1–2 years?",
-        "options": [
-            {"label": "Significant Negative Impact", "percentage": 39},
-            {"label": "Some Negative Impact", "percentage": 55},
-            {"label": "Some Positive Impact", "percentage": 4},
-            {"label": "Significant Positive Impact", "percentage": 2}
-        ]
-    },
-    "3": {
-    "article_id": "3",
-    "question": "Are current global climate efforts enough to curb CO2 emissions?",
-    "options": [
-        {"label": "Yes, it's improving", "percentage": 22},
-        {"label": "Not even close", "percentage": 60},
-        {"label": "Too early to tell", "percentage": 12},
-        {"label": "Don’t care", "percentage": 6}
-    ]
-},
-    "4": {
-    "article_id": "4",
-    "question": "Do you support central banks raising interest rates to control inflation?",
-    "options": [
-        {"label": "Yes, it’s necessary", "percentage": 48},
-        {"label": "No, it harms growth", "percentage": 38},
-        {"label": "Not sure", "percentage": 10},
-        {"label": "I don't follow finance", "percentage": 4}
-    ]
-},
-"5": {
-    "article_id": "5",
-    "question": "Will quantum computing revolutionize artificial intelligence in the next decade?",
-    "options": [
-        {"label": "Yes, it's a game changer", "percentage": 58},
-        {"label": "Too early to tell", "percentage": 28},
-        {"label": "No, it's overhyped", "percentage": 10},
-        {"label": "I don’t understand quantum computing", "percentage": 4}
-    ]
-},
-"6": {
-    "article_id": "6",
-    "question": "Should governments intervene to control food prices?",
-    "options": [
-        {"label": "Yes, urgently", "percentage": 65},
-        {"label": "Only if prices keep rising", "percentage": 20},
-        {"label": "No, let markets adjust", "percentage": 10},
-        {"label": "I’m not sure", "percentage": 5}
-    ]
-},
-"7": {
-    "article_id": "7",
-    "question": "Do you believe this climate agreement will lead to real change?",
-    "options": [
-        {"label": "Yes, it's historic", "percentage": 45},
-        {"label": "Only if enforced", "percentage": 35},
-        {"label": "No, just talk", "percentage": 15},
-        {"label": "Not sure", "percentage": 5}
-    ]
-},
-"8": {
-    "article_id": "8",
-    "question": "Should governments regulate the development of generative AI?",
-    "options": [
-        {"label": "Yes, urgently", "percentage": 52},
-        {"label": "Maybe, with caution", "percentage": 30},
-        {"label": "No, it will slow innovation", "percentage": 14},
-        {"label": "Unsure", "percentage": 4}
-    ]
-},
-"9": {
-    "article_id": "9",
-    "question": "Are you worried about the slowing global economy?",
-    "options": [
-        {"label": "Yes, it's already affecting me", "percentage": 55},
-        {"label": "Somewhat concerned", "percentage": 30},
-        {"label": "No, it’s manageable", "percentage": 10},
-        {"label": "Not paying attention", "percentage": 5}
-    ]
-},
-"10": {
-    "article_id": "10",
-    "question": "Do you think nationalist parties will gain ground in Europe?",
-    "options": [
-        {"label": "Yes, definitely", "percentage": 41},
-        {"label": "Some, but not a majority", "percentage": 37},
-        {"label": "No, center will hold", "percentage": 17},
-        {"label": "Don’t know", "percentage": 5}
-    ]
-}
-
-
-}
-
-DISCUSSIONS = {
-    1: {
-        "article": {
-            "summary": ARTICLES["1"]["subtitle"],
-            "source": ARTICLES["1"]["source"],
-            "category": ARTICLES["1"]["category"],
-            "image": ARTICLES["1"]["image"],
-            "logo": ARTICLES["1"]["logo"]
-        },
-        "comments": [
-            {
-                "user": "John Smith",
-                "comment": "The wildfires have become a serious issue lately. I think we need stronger climate policies to prevent this.",
-                "likes": 20,
-                "dislikes": 2,
-                "replies": 13
-            },
-            {
-                "user": "David Brown",
-                "comment": "Completely agree. It's sad to see ancient temples incinerated due to lack of preparedness.",
-                "likes": 35,
-                "dislikes": 3,
-                "replies": 21
-            }
-        ]
-    },
-    2: {
-        "article": {
-            "summary": ARTICLES["2"]["subtitle"],
-            "source": ARTICLES["2"]["source"],
-            "category": ARTICLES["2"]["category"],
-            "image": ARTICLES["2"]["image"],
-            "logo": ARTICLES["2"]["logo"]
-        },
-        "comments": [
-            {
-                "user": "John Smith",
-                "comment": "I've been going through the latest announcements on tariffs and wanted to break it down by country...",
-                "likes": 20,
-                "dislikes": 2,
-                "replies": 13
-            },
-            {
-                "user": "David Brown",
-                "comment": "Interesting topic! From what I’ve seen, countries like the U.S., China, and the EU are making the most noise about tariff adjustments. Anyone have insights into how China’s reacting?",
-                "likes": 35,
-                "dislikes": 3,
-                "replies": 21
-            }
-        ]
-    },
-    3: {
+    return STATIC_SERVER.serve(filename)
+
+IMAGE_MANIFEST = DerivativeManifest(os.path.join(app.root_path, 'static'))
+
+def preferred_image_format():
+    return "avif" if "image/avif" in request.headers.get("Accept", "") else "webp"
+
+def make_image_url(host, filename, variant=None):
+    # Ingested articles link to the publisher's own image.
+    if filename.startswith(("http://", "https://")):
+        return filename
+    if variant:
+        filename = IMAGE_MANIFEST.resolve(filename, variant, preferred_image_format())
+    return f"{host}static/{filename}"
+
+def api_response(key, build, tags=()):
+    return conditional_json(key, build, context=(request.host_url, preferred_image_format()),
+                            vary="Accept", version=g.content.version, tags=tags)
+
+# Cached bodies are tagged with what they embed, so a change drops only those; see PayloadCache.
+FEED_TAG = "feed"
+SEARCH_TAG = "search"
+# Fields that decide where an article appears in feeds; changing one re-lays them all out.
+FEED_FIELDS = ("category", "source", "date")
+
+def article_tags(*ids):
+    return [f"article:{id}" for id in ids]
+
+def card_tags(*tags):
+    """Tags for a body listing article cards: `tags` plus every article shown."""
+    return lambda payload: [*tags, *article_tags(*(card["id"] for card in payload["data"]["articles"]))]
+
+def lookup_articles(ids, content=False):
+    """Return {id: article} from the in-memory corpus, falling back to storage for ids it lacks."""
+    ids = list(ids)
+    articles = CORPUS.get_many(ids, content)
+    missing = [id for id in ids if id not in articles]
+    if missing:
+        articles.update(REPOSITORY.get_articles(missing))
+    return articles
+
+def lookup_seqs(ids):
+    """Return {id: seq} from the in-memory corpus, falling back to storage for ids it lacks."""
+    ids = list(ids)
+    seqs = CORPUS.seqs(ids)
+    missing = [id for id in ids if id not in seqs]
+    if missing:
+        seqs.update(REPOSITORY.article_seqs(missing))
+    return seqs
+
+def build_article(article_id, host):
+    article = CORPUS.get(article_id) or REPOSITORY.get_article(article_id)
+    if article is None:
+        return None
+    article_copy = article.copy()
+    article_copy["image_url"] = make_image_url(host, article["image"], "hero")
+    article_copy["publisher_logo_url"] = make_image_url(host, article["logo"], "thumbnail")
+    return article_copy
+
+def summarize_article(id, article, host):
+    return {
+        "id": id,
+        "title": article["title"],
+        "summary": article["subtitle"],
+        "source": article["source"],
+        "category": article["category"],
+        "imageUrl": make_image_url(host, article["image"], "card"),
+        "sourceLogo": make_image_url(host, article["logo"], "thumbnail")
+    }
+
+# Longer pages, up to STREAM_LIMIT, are streamed as they are encoded instead of cached whole.
+PAGE_LIMIT = 100
+STREAM_LIMIT = 10000
+STREAM_BATCH = 500
+FRAGMENTS = FragmentCache()
+
+def collect_featured(category, source, limit, after):
+    """Return ([(id, article, story sources), ...], next `after`), one item per story cluster.
+
+    Filtering by source keeps that outlet's own copies instead.
+    """
+    items = []
+    while len(items) < limit:
+        page, after = REPOSITORY.list_feed_page(category, source, limit=limit - len(items), after=after)
+        for id, article in page:
+            if source or STORY_CLUSTERS.is_representative(id):
+                items.append((id, article, tuple(STORY_CLUSTERS.members(id))))
+        if after is None:
+            break
+    return items, after
+
+def featured_card(id, article, sources, host):
+    card = summarize_article(id, article, host)
+    card["sources"] = [{"id": member_id, "source": member_source} for member_id, member_source in sources]
+    return card
+
+def build_featured_articles(content, category, source, limit, cursor, host):
+    """One card per story cluster, listing every outlet that carries it."""
+    page = content.featured(category, limit) if not source and not cursor else None
+    if page is not None:
+        items, after = page
+        items = [(id, article, sources) for id, _, article, sources in items]
+    else:
+        items, after = collect_featured(category, source, limit, decode_cursor(cursor) if cursor else None)
+    featured_articles = [featured_card(id, article, sources, host) for id, article, sources in items]
+    next_cursor = encode_cursor(after) if after is not None else None
+    return {"data": {"articles": featured_articles, "nextCursor": next_cursor}}
+
+def stream_featured_articles(category, source, limit, cursor, host):
+    """build_featured_articles for long pages: cards are read and encoded a batch at a time."""
+    after = decode_cursor(cursor) if cursor else None
+    variant = ("featured", host, preferred_image_format())
+
+    def cards():
+        nonlocal after
+        remaining = limit
+        while remaining:
+            items, after = collect_featured(category, source, min(remaining, STREAM_BATCH), after)
+            for id, article, sources in items:
+                yield FRAGMENTS.get(id, variant + (sources,), lambda: featured_card(id, article, sources, host))
+            remaining -= len(items)
+            if after is None:
+                break
+
+    def next_cursor():
+        return b'],"nextCursor":' + encode(encode_cursor(after) if after is not None else None) + b"}}"
+
+    return encode_list(b'{"data":{"articles":[', cards(), next_cursor)
+
+def timeline_cards(ids, host):
+    """Feed cards for `ids` in order, with publish time and every outlet carrying the story."""
+    articles = lookup_articles(ids)
+    cards = []
+    for id in ids:
+        if id in articles:
+            card = summarize_article(id, articles[id], host)
+            published = parse_posted_date(articles[id]["date"])
+            card["publishedDate"] = published.astimezone(timezone.utc).isoformat() if published else None
+            card["sources"] = [{"id": member_id, "source": member_source}
+                               for member_id, member_source in STORY_CLUSTERS.members(id)]
+            cards.append(card)
+    return cards
+
+def build_breaking_articles(content, limit, host):
+    return {"data": {"articles": timeline_cards([id for id, _ in content.breaking(limit)], host)}}
+
+def build_latest_articles(content, since, limit, host):
+    return {"data": {"articles": timeline_cards(content.latest(since, limit), host)}}
+
+def build_trending_articles(limit, host):
+    """The most viewed articles of the last hour, with their estimated view counts."""
+    views = dict(TRENDING.top(limit))
+    cards = timeline_cards(list(views), host)
+    for card in cards:
+        card["views"] = views[card["id"]]
+    return {"data": {"articles": cards}}
+
+def parse_since(value):
+    """Accept seconds since the epoch or an ISO 8601 timestamp (UTC unless it says otherwise)."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+def poll_options(poll, shares):
+    return [{"label": option["label"], "percentage": share}
+            for option, share in zip(poll["options"], shares)]
+
+def build_poll(poll_id, host):
+    poll = POLL_VOTES.definition(poll_id)
+    counts = POLL_VOTES.counts(poll_id)
+    if poll is None or counts is None:
+        return None
+    article = lookup_articles([poll["article_id"]])[poll["article_id"]]
+    return {
         "article": {
-            "summary": ARTICLES["3"]["subtitle"],
-            "source": ARTICLES["3"]["source"],
-            "category": ARTICLES["3"]["category"],
-            "image": ARTICLES["3"]["image"],
-            "logo": ARTICLES["3"]["logo"]
-        },
-        "comments": [
-            {
-                "user": "Aisha Khan",
-                "comment": "These numbers are terrifying. We're running out of time.",
-                "likes": 27,
-                "dislikes": 1,
-                "replies": 10
-            },
-            {
-                "user": "Thomas Green",
-                "comment": "Governments talk big but act slow. We need global enforcement mechanisms.",
-                "likes": 42,
-                "dislikes": 5,
-                "replies": 17
-            }
-        ]
-    },
-    4: {
-    "article": {
-        "summary": ARTICLES["4"]["subtitle"],
-        "source": ARTICLES["4"]["source"],
-        "category": ARTICLES["4"]["category"],
-        "image": ARTICLES["4"]["image"],
-        "logo": ARTICLES["4"]["logo"]
-    },
-    "comments": [
-        {
-            "user": "Maria Cheng",
-            "comment": "Rate hikes might help inflation, but they’ll crush borrowing power for average people.",
-            "likes": 34,
-            "dislikes": 5,
-            "replies": 11
-        },
-        {
-            "user": "Ben Howard",
-            "comment": "It’s a necessary move. Let the economy correct before another bubble forms.",
-            "likes": 28,
-            "dislikes": 3,
-            "replies": 9
-        }
-    ]
-},
-5: {
-    "article": {
-        "summary": ARTICLES["5"]["subtitle"],
-        "source": ARTICLES["5"]["source"],
-        "category": ARTICLES["5"]["category"],
-        "image": ARTICLES["5"]["image"],
-        "logo": ARTICLES["5"]["logo"]
-    },
-    "comments": [
-        {
-            "user": "Laura Zhang",
-            "comment": "The quantum leap we've been waiting for — AI training needs this badly.",
-            "likes": 50,
-            "dislikes": 4,
-            "replies": 15
-        },
-        {
-            "user": "Omar Patel",
-            "comment": "I hope this doesn’t become a tool monopolized by tech giants.",
-            "likes": 33,
-            "dislikes": 6,
-            "replies": 7
-        }
-    ]
-},
-6: {
-    "article": {
-        "summary": ARTICLES["6"]["subtitle"],
-        "source": ARTICLES["6"]["source"],
-        "category": ARTICLES["6"]["category"],
-        "image": ARTICLES["6"]["image"],
-        "logo": ARTICLES["6"]["logo"]
-    },
-    "comments": [
-        {
-            "user": "Rania Ibrahim",
-            "comment": "I’m literally skipping meals. Something needs to be done!",
-            "likes": 61,
-            "dislikes": 2,
-            "replies": 20
-        },
-        {
-            "user": "Carlos Romero",
-            "comment": "This is happening everywhere — even groceries are becoming a luxury.",
-            "likes": 49,
-            "dislikes": 3,
-            "replies": 14
-        }
-    ]
-},
-7: {
-    "article": {
-        "summary": ARTICLES["7"]["subtitle"],
-        "source": ARTICLES["7"]["source"],
-        "category": ARTICLES["7"]["category"],
-        "image": ARTICLES["7"]["image"],
-        "logo": ARTICLES["7"]["logo"]
-    },
-    "comments": [
-        {
-            "user": "Fatima Noor",
-            "comment": "Glad to see real commitments. Let’s hope it’s followed by real action.",
-            "likes": 46,
-            "dislikes": 3,
-            "replies": 8
-        },
-        {
-            "user": "Yann Dubois",
-            "comment": "No enforcement means nothing will happen, just another PR show.",
-            "likes": 31,
-            "dislikes": 5,
-            "replies": 6
-        }
-    ]
-},
-8: {
-    "article": {
-        "summary": ARTICLES["8"]["subtitle"],
-        "source": ARTICLES["8"]["source"],
-        "category": ARTICLES["8"]["category"],
-        "image": ARTICLES["8"]["image"],
-        "logo": ARTICLES["8"]["logo"]
-    },
-    "comments": [
-        {
-            "user": "Sophia Li",
-            "comment": "We're moving too fast with this tech. Oversight is critical.",
-            "likes": 39,
-            "dislikes": 6,
-            "replies": 9
-        },
-        {
-            "user": "Max Jensen",
-            "comment": "Regulating now will just kill open-source innovation.",
-            "likes": 25,
-            "dislikes": 7,
-            "replies": 4
-        }
-    ]
-},
-9: {
-    "article": {
-        "summary": ARTICLES["9"]["subtitle"],
-        "source": ARTICLES["9"]["source"],
-        "category": ARTICLES["9"]["category"],
-        "image": ARTICLES["9"]["image"],
-        "logo": ARTICLES["9"]["logo"]
-    },
-    "comments": [
-        {
-            "user": "Nina Alvarez",
-            "comment": "I feel the slowdown already — job market is stalling.",
-            "likes": 42,
-            "dislikes": 4,
-            "replies": 10
-        },
-        {
-            "user": "Mikhail Petrov",
-            "comment": "We’ve been here before. Governments should prepare better.",
-            "likes": 30,
-            "dislikes": 3,
-            "replies": 6
-        }
-    ]
-},
-10: {
-    "article": {
-        "summary": ARTICLES["10"]["subtitle"],
-        "source": ARTICLES["10"]["source"],
-        "category": ARTICLES["10"]["category"],
-        "image": ARTICLES["10"]["image"],
-        "logo": ARTICLES["10"]["logo"]
-    },
-    "comments": [
-        {
-            "user": "Lena Kravitz",
-            "comment": "Nationalism is rising because people are frustrated and left behind.",
-            "likes": 38,
-            "dislikes": 7,
-            "replies": 12
+            "title": article["title"],
+            "summary": article["subtitle"],
+            "source": article["source"],
+            "category": article["category"],
+            "image_url": make_image_url(host, article["image"], "card"),
+            "logo_url": make_image_url(host, article["logo"], "thumbnail"),
         },
-        {
-            "user": "Jordi Morales",
-            "comment": "Let’s hope voters don’t fall for populist promises again.",
-            "likes": 34,
-            "dislikes": 6,
-            "replies": 7
-        }
-    ]
-}
+        "question": poll["question"],
+        "options": poll_options(poll, percentages(counts))
+    }
 
+def build_bundle(article_id, poll_id, host):
+    article = build_article(article_id, host)
+    if article is None:
+        return None
+    poll = POLL_VOTES.definition(poll_id) if poll_id is not None else None
+    counts = POLL_VOTES.counts(poll_id) if poll else None
+    comments, next_cursor = DISCUSSIONS.page(article_id, limit=BUNDLE_COMMENTS)
+    return {
+        "article": article,
+        "poll": {
+            "id": poll_id,
+            "question": poll["question"],
+            "options": poll_options(poll, percentages(counts))
+        } if counts is not None else None,
+        "discussion": {"comments": comments, "nextCursor": next_cursor}
+    }
 
-}
+def build_article_batch(ids, host):
+    articles = lookup_articles(ids)
+    return {"data": {"articles": [summarize_article(id, articles[id], host)
+                                  for id in ids if id in articles]}}
 
-def make_image_url(host, filename):
-    return f"{host}static/{filename}"
+def discussion_header(article, host):
+    return {
+        "summary": article["summary"],
+        "source": article["source"],
+        "category": article["category"],
+        "image_url": make_image_url(host, article["image"], "card"),
+        "logo_url": make_image_url(host, article["logo"], "thumbnail")
+    }
+
+def build_discussions(article_id, sort, limit, cursor, host):
+    article = DISCUSSIONS.article(str(article_id))
+    if not article:
+        return {"article": {}, "comments": []}
+
+    comments, next_cursor = DISCUSSIONS.page(str(article_id), sort=sort, limit=limit, cursor=cursor)
+    return {
+        "article": discussion_header(article, host),
+        "comments": comments,
+        "nextCursor": next_cursor
+    }
+
+def stream_discussions(article_id, article, sort, limit, cursor, host):
+    """build_discussions for long pages: comments are read and encoded a batch at a time."""
+    def comments():
+        nonlocal cursor
+        remaining = limit
+        while remaining:
+            page, cursor = DISCUSSIONS.page(str(article_id), sort=sort, limit=min(remaining, STREAM_BATCH),
+                                            cursor=cursor)
+            for comment in page:
+                yield encode(comment)
+            remaining -= len(page)
+            if cursor is None:
+                break
+
+    def next_cursor():
+        return b'],"nextCursor":' + encode(cursor) + b"}"
+
+    return encode_list(b'{"article":' + encode(discussion_header(article, host)) + b',"comments":[',
+                       comments(), next_cursor)
+
+def build_replies(article_id, comment_id, sort, limit, cursor):
+    comments, next_cursor = DISCUSSIONS.page(article_id, parent_id=comment_id, sort=sort,
+                                             limit=limit, cursor=cursor)
+    return {"comments": comments, "nextCursor": next_cursor}
+
+def thread_page_args(max_limit=PAGE_LIMIT):
+    """Parse sort, limit and cursor for a comment listing; raises ValueError if invalid."""
+    sort = request.args.get("sort", "top")
+    if sort not in SORTS:
+        raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+    limit = min(max(request.args.get("limit", 20, type=int), 1), max_limit)
+    cursor = request.args.get("cursor") or None
+    if cursor:
+        decode_cursor(cursor, size=2 if sort == "top" else 1)
+    return sort, limit, cursor
+
+def build_search_results(query, category, source, limit, offset, host):
+    if not query:
+        page, _ = REPOSITORY.list_feed_page(category, source, limit=limit, offset=offset)
+        total = REPOSITORY.count_articles(category, source)
+        hits = [(id, 0.0) for id, _ in page]
+        articles_by_id = dict(page)
+    else:
+        total, hits = SEARCH_INDEX.search(query, category=category, source=source,
+                                          limit=limit, offset=offset)
+        articles_by_id = lookup_articles(id for id, _ in hits)
+    articles = []
+    for id, score in hits:
+        item = summarize_article(id, articles_by_id[id], host)
+        item["score"] = round(score, 4)
+        articles.append(item)
+    return {"data": {"articles": articles, "total": total, "limit": limit, "offset": offset}}
+
+def build_personalized_articles(user_id, limit, host):
+    """Rank the corpus against the user's reads, votes and saves, one card per story."""
+    events = USER_ACTIVITY.events(user_id) if user_id else []
+    profile = ARTICLE_VECTORS.profile(events)
+    # Over-fetch so dropping later copies of a story still fills the page.
+    read = {id for id, kind in events if kind == "read"}
+    ranked = [(id, score) for id, score in ARTICLE_VECTORS.rank(profile, read, limit * 2)
+              if STORY_CLUSTERS.is_representative(id)][:limit]
+    articles_by_id = lookup_articles([id for id, _ in ranked])
+    saved = saved_ids(user_id, articles_by_id) if user_id else set()
+    articles = []
+    for id, score in ranked:
+        if id in articles_by_id:
+            item = summarize_article(id, articles_by_id[id], host)
+            item["score"] = round(score, 4)
+            item["saved"] = id in saved
+            articles.append(item)
+    return {"data": {"articles": articles}}
+
+def saved_ids(user_id, article_ids):
+    """The subset of `article_ids` the user has saved."""
+    seqs = lookup_seqs(article_ids)
+    saved = SAVED_ARTICLES.saved_among(user_id, seqs.values())
+    return {id for id, seq in seqs.items() if seq in saved}
+
+def build_saved_articles(user_id, limit, cursor, host):
+    seqs = SAVED_ARTICLES.saved(user_id)
+    if cursor is not None:
+        seqs = [seq for seq in seqs if seq < cursor]
+    page = seqs[:limit]
+    articles = REPOSITORY.get_articles_by_seq(page)
+    cards = []
+    for seq in page:
+        if seq in articles:
+            card = summarize_article(*articles[seq], host)
+            card["saved"] = True
+            cards.append(card)
+    next_cursor = encode_cursor(page[-1]) if len(seqs) > limit else None
+    return {"data": {"articles": cards, "nextCursor": next_cursor}}
+
+BUNDLE_COMMENTS = 20
+MAX_BATCH_IDS = 100
+
+# First page of the featured feed held in each snapshot, per category.
+FEATURED_PAGE = 50
+
+def build_snapshot(version):
+    times, ids, breaking = TIMELINE.freeze()
+    pages = {}
+    for category in [""] + REPOSITORY.list_categories():
+        items, after = collect_featured(category, "", FEATURED_PAGE, None)
+        seqs = lookup_seqs(id for id, _, _ in items)
+        pages[category] = (tuple((id, seqs[id], article, sources) for id, article, sources in items), after)
+    return ContentSnapshot(version, times, ids, breaking, pages)
+
+def changed_tags(items):
+    """Cache tags affected by writing [(id, article), ...]; call before CORPUS sees them."""
+    tags = {SEARCH_TAG}
+    for article_id, article in items:
+        previous = CORPUS.get(article_id, content=False)
+        if previous is None or any(previous[field] != article[field] for field in FEED_FIELDS):
+            tags.add(FEED_TAG)
+        tags.update(article_tags(article_id))
+    return tags
+
+def content_changed(tags=None):
+    """Call after writing to REPOSITORY and the indexes; publishes a new snapshot.
+
+    Drops the cached bodies carrying any of `tags` (see changed_tags), or all of
+    them if it is None.
+    """
+    snapshot = CONTENT.update(build_snapshot)
+    if tags is None:
+        payload_cache.bump(snapshot.version)
+        FRAGMENTS.clear()
+    else:
+        payload_cache.invalidate(tags, snapshot.version)
+        FRAGMENTS.invalidate(tag.split(":", 1)[1] for tag in tags if tag.startswith("article:"))
+
+# Held while writing an article to the indexes, so the watcher never applies one twice.
+INDEX_LOCK = threading.Lock()
+
+def upsert_article(article_id, article):
+    with INDEX_LOCK:
+        tags = changed_tags([(article_id, article)])
+        REPOSITORY.save_article(article_id, article)
+        seq = REPOSITORY.article_seqs([article_id])[article_id]
+        CORPUS.add(seq, article_id, article)
+        SEARCH_INDEX.add(article_id, article)
+        STORY_CLUSTERS.add(article_id, article)
+        ARTICLE_VECTORS.add(article_id, article)
+        TIMELINE.add(article_id, article)
+        content_changed(tags)
+
+REPOSITORY = Repository(os.environ.get("NEWSBLEND_DB", os.path.join(app.root_path, "newsblend.db")))
+if REPOSITORY.is_empty():
+    REPOSITORY.seed(seed_data.ARTICLES, seed_data.POLLS, seed_data.COMMENTS)
+
+# Paragraphs live in a file mapped by every worker; see CompactCorpus.
+CORPUS = CompactCorpus(os.environ.get("NEWSBLEND_CORPUS", REPOSITORY.path + ".corpus"))
+CORPUS.load(REPOSITORY.iter_article_rows())
+
+# Picks up after the last row loaded, so nothing stored meanwhile is missed or loaded twice.
+ARTICLE_WATCHER = ArticleWatcher(REPOSITORY, last_seq=CORPUS.last_seq)
+
+SEARCH_INDEX = SearchIndex()
+STORY_CLUSTERS = StoryClusters()
+ARTICLE_VECTORS = ArticleVectors()
+TIMELINE = ArticleTimeline(STORY_CLUSTERS)
+_articles = list(CORPUS.items())
+for _id, _article in _articles:
+    SEARCH_INDEX.add(_id, _article)
+STORY_CLUSTERS.add_many(_articles)
+ARTICLE_VECTORS.add_many(_articles)
+TIMELINE.add_many(_articles)
+del _articles
+CONTENT = SnapshotStore()
+content_changed()
+
+def index_new_articles(rows):
+    with INDEX_LOCK:
+        # upsert_article has already applied the rows this process stored itself.
+        rows = [row for row in rows if CORPUS.seq(row[1]) != row[0]]
+        if not rows:
+            return
+        items = [(article_id, article) for _, article_id, article in rows]
+        tags = changed_tags(items)
+        CORPUS.add_many(rows)
+        for article_id, article in items:
+            SEARCH_INDEX.add(article_id, article)
+        STORY_CLUSTERS.add_many(items)
+        ARTICLE_VECTORS.add_many(items)
+        TIMELINE.add_many(items)
+        content_changed(tags)
+
+ARTICLE_WATCHER.subscribe(index_new_articles)
+ARTICLE_WATCHER.start()
+atexit.register(ARTICLE_WATCHER.stop)
+
+POLL_VOTES = PollVotes(REPOSITORY)
+POLL_VOTES.start()
+atexit.register(POLL_VOTES.stop)
+
+DISCUSSIONS = DiscussionThreads(REPOSITORY)
+DISCUSSIONS.start()
+atexit.register(DISCUSSIONS.stop)
+
+# Votes, comments and reactions, here or picked up from other processes, drop the cached
+# bodies that show them.
+POLL_VOTES.subscribe(lambda poll_id: payload_cache.invalidate([f"poll:{poll_id}"]))
+DISCUSSIONS.subscribe(lambda article_id: payload_cache.invalidate([f"discussion:{article_id}"]))
+
+SAVED_ARTICLES = SavedArticles(REPOSITORY)
+
+USER_ACTIVITY = UserActivity(REPOSITORY)
+USER_ACTIVITY.start()
+atexit.register(USER_ACTIVITY.stop)
+
+# Views per article over the last hour, in fixed memory; see ViewCounter.
+TRENDING = ViewCounter()
+
+
+def before_fork():
+    """Quiesce a pre-forking master once content is loaded and before workers start.
+
+    The master never serves requests, so it needs no flusher threads or database
+    connections. Freezing the heap keeps the collector from touching the loaded
+    content, so workers keep sharing those pages copy-on-write.
+    """
+    ARTICLE_WATCHER.stop()
+    POLL_VOTES.stop()
+    DISCUSSIONS.stop()
+    USER_ACTIVITY.stop()
+    METRICS.stop()
+    REPOSITORY.close()
+    gc.freeze()
+
+
+def after_fork():
+    """Start a forked worker's own flusher threads; connections open lazily."""
+    ARTICLE_WATCHER.start()
+    POLL_VOTES.start()
+    DISCUSSIONS.start()
+    USER_ACTIVITY.start()
+    METRICS.start()
+
+def record_read(article_id):
+    TRENDING.record(article_id)
+    user_id = request.headers.get("X-User-Id")
+    if user_id:
+        USER_ACTIVITY.record(user_id, article_id, "read")
 
 @app.route('/api/articles/<article_id>')
 @cross_origin()
 def get_article(article_id):
-    host = request.host_url
-    article = ARTICLES.get(article_id)
-    if article:
-        article_copy = article.copy()
-        article_copy["image_url"] = make_image_url(host, article["image"])
-        article_copy["publisher_logo_url"] = make_image_url(host, article["logo"])
-        return jsonify(article_copy)
-    return jsonify({"error": "Article not found"}), 404
+    response = api_response(("article", article_id),
+                            lambda: build_article(article_id, request.host_url), article_tags(article_id))
+    if response is None:
+        return jsonify({"error": "Article not found"}), 404
+    record_read(article_id)
+    return response
+
+@app.route('/api/articles/<article_id>/bundle')
+@cross_origin()
+def get_article_bundle(article_id):
+    """Article, its poll and the first page of top comments in one round trip."""
+    response = None
+    # Touching the discussion and poll picks up other processes' changes, which drop the cached body.
+    if DISCUSSIONS.version(article_id) is not None:
+        poll_id = POLL_VOTES.poll_id_for(article_id)
+        if poll_id is not None:
+            POLL_VOTES.counts(poll_id)
+        response = api_response(("bundle", article_id, poll_id),
+                                lambda: build_bundle(article_id, poll_id, request.host_url),
+                                [*article_tags(article_id), f"poll:{poll_id}", f"discussion:{article_id}"])
+    if response is None:
+        return jsonify({"error": "Article not found"}), 404
+    record_read(article_id)
+    return response
+
+@app.route('/api/articles')
+@cross_origin()
+def get_articles():
+    ids = [id.strip() for id in request.args.get("ids", "").split(",") if id.strip()]
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return jsonify({"error": "ids is required"}), 400
+    if len(ids) > MAX_BATCH_IDS:
+        return jsonify({"error": f"At most {MAX_BATCH_IDS} ids per request"}), 400
+    return api_response(("batch", tuple(ids)), lambda: build_article_batch(ids, request.host_url),
+                        article_tags(*ids))
 
 @app.route('/api/articles/featured')
 @cross_origin()
 def get_featured_articles():
-    host = request.host_url
-    featured_articles = []
-    for id, article in ARTICLES.items():
-        featured_articles.append({
-            "id": id,
-            "title": article["title"],
-            "summary": article["subtitle"],
-            "source": article["source"],
-            "category": article["category"],
-            "imageUrl": make_image_url(host, article["image"]),
-            "sourceLogo": make_image_url(host, article["logo"])
-        })
-    return jsonify({"data": {"articles": featured_articles}})
+    category = normalize_category(request.args.get("category"))
+    source = normalize_source(request.args.get("source"))
+    limit = min(max(request.args.get("limit", 20, type=int), 1), STREAM_LIMIT)
+    cursor = request.args.get("cursor") or None
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+    if limit > PAGE_LIMIT:
+        return streamed_json(stream_featured_articles(category, source, limit, cursor, request.host_url))
+    return api_response(
+        ("featured", category, source, limit, cursor),
+        lambda: build_featured_articles(g.content, category, source, limit, cursor, request.host_url),
+        card_tags(FEED_TAG))
+
+@app.route('/api/articles/breaking')
+@cross_origin()
+def get_breaking_articles():
+    limit = min(max(request.args.get("limit", 10, type=int), 1), TIMELINE.size)
+    return api_response(("breaking", limit), lambda: build_breaking_articles(g.content, limit, request.host_url),
+                        card_tags(FEED_TAG))
+
+@app.route('/api/articles/trending')
+@cross_origin()
+def get_trending_articles():
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
+    return jsonify(build_trending_articles(limit, request.host_url))
+
+@app.route('/api/articles/latest')
+@cross_origin()
+def get_latest_articles():
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    since = request.args.get("since")
+    if since:
+        try:
+            since = parse_since(since)
+        except ValueError:
+            return jsonify({"error": "since must be a Unix timestamp or ISO 8601 date"}), 400
+    # Clients poll with arbitrary timestamps; key on the ones that select different articles.
+    since = g.content.latest_since(since or None)
+    return api_response(("latest", since, limit),
+                        lambda: build_latest_articles(g.content, since, limit, request.host_url),
+                        card_tags(FEED_TAG))
+
+@app.route('/api/articles/personalized')
+@cross_origin()
+def get_personalized_articles():
+    user_id = request.headers.get("X-User-Id") or request.args.get("userId")
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    return jsonify(build_personalized_articles(user_id, limit, request.host_url))
+
+@app.route('/api/user/articles/save', methods=['POST'])
+@cross_origin()
+def save_article():
+    """Save an article for the user, or unsave it with {"saved": false}."""
+    body = request.get_json(silent=True) or {}
+    user_id = body.get("userId") or request.headers.get("X-User-Id")
+    article_id = body.get("articleId")
+    saved = body.get("saved", True)
+    if not user_id or not article_id or not isinstance(saved, bool):
+        return jsonify({"error": "userId and articleId are required"}), 400
+    seq = lookup_seqs([str(article_id)]).get(str(article_id))
+    if seq is None:
+        return jsonify({"error": "Article not found"}), 404
+    if saved:
+        SAVED_ARTICLES.save(str(user_id), seq)
+        USER_ACTIVITY.record(str(user_id), str(article_id), "save")
+    else:
+        SAVED_ARTICLES.unsave(str(user_id), seq)
+        USER_ACTIVITY.record(str(user_id), str(article_id), "unsave")
+    return jsonify({"status": "success", "articleId": str(article_id), "saved": saved})
+
+@app.route('/api/user/articles/saved')
+@cross_origin()
+def get_saved_articles():
+    """The user's saved articles, or with ?ids= which of those ids are saved."""
+    user_id = request.headers.get("X-User-Id") or request.args.get("userId")
+    if not user_id:
+        return jsonify({"error": "userId is required"}), 400
+    if "ids" in request.args:
+        ids = list(dict.fromkeys(id.strip() for id in request.args["ids"].split(",") if id.strip()))
+        if len(ids) > MAX_BATCH_IDS:
+            return jsonify({"error": f"At most {MAX_BATCH_IDS} ids per request"}), 400
+        saved = saved_ids(user_id, ids)
+        return jsonify({"data": {"ids": [id for id in ids if id in saved]}})
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    cursor = request.args.get("cursor") or None
+    if cursor:
+        try:
+            cursor = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+    return jsonify(build_saved_articles(user_id, limit, cursor, request.host_url))
+
+@app.route('/api/search')
+@cross_origin()
+def search_articles():
+    query = request.args.get("q", "").strip()
+    category = normalize_category(request.args.get("category"))
+    source = normalize_source(request.args.get("source"))
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    return api_response(
+        ("search", query.lower(), category, source, limit, offset),
+        lambda: build_search_results(query, category, source, limit, offset, request.host_url),
+        card_tags(SEARCH_TAG, FEED_TAG) if not query else card_tags(SEARCH_TAG))
 
 @app.route('/api/polls/<poll_id>')
 @cross_origin()
 def get_poll(poll_id):
-    host = request.host_url
-    poll = POLLS.get(poll_id)
-    if not poll:
+    # The cached body is dropped only when the displayed percentages move.
+    article_id = POLL_VOTES.article_id(poll_id)
+    response = None
+    if article_id is not None:
+        response = api_response(("poll", poll_id),
+                                lambda: build_poll(poll_id, request.host_url),
+                                [f"poll:{poll_id}", *article_tags(article_id)])
+    if response is None:
         return jsonify({"error": "Poll not found"}), 404
-    article = ARTICLES.get(poll["article_id"])
-    return jsonify({
-        "article": {
-            "title": article["title"],
-            "summary": article["subtitle"],
-            "source": article["source"],
-            "category": article["category"],
-            "image_url": make_image_url(host, article["image"]),
-            "logo_url": make_image_url(host, article["logo"]),
-        },
-        "question": poll["question"],
-        "options": poll["options"]
-    })
+    return response
+
+@app.route('/api/polls/<poll_id>/vote', methods=['POST'])
+@cross_origin()
+def vote_on_poll(poll_id):
+    body = request.get_json(silent=True) or {}
+    user_id = body.get("userId") or request.headers.get("X-User-Id")
+    option = body.get("option")
+    if not user_id or not isinstance(option, int) or isinstance(option, bool):
+        return jsonify({"error": "userId and an integer option are required"}), 400
+    try:
+        counts = POLL_VOTES.vote(poll_id, str(user_id), option)
+    except PollNotFound:
+        return jsonify({"error": "Poll not found"}), 404
+    except InvalidOption:
+        return jsonify({"error": "Invalid option"}), 400
+    except AlreadyVoted:
+        return jsonify({"error": "Already voted"}), 409
+    article_id = POLL_VOTES.article_id(poll_id)
+    if article_id is None:
+        return jsonify({"error": "Poll not found"}), 404
+    USER_ACTIVITY.record(str(user_id), article_id, "vote")
+    return jsonify({"status": "success",
+                    "options": poll_options(POLL_VOTES.definition(poll_id), percentages(counts))})
 
 @app.route('/api/discussions/<int:article_id>')
 @cross_origin()
 def get_discussions(article_id):
-    host = request.host_url
-    discussion = DISCUSSIONS.get(article_id)
-    if not discussion:
-        return jsonify({"article": {}, "comments": []})
+    try:
+        sort, limit, cursor = thread_page_args(STREAM_LIMIT)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if limit > PAGE_LIMIT:
+        article = DISCUSSIONS.article(str(article_id))
+        if article:
+            return streamed_json(stream_discussions(article_id, article, sort, limit, cursor, request.host_url))
+    DISCUSSIONS.version(str(article_id))
+    return api_response(("discussions", article_id, sort, limit, cursor),
+                        lambda: build_discussions(article_id, sort, limit, cursor, request.host_url),
+                        [f"discussion:{article_id}", *article_tags(article_id)])
 
-    article = discussion["article"]
-    return jsonify({
-        "article": {
-            "summary": article["summary"],
-            "source": article["source"],
-            "category": article["category"],
-            "image_url": make_image_url(host, article["image"]),
-            "logo_url": make_image_url(host, article["logo"])
-        },
-        "comments": discussion["comments"]
-    })
+@app.route('/api/discussions/<int:article_id>/comments', methods=['POST'])
+@cross_origin()
+def post_comment(article_id):
+    body = request.get_json(silent=True) or {}
+    user = body.get("user")
+    text = body.get("comment")
+    parent_id = body.get("parentId")
+    if not isinstance(user, str) or not user.strip() or not isinstance(text, str) or not text.strip():
+        return jsonify({"error": "user and comment are required"}), 400
+    if len(text) > 2000:
+        return jsonify({"error": "comment is too long"}), 400
+    if parent_id is not None and (not isinstance(parent_id, int) or isinstance(parent_id, bool)):
+        return jsonify({"error": "parentId must be a comment id"}), 400
+    try:
+        comment = DISCUSSIONS.post(str(article_id), user.strip(), text.strip(), parent_id)
+    except DiscussionNotFound:
+        return jsonify({"error": "Article not found"}), 404
+    except CommentNotFound:
+        return jsonify({"error": "Parent comment not found"}), 404
+    return jsonify(comment), 201
+
+@app.route('/api/comments/<int:comment_id>/replies')
+@cross_origin()
+def get_replies(comment_id):
+    try:
+        sort, limit, cursor = thread_page_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    article_id = DISCUSSIONS.article_id_for(comment_id)
+    if article_id is None or DISCUSSIONS.version(article_id) is None:
+        return jsonify({"error": "Comment not found"}), 404
+    return api_response(("replies", comment_id, sort, limit, cursor),
+                        lambda: build_replies(article_id, comment_id, sort, limit, cursor),
+                        [f"discussion:{article_id}"])
+
+@app.route('/api/comments/<int:comment_id>/reactions', methods=['POST'])
+@cross_origin()
+def react_to_comment(comment_id):
+    reaction = (request.get_json(silent=True) or {}).get("reaction")
+    if reaction not in REACTIONS:
+        return jsonify({"error": f"reaction must be one of {', '.join(REACTIONS)}"}), 400
+    try:
+        likes, dislikes = DISCUSSIONS.react(comment_id, reaction)
+    except CommentNotFound:
+        return jsonify({"error": "Comment not found"}), 404
+    return jsonify({"id": comment_id, "likes": likes, "dislikes": dislikes})
 
 if __name__ == '__main__':
-    app.run(host="0.0.0.0", port=5050, debug=True)
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py).
+    app.run(host="0.0.0.0", port=5050, debug=os.environ.get("NEWSBLEND_DEBUG") == "1")
@@ -0,0 +1,63 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ArticleWatcher:
+    """Notices articles that other processes, such as ingest.py, add to the repository.
+
+    Every `interval` seconds the highest stored sequence number is compared with the
+    last one seen; new rows are read in order and handed to each subscriber as a
+    list of (seq, id, article) tuples.
+
+    Pass `last_seq` to start after the rows a caller has already loaded;
+    otherwise watching starts from what is stored now.
+    """
+
+    def __init__(self, repository, interval=2.0, batch_size=1000, last_seq=None):
+        self.repository = repository
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_seq = repository.max_seq() if last_seq is None else last_seq
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def poll(self):
+        """Deliver articles stored since the last poll; return how many there were."""
+        with self._lock:
+            if self.repository.max_seq() <= self.last_seq:
+                return 0
+            count = 0
+            while True:
+                rows = self.repository.articles_after(self.last_seq, self.batch_size)
+                if not rows:
+                    return count
+                for callback in self._subscribers:
+                    callback(rows)
+                self.last_seq = rows[-1][0]
+                count += len(rows)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Checking for new articles failed; retrying next interval")
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="article-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,58 @@
+"""End-to-end time to open a story: /bundle versus article, poll and discussion calls in sequence.
+
+Each request pays a simulated network round trip on top of real local HTTP time.
+
+    python benchmarks/bundle_bench.py --rtt-ms 150 --repeats 20
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import urllib.request
+
+import corpus  # noqa: F401  (puts the backend directory on sys.path)
+from server import LocalServer
+
+
+def fetch(url, rtt):
+    time.sleep(rtt)
+    with urllib.request.urlopen(url) as response:
+        return len(response.read())
+
+
+def timed(urls, rtt):
+    started = time.perf_counter()
+    size = sum(fetch(url, rtt) for url in urls)
+    return (time.perf_counter() - started) * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rtt-ms", type=float, default=150.0)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ["NEWSBLEND_DB"] = os.path.join(tempfile.mkdtemp(), "bundle.db")
+    from app import app
+
+    rtt = args.rtt_ms / 1000
+    with LocalServer(app) as server:
+        api = f"{server.base_url}/api"
+        sequential, bundle = [], []
+        for i in range(args.repeats):
+            article_id = str(i % 10 + 1)
+            ms, sequential_bytes = timed([f"{api}/articles/{article_id}", f"{api}/polls/{article_id}",
+                                          f"{api}/discussions/{article_id}"], rtt)
+            sequential.append(ms)
+            ms, bundle_bytes = timed([f"{api}/articles/{article_id}/bundle"], rtt)
+            bundle.append(ms)
+
+    print(f"simulated RTT {args.rtt_ms:.0f}ms, {args.repeats} story opens")
+    print(f"3 sequential calls  median {statistics.median(sequential):7.1f}ms  "
+          f"({sequential_bytes} bytes)")
+    print(f"1 bundle call       median {statistics.median(bundle):7.1f}ms  ({bundle_bytes} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Response cache behaviour when content changes under concurrent readers.
+
+Loads the app in-process against a synthetic corpus and warms the cache with
+article, batch, search and feed bodies. Then:
+
+  edit     changes one article's title --edits times and reports how many cached
+           bodies each edit drops, against the whole cache a version bump drops
+  stampede publishes a new article --publishes times, releasing --threads readers
+           at the featured feed right after each, and reports how many times the
+           feed was rebuilt per publish and the readers' latency
+
+    python benchmarks/cache_bench.py --size 10000 --threads 32
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from corpus import synthetic_articles
+from storage import Repository
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--edits", type=int, default=50)
+    parser.add_argument("--publishes", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, "cache.db")
+        articles = synthetic_articles(args.size + args.publishes, seed=11)
+        ids = list(articles)
+        repository = Repository(path)
+        repository.seed({id: articles[id] for id in ids[:args.size]}, {}, {})
+        repository.close()
+        os.environ["NEWSBLEND_DB"] = path
+        import app
+        from payload_cache import payload_cache
+
+        rng = random.Random(5)
+        client = app.app.test_client()
+        warm = [f"/api/articles/{id}" for id in rng.sample(ids[:args.size], 500)]
+        warm += [f"/api/articles?ids={','.join(rng.sample(ids[:args.size], 10))}" for _ in range(200)]
+        warm += [f"/api/search?q={word}" for word in ("climate", "market", "election", "energy", "bank")]
+        warm += ["/api/articles/featured?limit=20", "/api/articles/breaking", "/api/articles/latest"]
+
+        drops, cached = [], []
+        for _ in range(args.edits):
+            for url in warm:
+                client.get(url)
+            before = len(payload_cache)
+            cached.append(before)
+            article_id = rng.choice(ids[:args.size])
+            edited = dict(app.CORPUS.get(article_id), title=f"Edited {rng.random()}")
+            app.upsert_article(article_id, edited)
+            drops.append(before - len(payload_cache))
+        print(f"edit:     {sum(cached) / len(cached):.0f} bodies cached, "
+              f"an edit drops {sum(drops) / len(drops):.1f} on average (max {max(drops)}); "
+              f"a version bump drops them all")
+
+        builds = [0]
+        build_featured = app.build_featured_articles
+
+        def counting_build(*args, **kwargs):
+            builds[0] += 1
+            return build_featured(*args, **kwargs)
+
+        app.build_featured_articles = counting_build
+        latencies, lock = [], threading.Lock()
+        per_publish = []
+        for article_id in ids[args.size:]:
+            app.upsert_article(article_id, articles[article_id])
+            builds[0] = 0
+            start = threading.Barrier(args.threads)
+
+            def reader():
+                reader_client = app.app.test_client()
+                start.wait()
+                started = time.perf_counter()
+                assert reader_client.get("/api/articles/featured?limit=20").status_code == 200
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+
+            readers = [threading.Thread(target=reader) for _ in range(args.threads)]
+            for thread in readers:
+                thread.start()
+            for thread in readers:
+                thread.join()
+            per_publish.append(builds[0])
+        latencies.sort()
+        print(f"stampede: {args.threads} concurrent readers per publish, feed built "
+              f"{sum(per_publish) / len(per_publish):.2f} times per publish (max {max(per_publish)}), "
+              f"p50 {percentile(latencies, 0.5) * 1000:.2f}ms p99 {percentile(latencies, 0.99) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Time to cluster ingest batches into an existing corpus with StoryClusters.
+
+Builds clusters for a synthetic corpus, then adds batches in which a share of the
+articles are lightly edited copies of existing ones (as when several outlets run
+the same wire story). Reports time per batch and how many copies were matched.
+
+    python benchmarks/cluster_bench.py --size 100000 --batch 500
+"""
+import argparse
+import random
+import time
+
+from corpus import SOURCES, synthetic_articles
+from clustering import StoryClusters
+
+
+def edited_copy(article, rng):
+    """The same story under another outlet's name with a new headline ending and one sentence dropped."""
+    words = article["content"][0].split()
+    del words[rng.randrange(len(words))]
+    return dict(article, source=rng.choice(list(SOURCES)), title=article["title"] + " - update",
+                content=[" ".join(words)] + article["content"][1:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--batches", type=int, default=5)
+    parser.add_argument("--copies", type=float, default=0.2, help="share of each batch that copies a story")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    corpus = synthetic_articles(args.size + args.batch * args.batches, seed=3)
+    ids = list(corpus)
+    existing, fresh = ids[:args.size], ids[args.size:]
+
+    clusters = StoryClusters()
+    started = time.perf_counter()
+    clusters.add_many((article_id, corpus[article_id]) for article_id in existing)
+    print(f"initial clustering of {args.size} articles: {time.perf_counter() - started:.1f}s")
+
+    for number in range(args.batches):
+        batch, copied = [], set()
+        for article_id in fresh[number * args.batch:(number + 1) * args.batch]:
+            if rng.random() < args.copies:
+                original = rng.choice(existing)
+                batch.append((f"copy-{article_id}", edited_copy(corpus[original], rng)))
+                copied.add(f"copy-{article_id}")
+            else:
+                batch.append((article_id, corpus[article_id]))
+        started = time.perf_counter()
+        clusters.add_many(batch)
+        elapsed = time.perf_counter() - started
+        matched = sum(not clusters.is_representative(article_id) for article_id in copied)
+        false = sum(not clusters.is_representative(article_id) for article_id, _ in batch
+                    if article_id not in copied)
+        print(f"batch {number + 1}: {len(batch)} articles in {elapsed * 1000:6.1f}ms  "
+              f"copies matched {matched}/{len(copied)}  unrelated articles merged {false}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Bytes on the wire and CPU per request with and without response compression.
+
+Loads the app in-process against a synthetic corpus and, for a set of API
+routes, requests each --repeat times with no Accept-Encoding, with gzip, and
+with brotli if the brotli module is installed, alternating between them.
+Reports the body size and the CPU time (process time) per request once the
+cache is warm, plus what compressing the body on every request would cost
+instead.
+
+    python benchmarks/compression_bench.py --size 5000 --repeat 300
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from corpus import synthetic_articles, synthetic_comments, synthetic_polls
+from storage import Repository
+
+PATHS = ["/api/articles/3", "/api/articles/3/bundle", "/api/polls/3", "/api/articles/featured?limit=20",
+         "/api/articles/latest?limit=20", "/api/search?q=climate", "/api/articles?ids=1,2,3,4,5"]
+
+
+def per_request(client, path, codings, repeat):
+    """Return [(body bytes, CPU seconds per request), ...] per coding, alternating between them."""
+    headers = [{"Accept-Encoding": coding} if coding else {} for coding in codings]
+    sizes = [len(client.get(path, headers=header).data) for header in headers]
+    cpu = [0.0] * len(codings)
+    for _ in range(repeat):
+        for index, header in enumerate(headers):
+            started = time.process_time()
+            client.get(path, headers=header)
+            cpu[index] += time.process_time() - started
+    return [(size, seconds / repeat) for size, seconds in zip(sizes, cpu)]
+
+
+def compress_cost(body, coding, repeat):
+    from compression import compress
+    started = time.process_time()
+    for _ in range(repeat):
+        compress(body, coding)
+    return (time.process_time() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, "compression.db")
+        articles = synthetic_articles(args.size, seed=17)
+        repository = Repository(path)
+        repository.seed(articles, synthetic_polls(articles), synthetic_comments(articles, per_article=3))
+        repository.close()
+        os.environ["NEWSBLEND_DB"] = path
+        import app
+        from compression import ENCODINGS
+
+        client = app.app.test_client()
+        codings = [None] + [coding for coding in ("gzip", "br") if coding in ENCODINGS]
+        print(f"{'route':<32}" + "".join(f"{coding or 'identity':>22}" for coding in codings)
+              + f"{'compress per request':>24}")
+        for route in PATHS:
+            cells = [f"{size:>8} B {cpu * 1e6:>7.0f}us"
+                     for size, cpu in per_request(client, route, codings, args.repeat)]
+            extra = compress_cost(client.get(route).data, "gzip", args.repeat)
+            print(f"{route:<32}" + "".join(f"{cell:>22}" for cell in cells) + f"{f'+{extra * 1e6:.0f}us gzip':>24}")
+        if "br" not in ENCODINGS:
+            print("brotli is not installed; install it to offer br as well")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Synthetic article corpora shaped like the ARTICLES entries in app.py."""
+import itertools
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SOURCES = {
+    "CBC": "cbc_logo.png",
+    "CNN": "cnn_logo.png",
+    "Reuters": "reuters_logo.png",
+    "Bloomberg": "bloomberg_logo.png",
+    "TechCrunch": "techcrunch_logo.png",
+    "BBC": "bbc_logo.png",
+}
+CATEGORIES = ["Politics", "Climate", "Business", "Tech", "World", "Environment"]
+IMAGES = [
+    "1_wildfire.png", "2_tariff.png", "3_climate_co2.png", "4_stock_volatility.png",
+    "5_quantum_ai.png", "6_food_protests.png", "7_climate_deal.png", "8_ai_wars.png",
+    "9_imf_forecast.png", "10_europe_votes.png",
+]
+SEED_WORDS = """
+climate wildfire tariff economy election market inflation carbon emissions summit quantum
+processor protest food prices government policy trade growth forecast energy bank rates
+voters europe nationalist technology regulation model training research investors stocks
+""".split()
+
+
+def vocabulary(size, rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = list(SEED_WORDS)
+    while len(words) < size:
+        words.append("".join(rng.choice(letters) for _ in range(rng.randint(4, 10))))
+    return words
+
+
+def format_date(source, when):
+    hour = when.strftime("%I").lstrip("0")
+    return f"{source} • Posted: {when.strftime('%b')} {when.day}, {when.year} {hour}:{when.strftime('%M %p')} EDT"
+
+
+def synthetic_articles(n, seed=0, vocab_size=50000, paragraph_words=25):
+    """Return an {id: article} dict with Zipf-distributed words."""
+    rng = random.Random(seed)
+    words = vocabulary(vocab_size, rng)
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    sources = list(SOURCES)
+    start = datetime(2025, 1, 1, 6, 0)
+
+    def sentence(count):
+        return " ".join(rng.choices(words, cum_weights=cum_weights, k=count))
+
+    articles = {}
+    for i in range(1, n + 1):
+        source = rng.choice(sources)
+        articles[str(i)] = {
+            "title": sentence(8).capitalize(),
+            "subtitle": sentence(10).capitalize(),
+            "category": rng.choice(CATEGORIES),
+            "source": source,
+            "date": format_date(source, start + timedelta(minutes=7 * i)),
+            "image": rng.choice(IMAGES),
+            "logo": SOURCES[source],
+            "content": [sentence(paragraph_words).capitalize() + "." for _ in range(4)],
+        }
+    return articles
+
+
+def synthetic_polls(articles, seed=0):
+    """Return a {poll id: poll} dict with one poll per article, shaped like POLLS in seed_data."""
+    rng = random.Random(seed)
+    polls = {}
+    for article_id, article in articles.items():
+        options = rng.randint(2, 4)
+        polls[article_id] = {
+            "article_id": article_id,
+            "question": f"What do you make of this {article['category'].lower()} story?",
+            "options": [{"label": f"Option {option + 1}", "percentage": rng.randint(0, 100)}
+                        for option in range(options)],
+        }
+    return polls
+
+
+def synthetic_comments(articles, per_article=5, seed=0):
+    """Return an {article id: [comment, ...]} dict with 0 to 2 * per_article comments each."""
+    rng = random.Random(seed)
+    words = SEED_WORDS
+    comments = {}
+    for article_id in articles:
+        comments[article_id] = [{
+            "user": f"user{rng.randrange(100000)}",
+            "comment": " ".join(rng.choices(words, k=rng.randint(5, 30))).capitalize() + ".",
+            "likes": rng.randint(0, 50),
+            "dislikes": rng.randint(0, 10),
+            "replies": 0,
+        } for _ in range(rng.randint(0, 2 * per_article))]
+    return comments
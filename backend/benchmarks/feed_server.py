@@ -0,0 +1,138 @@
+"""Local stand-in for publisher feed servers, for offline ingestion runs and benchmarks.
+
+Serves the fixture feeds in backend/fixtures/feeds as /<name>.xml, and synthetic RSS
+feeds as /synthetic/<name>.xml?items=N&page=P. Both honour If-None-Match with a 304.
+
+    python benchmarks/feed_server.py --port 8765
+    python ingest.py --once --feed-base http://127.0.0.1:8765
+"""
+import argparse
+import hashlib
+import html
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from corpus import synthetic_articles
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "feeds")
+LAST_MODIFIED = "Sat, 17 May 2025 12:00:00 GMT"
+
+
+def synthetic_feed(name, items, page=0):
+    """RSS for `items` synthetic stories; each (name, page) pair gets distinct stories."""
+    articles = synthetic_articles(items, seed=zlib.crc32(f"{name}:{page}".encode()),
+                                  vocab_size=5000)
+    start = datetime(2025, 5, 1, tzinfo=timezone.utc)
+    entries = []
+    for i, article in enumerate(articles.values()):
+        paragraphs = "".join(f"<p>{paragraph}</p>" for paragraph in article["content"])
+        entries.append(
+            "<item>"
+            f"<title>{html.escape(article['title'])}</title>"
+            f"<description>{html.escape(article['subtitle'])}</description>"
+            f"<content:encoded>{html.escape(paragraphs)}</content:encoded>"
+            f"<category>{article['category']}</category>"
+            f"<pubDate>{format_datetime(start + timedelta(minutes=i))}</pubDate>"
+            "</item>")
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">'
+            f"<channel><title>{name}</title>{''.join(entries)}</channel></rss>").encode("utf-8")
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        url = urlsplit(self.path)
+        name = os.path.basename(url.path)
+        if not name.endswith(".xml"):
+            return None
+        if url.path.startswith("/synthetic/"):
+            query = parse_qs(url.query)
+            key = (url.path, url.query)
+            with self._cache_lock:
+                body = self._cache.get(key)
+            if body is None:
+                body = synthetic_feed(name[:-4], int(query.get("items", ["50"])[0]),
+                                      int(query.get("page", ["0"])[0]))
+                with self._cache_lock:
+                    self._cache[key] = body
+            return body
+        path = os.path.join(FIXTURE_DIR, name)
+        if not os.path.isfile(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def do_GET(self):
+        if self.delay:
+            time.sleep(self.delay)
+        body = self._body()
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FeedServer:
+    """Run the feed server on a background thread; `delay` seconds are added to every response."""
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0):
+        handler = type("Handler", (FeedHandler,), {"delay": delay})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://{host}:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="latency added to every response")
+    args = parser.parse_args()
+    with FeedServer(port=args.port, delay=args.delay_ms / 1000) as server:
+        print(f"serving fixture feeds at {server.base_url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
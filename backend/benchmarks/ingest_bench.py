@@ -0,0 +1,68 @@
+"""Articles ingested per second from synthetic feeds served by the local feed server.
+
+Runs three passes over the same feeds: a cold pass that stores everything, a pass
+where every feed answers 304, and a pass where every feed has a fresh page of
+stories. --delay-ms adds publisher latency to every response.
+
+    python benchmarks/ingest_bench.py --feeds 60 --items 100 --delay-ms 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import urllib.request
+
+from feed_server import FeedServer
+from ingest import FEEDS, Feed, Ingestor
+from storage import Repository
+
+
+def timed_pass(ingestor):
+    started = time.perf_counter()
+    stats = asyncio.run(ingestor.poll_once())
+    return time.perf_counter() - started, stats
+
+
+def report(label, elapsed, stats):
+    rate = stats["inserted"] / elapsed if elapsed else 0.0
+    print(f"{label:<13} {elapsed * 1000:8.0f}ms  {rate:8.0f} articles/s  {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--feeds", type=int, default=60)
+    parser.add_argument("--items", type=int, default=100, help="stories per feed")
+    parser.add_argument("--delay-ms", type=float, default=50.0)
+    parser.add_argument("--per-source", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    repository = Repository(os.path.join(tempfile.mkdtemp(), "ingest.db"))
+    with FeedServer(delay=args.delay_ms / 1000) as server:
+        def feeds(page):
+            return [Feed(f"feed{i}", FEEDS[i % len(FEEDS)].source,
+                         f"{server.base_url}/synthetic/feed{i}.xml?items={args.items}&page={page}",
+                         FEEDS[i % len(FEEDS)].category)
+                    for i in range(args.feeds)]
+
+        # Build every synthetic feed up front so the timings only cover ingestion.
+        for feed in feeds(0) + feeds(1):
+            urllib.request.urlopen(feed.url).read()
+
+        first = feeds(0)
+        ingestor = Ingestor(repository, first, per_source=args.per_source,
+                            max_workers=args.workers, interval=0)
+        print(f"{args.feeds} feeds x {args.items} stories, {args.delay_ms:.0f}ms publisher latency, "
+              f"{args.per_source} per source, {args.workers} workers")
+        report("cold", *timed_pass(ingestor))
+        report("not modified", *timed_pass(ingestor))
+        # Same feeds with their validators, now serving a new page of stories.
+        for feed, moved in zip(first, feeds(1)):
+            feed.url = moved.url
+        report("new page", *timed_pass(ingestor))
+        ingestor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Soak test for the live events stream with many concurrent subscribers.
+
+Starts live_events.py against a fresh synthetic database and connects --subscribers
+EventSource-style clients, each following one poll, plus a few clients that follow
+every poll and never read (to check they are cut off rather than buffered). Then
+for --rounds rounds it stores a burst of poll votes, skewed towards a few popular
+polls, and some new articles. Reports how long each round took to reach every subscriber,
+how many votes were coalesced into each poll update, and the server's memory use.
+
+    python benchmarks/live_soak.py --subscribers 10000 --rounds 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from corpus import synthetic_articles, synthetic_polls
+from server import BACKEND_DIR
+from storage import Repository
+
+HOST, PORT = "127.0.0.1", 5051
+
+
+def request(query=""):
+    return f"GET /api/events{query} HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n".encode()
+
+
+def rss_mib(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Stats:
+    def __init__(self):
+        self.round_started = 0.0
+        self.arrivals = []
+        self.poll_events = 0
+        self.article_events = 0
+        self.disconnected = 0
+
+
+async def subscriber(stats, poll_id):
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    writer.write(request(f"?polls={poll_id}"))
+    try:
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                break
+            polls, articles = chunk.count(b"event: poll\n"), chunk.count(b"event: article\n")
+            if polls or articles:
+                stats.arrivals.append(time.perf_counter() - stats.round_started)
+                stats.poll_events += polls
+                stats.article_events += articles
+    except ConnectionError:
+        pass
+    stats.disconnected += 1
+    writer.close()
+
+
+def slow_subscriber():
+    """A client that subscribes and then never reads, with a small receive window."""
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect((HOST, PORT))
+    sock.sendall(request())
+    return sock
+
+
+def slow_client_dropped(sock):
+    """True once the server has reset or closed the connection."""
+    sock.setblocking(False)
+    try:
+        while True:
+            if not sock.recv(1 << 20):
+                return True
+    except BlockingIOError:
+        return False
+    except ConnectionError:
+        return True
+
+
+def wait_for_port(timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, PORT), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("live_events.py did not start")
+
+
+async def soak(args, repository, poll_ids, process):
+    rng = random.Random(1)
+    # Popularity falls off with rank, as on a real front page.
+    weights = [1 / (rank + 1) for rank in range(len(poll_ids))]
+    stats = Stats()
+    started = time.perf_counter()
+    tasks = []
+    for start in range(0, args.subscribers, 500):
+        tasks += [asyncio.create_task(subscriber(stats, rng.choices(poll_ids, weights)[0]))
+                  for _ in range(min(500, args.subscribers - start))]
+        await asyncio.sleep(0.05)
+    slow = [slow_subscriber() for _ in range(args.slow)]
+    await asyncio.sleep(1)
+    print(f"connected {args.subscribers} subscribers + {args.slow} slow in "
+          f"{time.perf_counter() - started:.1f}s; server RSS {rss_mib(process.pid):.0f} MiB")
+
+    loop = asyncio.get_running_loop()
+    fanout, votes_total, polls_changed, next_article = [], 0, 0, 10 ** 6
+    for number in range(args.rounds):
+        votes = [(poll_id, f"soak-{number}-{i}", 0)
+                 for i, poll_id in enumerate(rng.choices(poll_ids, weights, k=args.votes))]
+        articles = synthetic_articles(args.articles, seed=100 + number)
+        articles = {str(next_article + i): article for i, article in enumerate(articles.values())}
+        next_article += len(articles)
+        stats.arrivals = []
+        stats.round_started = time.perf_counter()
+        await loop.run_in_executor(None, repository.record_votes, votes)
+        await loop.run_in_executor(None, repository.insert_new_articles, articles)
+        votes_total += len(votes)
+        polls_changed += len({poll_id for poll_id, _, _ in votes})
+        await asyncio.sleep(args.interval)
+        if stats.arrivals:
+            stats.arrivals.sort()
+            fanout.append(stats.arrivals[-1])
+            print(f"round {number + 1}: {len(stats.arrivals)} deliveries, first {stats.arrivals[0] * 1000:.0f}ms "
+                  f"last {stats.arrivals[-1] * 1000:.0f}ms after the write")
+        else:
+            print(f"round {number + 1}: nothing delivered")
+
+    print(f"{votes_total} votes coalesced into {polls_changed} poll updates "
+          f"({votes_total / max(polls_changed, 1):.1f} votes each); {stats.poll_events} poll events delivered "
+          f"({stats.poll_events / max(args.subscribers, 1):.1f} per subscriber), "
+          f"{stats.article_events / max(args.subscribers, 1):.0f} article events per subscriber")
+    if fanout:
+        fanout.sort()
+        print(f"time to reach every subscriber: p50 {percentile(fanout, 0.5) * 1000:.0f}ms "
+              f"max {fanout[-1] * 1000:.0f}ms")
+    print(f"slow clients disconnected: {sum(map(slow_client_dropped, slow))}/{len(slow)}; "
+          f"server RSS {rss_mib(process.pid):.0f} MiB")
+    for sock in slow:
+        sock.close()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--slow", type=int, default=20, help="subscribers that never read")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--votes", type=int, default=2000, help="votes stored per round")
+    parser.add_argument("--articles", type=int, default=5, help="new articles stored per round")
+    parser.add_argument("--polls", type=int, default=1000)
+    parser.add_argument("--interval", type=float, default=1.5, help="seconds between rounds")
+    parser.add_argument("--tick", type=float, default=0.5)
+    args = parser.parse_args()
+
+    # Each subscriber is a socket in this process and another in the server.
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if args.subscribers + args.slow + 100 > hard:
+        sys.exit(f"--subscribers needs more than the {hard} open files allowed; raise ulimit -n")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, "live.db")
+        corpus = synthetic_articles(args.polls)
+        repository = Repository(path)
+        repository.seed(corpus, synthetic_polls(corpus), {})
+        process = subprocess.Popen([sys.executable, "live_events.py", "--host", HOST, "--port", str(PORT),
+                                    "--tick", str(args.tick)],
+                                   cwd=BACKEND_DIR, env=dict(os.environ, NEWSBLEND_DB=path),
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port()
+            asyncio.run(soak(args, repository, list(corpus), process))
+        finally:
+            process.terminate()
+            process.wait()
+            repository.close()
+
+
+if __name__ == "__main__":
+    main()
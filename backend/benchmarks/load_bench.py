@@ -0,0 +1,205 @@
+"""Throughput and latency for every API route over synthetic corpora of several sizes.
+
+For each corpus size a SQLite database with articles, polls and comments is built
+(and kept in --data-dir for later runs), the API is started against it, and each
+route is driven by a pool of client threads holding keep-alive connections. Results
+are printed and written as JSON; pass --compare with an earlier results file to see
+the change per route.
+
+    python benchmarks/load_bench.py --sizes 10 1000 100000 --output results.json
+    python benchmarks/load_bench.py --sizes 1000 --compare results.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from corpus import IMAGES, SOURCES, synthetic_articles, synthetic_comments, synthetic_polls
+from server import BACKEND_DIR, MODES, ServerProcess
+from storage import Repository
+
+COMMENTS_PER_ARTICLE = 5
+WORDS = ["climate", "market", "election", "energy", "research", "policy"]
+
+
+def article_id(rng, size):
+    return str(rng.randint(1, size))
+
+
+# Each route maps to a function returning (method, path, JSON body or None) for one request.
+ROUTES = {
+    "featured": lambda rng, size: ("GET", "/api/articles/featured?limit=20", None),
+    "featured_category": lambda rng, size: ("GET", "/api/articles/featured?category=tech", None),
+    "article": lambda rng, size: ("GET", f"/api/articles/{article_id(rng, size)}", None),
+    "bundle": lambda rng, size: ("GET", f"/api/articles/{article_id(rng, size)}/bundle", None),
+    "batch": lambda rng, size: (
+        "GET", "/api/articles?ids=" + ",".join(article_id(rng, size) for _ in range(10)), None),
+    "breaking": lambda rng, size: ("GET", "/api/articles/breaking?limit=10", None),
+    "latest": lambda rng, size: ("GET", "/api/articles/latest?limit=20", None),
+    "personalized": lambda rng, size: ("GET", "/api/articles/personalized?limit=20", None),
+    "search": lambda rng, size: ("GET", f"/api/search?q={rng.choice(WORDS)}", None),
+    "poll": lambda rng, size: ("GET", f"/api/polls/{article_id(rng, size)}", None),
+    "vote": lambda rng, size: ("POST", f"/api/polls/{article_id(rng, size)}/vote",
+                               {"userId": uuid.uuid4().hex, "option": 0}),
+    "discussions": lambda rng, size: ("GET", f"/api/discussions/{article_id(rng, size)}", None),
+    "comment": lambda rng, size: ("POST", f"/api/discussions/{article_id(rng, size)}/comments",
+                                  {"user": "bench", "comment": "Load test comment."}),
+    "replies": lambda rng, size: (
+        "GET", f"/api/comments/{rng.randint(1, size * COMMENTS_PER_ARTICLE)}/replies", None),
+    "reaction": lambda rng, size: (
+        "POST", f"/api/comments/{rng.randint(1, size * COMMENTS_PER_ARTICLE)}/reactions",
+        {"reaction": "like"}),
+    "static_logo": lambda rng, size: ("GET", f"/static/{rng.choice(list(SOURCES.values()))}", None),
+    "static_image": lambda rng, size: ("GET", f"/static/{rng.choice(IMAGES)}", None),
+}
+
+
+def build_database(path, size):
+    articles = synthetic_articles(size)
+    repository = Repository(path)
+    repository.seed(articles, synthetic_polls(articles), synthetic_comments(articles, COMMENTS_PER_ARTICLE))
+    repository.close()
+
+
+def database_for(data_dir, size):
+    path = os.path.join(data_dir, f"corpus-{size}.db")
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        build_database(path, size)
+        print(f"built {size}-article corpus in {time.perf_counter() - started:.1f}s")
+    return path
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def drive(route, size, requests, threads):
+    """Send `requests` requests for one route from `threads` client threads."""
+    make_request = ROUTES[route]
+    host, port = ServerProcess.host, ServerProcess.port
+    latencies, sizes, statuses = [], [], {}
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        mine, my_sizes, my_statuses = [], [], {}
+        for _ in counter:
+            method, path, body = make_request(rng, size)
+            payload = json.dumps(body) if body is not None else None
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, payload, headers)
+                response = conn.getresponse()
+                data = response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                my_statuses["error"] = my_statuses.get("error", 0) + 1
+                continue
+            mine.append(time.perf_counter() - started)
+            my_sizes.append(len(data))
+            my_statuses[str(status)] = my_statuses.get(str(status), 0) + 1
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            sizes.extend(my_sizes)
+            for status, count in my_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    workers = [threading.Thread(target=client, args=(seed,)) for seed in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_bytes": round(sum(sizes) / len(sizes)),
+        "statuses": statuses,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(route, result, baseline=None):
+    line = (f"  {route:<18} {result['throughput']:8.1f} req/s  p50 {result['p50_ms']:7.2f}ms  "
+            f"p95 {result['p95_ms']:7.2f}ms  p99 {result['p99_ms']:7.2f}ms  "
+            f"{result['mean_bytes']:8d} B  {result['statuses']}")
+    if baseline is not None:
+        change = 100 * (result["p50_ms"] - baseline["p50_ms"]) / baseline["p50_ms"]
+        line += f"  p50 {change:+.0f}% vs baseline"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=list(ROUTES))
+    parser.add_argument("--requests", type=int, default=1000, help="requests per route")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--mode", choices=MODES, default="gunicorn")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "newsblend-bench"))
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = {}
+    for size in args.sizes:
+        path = database_for(args.data_dir, size)
+        results[str(size)] = {}
+        print(f"{size} articles ({args.mode}, {args.threads} threads, {args.requests} requests/route)")
+        with ServerProcess(args.mode, path):
+            for route in args.routes:
+                drive(route, size, min(args.requests, 50), args.threads)  # warm up
+                result = results[str(size)][route] = drive(route, size, args.requests, args.threads)
+                print_result(route, result, baseline.get(str(size), {}).get(route))
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "mode": args.mode,
+            "threads": args.threads,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Bytes per article held by a worker: article dicts vs CompactCorpus.
+
+Stores --size synthetic articles in a temporary database, then measures (with
+tracemalloc) what each layout keeps on a worker's Python heap:
+
+  dicts    the articles as loaded from storage, plus a five-field discussion
+           header per article (title, subtitle, source, date, image) the way
+           the old DISCUSSIONS table repeated them
+  compact  CompactCorpus records and tables; paragraphs live in the mapped blob,
+           which is counted once for all workers sharing it
+
+and prints the per-worker and per-fleet totals for --workers workers.
+
+    python benchmarks/memory_bench.py --size 100000 --workers 4
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from corpus import synthetic_articles
+from compact_corpus import CompactCorpus
+from storage import Repository
+
+DISCUSSION_FIELDS = ("title", "subtitle", "source", "date", "image")
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used
+
+
+def load_dicts(repository):
+    articles = dict(repository.iter_articles())
+    discussions = {article_id: {field: article[field] for field in DISCUSSION_FIELDS}
+                   for article_id, article in repository.iter_articles()}
+    return articles, discussions
+
+
+def load_compact(repository, path):
+    corpus = CompactCorpus(path)
+    corpus.load(repository.iter_article_rows())
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, "memory.db")
+        articles = synthetic_articles(args.size, seed=3)
+        repository = Repository(path)
+        repository.seed(articles, {}, {})
+        del articles
+
+        (dicts, discussions), dict_bytes = measure(lambda: load_dicts(repository))
+        del dicts, discussions
+        corpus, compact_bytes = measure(lambda: load_compact(repository, path + ".corpus"))
+        started = time.perf_counter()
+        load_compact(repository, path + ".reload")
+        load_seconds = time.perf_counter() - started
+        blob_bytes = os.path.getsize(path + ".corpus")
+
+        ids = [str(i) for i in range(1, args.size + 1, max(1, args.size // 1000))]
+        assert all(corpus.get(id) == repository.get_article(id) for id in ids[:100])
+        started = time.perf_counter()
+        for id in ids:
+            corpus.get(id)
+        get_us = (time.perf_counter() - started) / len(ids) * 1e6
+        repository.close()
+
+    n = args.size
+    print(f"{n} articles, {args.workers} workers")
+    print(f"dicts:   {dict_bytes / n:7.0f} B/article on each worker's heap "
+          f"({dict_bytes / 2 ** 20:.0f} MiB per worker, {dict_bytes * args.workers / 2 ** 20:.0f} MiB total)")
+    fleet = compact_bytes * args.workers + blob_bytes
+    print(f"compact: {compact_bytes / n:7.0f} B/article on the heap + {blob_bytes / n:.0f} B/article shared blob "
+          f"({compact_bytes / 2 ** 20:.0f} MiB per worker, {fleet / 2 ** 20:.0f} MiB total)")
+    print(f"saved:   {(dict_bytes - compact_bytes) / 2 ** 20:.0f} MiB per worker, "
+          f"{(dict_bytes * args.workers - fleet) / 2 ** 20:.0f} MiB total; "
+          f"load {load_seconds:.1f}s, get() with paragraphs {get_us:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Per-request overhead of RequestMetrics.
+
+Measures the middleware alone around a trivial WSGI app, then a small Flask JSON
+route with and without the full instrumentation (middleware, JSON provider and
+route-labelling request class). Runs alternate and the best of each is kept, which keeps
+scheduler noise out of the difference.
+
+    python benchmarks/metrics_bench.py --requests 20000
+"""
+import argparse
+import time
+
+import corpus  # noqa: F401  (puts the backend directory on sys.path)
+from flask import Flask, jsonify
+from metrics import RequestMetrics, RoutedRequest, TimedJSONProvider
+from werkzeug.test import EnvironBuilder
+
+
+def trivial_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"ok"]
+
+
+def flask_app(instrumented):
+    app = Flask(__name__)
+    if instrumented:
+        metrics = RequestMetrics()
+        app.json = TimedJSONProvider(app)
+        app.request_class = RoutedRequest
+        app.wsgi_app = metrics.wrap(app.wsgi_app)
+
+    @app.route("/ping/<item>")
+    def ping(item):
+        return jsonify({"item": item})
+
+    return app
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+def one_run(app, environ, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        body = app(dict(environ), start_response)
+        for _ in body:
+            pass
+        close = getattr(body, "close", None)
+        if close is not None:
+            close()
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def compare(plain, instrumented, requests, rounds=7):
+    environ = EnvironBuilder(path="/ping/1").get_environ()
+    best_plain = best_instrumented = float("inf")
+    for _ in range(rounds):
+        best_plain = min(best_plain, one_run(plain, environ, requests))
+        best_instrumented = min(best_instrumented, one_run(instrumented, environ, requests))
+    return best_plain, best_instrumented
+
+
+def report(label, plain, instrumented):
+    print(f"{label:<10} plain {plain:7.2f}us  instrumented {instrumented:7.2f}us  "
+          f"overhead {instrumented - plain:+6.2f}us/request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    report("wsgi", *compare(trivial_app, RequestMetrics().wrap(trivial_app), args.requests * 5))
+    report("flask", *compare(flask_app(False), flask_app(True), args.requests))
+
+
+if __name__ == "__main__":
+    main()
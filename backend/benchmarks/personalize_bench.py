@@ -0,0 +1,63 @@
+"""Latency of ranking a synthetic corpus against user profiles with ArticleVectors.
+
+Vectorizes a synthetic corpus, then times requests the way /api/articles/personalized
+makes them: build a profile from a user's recent events and rank the corpus against
+it. Also times adding ingest batches to the existing matrix.
+
+    python benchmarks/personalize_bench.py --size 100000 --requests 200
+"""
+import argparse
+import random
+import time
+
+from corpus import synthetic_articles
+from personalization import EVENT_WEIGHTS, ArticleVectors
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--events", type=int, default=50, help="events in each user's history")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--batches", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    corpus = synthetic_articles(args.size + args.batch * args.batches, seed=3)
+    ids = list(corpus)
+    existing, fresh = ids[:args.size], ids[args.size:]
+
+    vectors = ArticleVectors()
+    started = time.perf_counter()
+    vectors.add_many([(article_id, corpus[article_id]) for article_id in existing])
+    print(f"vectorized {args.size} articles in {time.perf_counter() - started:.1f}s "
+          f"({vectors._matrix.nbytes / 2 ** 20:.0f} MiB matrix)")
+
+    kinds = [kind for kind, weight in EVENT_WEIGHTS.items() if weight]
+    latencies = []
+    for _ in range(args.requests):
+        events = [(rng.choice(existing), rng.choice(kinds)) for _ in range(args.events)]
+        started = time.perf_counter()
+        profile = vectors.profile(events)
+        vectors.rank(profile, {article_id for article_id, kind in events if kind == "read"}, args.limit)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    print(f"rank {args.size} articles: p50 {percentile(latencies, 0.5) * 1000:.2f}ms  "
+          f"p95 {percentile(latencies, 0.95) * 1000:.2f}ms  p99 {percentile(latencies, 0.99) * 1000:.2f}ms")
+
+    for number in range(args.batches):
+        batch = [(article_id, corpus[article_id])
+                 for article_id in fresh[number * args.batch:(number + 1) * args.batch]]
+        started = time.perf_counter()
+        vectors.add_many(batch)
+        print(f"batch {number + 1}: {len(batch)} articles in {(time.perf_counter() - started) * 1000:6.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
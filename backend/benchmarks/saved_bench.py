@@ -0,0 +1,74 @@
+"""Memory and query cost of per-user saved sets: Bitmap over article seq numbers vs sets of id strings.
+
+Builds saved sets for --users users over a corpus of --articles articles (save
+counts are skewed, most users save a few articles and some save hundreds), then
+measures memory per user for both layouts, the time to flag a 20-article feed
+page for the heaviest and a median user, and to intersect two users' sets.
+
+    python benchmarks/saved_bench.py --users 200000 --articles 100000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+import corpus  # noqa: F401  (puts the backend on sys.path)
+from bitmap import Bitmap
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used
+
+
+def per_call(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--articles", type=int, default=100000)
+    parser.add_argument("--page", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    saves = [rng.sample(range(1, args.articles + 1), min(args.articles, int(rng.paretovariate(1.2) * 3)))
+             for _ in range(args.users)]
+    total = sum(map(len, saves))
+    print(f"{args.users} users, {total} saves ({total / args.users:.1f} per user, max {max(map(len, saves))})")
+
+    bitmaps, bitmap_bytes = measure(lambda: [Bitmap(seqs) for seqs in saves])
+    id_sets, set_bytes = measure(lambda: [{str(seq) for seq in seqs} for seqs in saves])
+    print(f"Bitmap over seq numbers: {bitmap_bytes / args.users:7.0f} B/user "
+          f"({bitmap_bytes / 2 ** 20:.0f} MiB, {bitmap_bytes * 1e6 / args.users / 2 ** 30:.2f} GiB per million users)")
+    print(f"set of id strings:       {set_bytes / args.users:7.0f} B/user "
+          f"({set_bytes / 2 ** 20:.0f} MiB, {set_bytes * 1e6 / args.users / 2 ** 30:.2f} GiB per million users)")
+
+    heavy = max(range(args.users), key=lambda user: len(saves[user]))
+    page = rng.sample(range(1, args.articles + 1), args.page - 2) + saves[heavy][:2]
+    page_ids = [str(seq) for seq in page]
+    assert len(bitmaps[heavy].among(page)) == len(id_sets[heavy].intersection(page_ids))
+    print(f"flag a {args.page}-article page for the heaviest user: "
+          f"Bitmap {per_call(lambda: bitmaps[heavy].among(page), 2000):.1f}us  "
+          f"set {per_call(lambda: id_sets[heavy].intersection(page_ids), 2000):.1f}us")
+    typical = sorted(range(args.users), key=lambda user: len(saves[user]))[args.users // 2]
+    typical_ids = id_sets[typical]
+    print(f"flag it for a median user ({len(saves[typical])} saves): "
+          f"Bitmap {per_call(lambda: bitmaps[typical].among(page), 2000):.1f}us  "
+          f"set {per_call(lambda: typical_ids.intersection(page_ids), 2000):.1f}us")
+    other = sorted(range(args.users), key=lambda user: len(saves[user]))[-2]
+    print(f"intersect the two heaviest users ({len(saves[heavy])} and {len(saves[other])} saves): "
+          f"Bitmap {per_call(lambda: bitmaps[heavy] & bitmaps[other], 200):.1f}us  "
+          f"set {per_call(lambda: id_sets[heavy] & id_sets[other], 200):.1f}us")
+
+
+if __name__ == "__main__":
+    main()
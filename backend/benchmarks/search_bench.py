@@ -0,0 +1,66 @@
+"""Query latency of SearchIndex as the corpus grows, and how much of the exact top 20 it finds.
+
+Recall compares each query's page with the one an unbounded search (no
+champion lists or expansion caps) returns on the same index.
+
+    python benchmarks/search_bench.py --sizes 10 1000 10000 100000
+"""
+import argparse
+import statistics
+import time
+
+from corpus import synthetic_articles
+from search_index import SearchIndex
+
+QUERIES = ["climate", "tariff europe", "quantum proc", "inflation rates market", "wildf"]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(size, repeats):
+    articles = synthetic_articles(size)
+    index = SearchIndex()
+    started = time.perf_counter()
+    for article_id, article in articles.items():
+        index.add(article_id, article)
+    build_s = time.perf_counter() - started
+
+    for query in QUERIES:
+        index.search(query, limit=20)
+
+    samples = []
+    for _ in range(repeats):
+        for query in QUERIES:
+            started = time.perf_counter()
+            index.search(query, limit=20)
+            samples.append((time.perf_counter() - started) * 1000)
+
+    bounded = {query: {doc_id for doc_id, _ in index.search(query, limit=20)[1]} for query in QUERIES}
+    index.champion_size = index.max_expansions = index.max_prefix_postings = size + 1
+    found = sum(len(bounded[query] & {doc_id for doc_id, _ in index.search(query, limit=20)[1]})
+                for query in QUERIES)
+    exact = sum(min(20, len(index.search(query, limit=20)[1])) for query in QUERIES)
+
+    started = time.perf_counter()
+    index.add("update", articles["1"])
+    update_ms = (time.perf_counter() - started) * 1000
+
+    print(f"{size:>8} articles  build {build_s:7.2f}s  update {update_ms:6.3f}ms  "
+          f"query p50 {statistics.median(samples):7.3f}ms  p95 {percentile(samples, 95):7.3f}ms  "
+          f"recall {found}/{exact}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Run the API locally for end-to-end benchmarks, in-process or as a server process."""
+import http.client
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Command and extra environment for each way of running app.py; all listen on 5050.
+MODES = {
+    "dev (debug)": ([sys.executable, "app.py"], {"NEWSBLEND_DEBUG": "1"}),
+    "dev": ([sys.executable, "app.py"], {}),
+    "gunicorn": ([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+                 {"NEWSBLEND_BIND": "127.0.0.1:5050"}),
+}
+
+
+class LocalServer:
+    """Serve a WSGI app from a background thread of this process."""
+
+    def __init__(self, app, host="127.0.0.1", port=0):
+        # Per-request access logging would dominate the timings.
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        self._server = make_server(host, port, app, threaded=True)
+        self.base_url = f"http://{host}:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._thread.join()
+
+
+class ServerProcess:
+    """Start app.py in one of MODES against `db_path` and wait until it answers."""
+
+    host, port = "127.0.0.1", 5050
+
+    def __init__(self, mode, db_path, startup_timeout=600):
+        self.mode = mode
+        self.db_path = db_path
+        self.startup_timeout = startup_timeout
+        self.base_url = f"http://{self.host}:{self.port}"
+        self._process = None
+
+    def __enter__(self):
+        command, env = MODES[self.mode]
+        env = dict(os.environ, NEWSBLEND_DB=self.db_path, **env)
+        self._process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                         start_new_session=True)
+        try:
+            self._wait_until_up()
+        except BaseException:
+            self._stop()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop()
+
+    def _wait_until_up(self):
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"{self.mode} server exited during startup")
+            try:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=1)
+                conn.request("GET", "/api/articles/featured?limit=1")
+                conn.getresponse().read()
+                conn.close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError(f"{self.mode} server did not start")
+
+    def _stop(self):
+        # The debug reloader serves from a child process, so stop the whole group.
+        os.killpg(self._process.pid, signal.SIGTERM)
+        self._process.wait()
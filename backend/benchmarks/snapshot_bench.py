@@ -0,0 +1,102 @@
+"""Read latency while new content versions are being published.
+
+Loads the app in-process against a synthetic corpus, then has reader threads
+request the featured, breaking and latest feeds, first with no writer and then
+while a writer stores a new article and publishes a new snapshot every
+--publish-every seconds. Reports read latency in both phases, time per publish
+and how many versions were alive at once.
+
+    python benchmarks/snapshot_bench.py --size 10000 --duration 5
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from corpus import synthetic_articles
+from storage import Repository
+
+PATHS = ["/api/articles/featured?limit=20", "/api/articles/featured?category=tech&limit=20",
+         "/api/articles/breaking?limit=10", "/api/articles/latest?limit=20"]
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def read_phase(app, threads, duration, stop_writer=None):
+    latencies, lock = [], threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def reader(seed):
+        rng = random.Random(seed)
+        client = app.app.test_client()
+        mine = []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = client.get(rng.choice(PATHS))
+            assert response.status_code == 200
+            mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+
+    workers = [threading.Thread(target=reader, args=(seed,)) for seed in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if stop_writer is not None:
+        stop_writer.set()
+    latencies.sort()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--publish-every", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, "snapshot.db")
+        articles = synthetic_articles(args.size + 10000, seed=7)
+        ids = list(articles)
+        repository = Repository(path)
+        repository.seed({id: articles[id] for id in ids[:args.size]}, {}, {})
+        repository.close()
+        os.environ["NEWSBLEND_DB"] = path
+        import app
+
+        for label, publishing in (("no writer", False), ("publishing", True)):
+            stop = threading.Event()
+            publishes, peak_versions = [], [0]
+
+            def writer():
+                for article_id in ids[args.size:]:
+                    if stop.wait(args.publish_every):
+                        return
+                    started = time.perf_counter()
+                    app.upsert_article(article_id, articles[article_id])
+                    publishes.append(time.perf_counter() - started)
+                    peak_versions[0] = max(peak_versions[0], len(app.CONTENT.live_versions()))
+
+            writer_thread = threading.Thread(target=writer) if publishing else None
+            if writer_thread is not None:
+                writer_thread.start()
+            latencies = read_phase(app, args.threads, args.duration, stop)
+            if writer_thread is not None:
+                writer_thread.join()
+            line = (f"{label:<11} {len(latencies) / args.duration:7.1f} reads/s  "
+                    f"p50 {percentile(latencies, 0.5) * 1000:6.2f}ms  p99 {percentile(latencies, 0.99) * 1000:6.2f}ms")
+            if publishes:
+                line += (f"  {len(publishes)} publishes, {sum(publishes) / len(publishes) * 1000:.1f}ms each "
+                         f"(store + index + snapshot), at most {peak_versions[0]} versions alive")
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
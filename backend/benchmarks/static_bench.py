@@ -0,0 +1,67 @@
+"""Requests/sec for static files: send_from_directory versus StaticServer.
+
+    python benchmarks/static_bench.py --requests 5000
+"""
+import argparse
+import os
+import time
+
+import corpus  # noqa: F401  (puts the backend directory on sys.path)
+from flask import Flask, send_from_directory
+from static_server import StaticServer
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+
+CASES = [
+    ("small logo", "cnn_logo.png", {}),
+    ("large image", "6_food_protests.png", {}),
+    ("range 64KB", "6_food_protests.png", {"Range": "bytes=0-65535"}),
+]
+
+
+def send_from_directory_app():
+    app = Flask(__name__, static_folder=None)
+
+    @app.route("/static/<path:filename>")
+    def static_files(filename):
+        return send_from_directory(STATIC_DIR, filename)
+
+    return app
+
+
+def static_server_app():
+    app = Flask(__name__, static_folder=None)
+    server = StaticServer(STATIC_DIR)
+
+    @app.route("/static/<path:filename>")
+    def static_files(filename):
+        return server.serve(filename)
+
+    return app
+
+
+def requests_per_second(app, filename, headers, count):
+    client = app.test_client()
+    client.get(f"/static/{filename}", headers=headers)
+    started = time.perf_counter()
+    for _ in range(count):
+        response = client.get(f"/static/{filename}", headers=headers)
+        response.close()
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    apps = [("send_from_directory", send_from_directory_app()),
+            ("StaticServer", static_server_app())]
+    for label, filename, headers in CASES:
+        results = [requests_per_second(app, filename, headers, args.requests) for _, app in apps]
+        print(f"{label:<12} " + "  ".join(
+            f"{name} {rps:8.0f} req/s" for (name, _), rps in zip(apps, results)))
+
+
+if __name__ == "__main__":
+    main()
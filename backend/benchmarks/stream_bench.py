@@ -0,0 +1,112 @@
+"""Time to first byte and peak RSS for 10k-item list responses, buffered vs streamed.
+
+Stores a synthetic corpus with one heavily discussed article in a temporary
+database, then for each mode and endpoint (the featured feed and that article's
+discussion, with limit=--items) starts a fresh process that serves the app over
+HTTP and fetches it twice:
+
+  buffered  the whole list is built, encoded and cached before the first byte
+            is sent (the path pages up to 100 items take)
+  streamed  items are encoded as they are read and sent in chunks; the second
+            request finds the feed cards already encoded in the fragment cache
+
+Peak RSS is the process high-water mark above what it used before the request
+(Linux only: it is reset through /proc/self/clear_refs).
+
+    python benchmarks/stream_bench.py --items 10000
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from corpus import SEED_WORDS, synthetic_articles
+from storage import Repository
+
+PATHS = {"featured": "/api/articles/featured?limit={items}", "discussion": "/api/discussions/1?limit={items}"}
+
+
+def fetch(port, path):
+    """Return (seconds to the first body byte, total seconds, body bytes)."""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    started = time.perf_counter()
+    connection.request("GET", path)
+    response = connection.getresponse()
+    first = response.read(1)
+    ttfb = time.perf_counter() - started
+    size = len(first)
+    while chunk := response.read(65536):
+        size += len(chunk)
+    total = time.perf_counter() - started
+    connection.close()
+    assert response.status == 200, response.status
+    return ttfb, total, size
+
+
+def memory_status(field):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) * 1024
+
+
+def reset_peak_rss():
+    """Restart the high-water mark at the current RSS (Linux) and return it."""
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+    return memory_status("VmRSS")
+
+
+def child(mode, name, items):
+    from werkzeug.serving import make_server
+
+    import app
+    if mode == "buffered":
+        app.PAGE_LIMIT = app.STREAM_LIMIT
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    runs = []
+    for _ in range(2):
+        before = reset_peak_rss()
+        ttfb, total, size = fetch(server.port, PATHS[name].format(items=items))
+        runs.append((ttfb, total, size, memory_status("VmHWM") - before))
+    server.shutdown()
+    print(json.dumps(runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "ENDPOINT"))
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child, args.items)
+        return
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, "stream.db")
+        articles = synthetic_articles(args.items + args.items // 5, seed=13)
+        comments = {"1": [{"user": f"user{i}", "comment": " ".join(SEED_WORDS[i % 20:i % 20 + 12]).capitalize() + ".",
+                           "likes": i % 50, "dislikes": i % 7, "replies": 0} for i in range(args.items)]}
+        repository = Repository(path)
+        repository.seed(articles, {}, comments)
+        repository.close()
+        environment = dict(os.environ, NEWSBLEND_DB=path)
+        print(f"{args.items} items per response")
+        for name in PATHS:
+            for mode in ("buffered", "streamed"):
+                output = subprocess.run([sys.executable, __file__, "--child", mode, name, "--items", str(args.items)],
+                                        env=environment, capture_output=True, text=True, check=True).stdout
+                runs = json.loads(output.splitlines()[-1])
+                for label, (ttfb, total, size, rss) in zip(("cold", "warm"), runs):
+                    print(f"{name:<10} {mode:<8} {label}: TTFB {ttfb * 1000:7.1f}ms  total {total * 1000:7.1f}ms  "
+                          f"{size / 2 ** 20:5.1f} MiB body  peak RSS +{rss / 2 ** 20:5.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Requests/sec for the development entry point versus the gunicorn production setup.
+
+Each mode is started as its own server process on port 5050 and driven by client
+processes that hold keep-alive connections and cycle through read endpoints.
+
+    python benchmarks/throughput_bench.py --clients 8 --duration 10
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import tempfile
+import time
+
+from server import MODES, ServerProcess
+
+HOST, PORT = ServerProcess.host, ServerProcess.port
+
+PATHS = [
+    "/api/articles/featured?limit=20",
+    "/api/articles/1",
+    "/api/articles/2/bundle",
+    "/api/search?q=climate",
+    "/api/polls/3",
+    "/api/discussions/1",
+]
+
+
+def client(duration, results):
+    conn = http.client.HTTPConnection(HOST, PORT, timeout=10)
+    latencies = []
+    deadline = time.monotonic() + duration
+    i = 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request("GET", PATHS[i % len(PATHS)])
+            conn.getresponse().read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(HOST, PORT, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - started)
+        i += 1
+    results.put(latencies)
+
+
+def run(mode, clients, duration, db_path):
+    with ServerProcess(mode, db_path):
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=client, args=(duration, results))
+                   for _ in range(clients)]
+        for worker in workers:
+            worker.start()
+        latencies = sorted(latency for _ in workers for latency in results.get())
+        for worker in workers:
+            worker.join()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"{mode:<12} {len(latencies) / duration:8.0f} req/s   p50 {p50:6.1f}ms   p99 {p99:6.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "throughput.db")
+    print(f"{args.clients} clients, {args.duration:.0f}s per mode, {os.cpu_count()} CPUs")
+    for mode in args.modes:
+        run(mode, args.clients, args.duration, db_path)
+
+
+if __name__ == "__main__":
+    main()
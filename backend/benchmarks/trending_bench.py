@@ -0,0 +1,105 @@
+"""Accuracy, memory and recording cost of the trending view counter.
+
+Replays --views Zipf-distributed article views over --articles articles into a
+ViewCounter spread across one window, then compares its top 10 with exact
+counts and reports the estimate error, the counter's memory after a tenth of
+the views and after all of them, and the time per record(). Finally serves the
+article route in-process, recording on every other request, to show what it
+adds to a request.
+
+    python benchmarks/trending_bench.py --views 1000000 --articles 100000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+from corpus import synthetic_articles
+from storage import Repository
+from trending import ViewCounter
+
+
+def route_p50s(app, client, ids):
+    """Median article route latency (with recording, without), alternating request by request."""
+    record = app.TRENDING.record
+    latencies = ([], [])
+    for index, article_id in enumerate(ids):
+        app.TRENDING.record = record if index % 2 == 0 else (lambda article_id: None)
+        started = time.perf_counter()
+        client.get(f"/api/articles/{article_id}")
+        latencies[index % 2].append(time.perf_counter() - started)
+    app.TRENDING.record = record
+    return [sorted(runs)[len(runs) // 2] for runs in latencies]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--views", type=int, default=1000000)
+    parser.add_argument("--articles", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    ids = [str(i) for i in range(1, args.articles + 1)]
+    views = rng.choices(ids, cum_weights=list(_zipf_cum_weights(len(ids))), k=args.views)
+    now = [0.0]
+
+    def replay(checkpoint=lambda: None):
+        now[0] = 0.0
+        counter = ViewCounter(clock=lambda: now[0])
+        step = len(views) // 10
+        for part in range(10):
+            # Spread the views over most of the window, so several steps hold them.
+            now[0] = part * counter.window * 0.09
+            for index in range(part * step, (part + 1) * step):
+                counter.record(views[index])
+            checkpoint()
+        return counter
+
+    tracemalloc.start()
+    sizes = []
+    replay(lambda: sizes.append(tracemalloc.get_traced_memory()[0]))
+    tracemalloc.stop()
+    started = time.perf_counter()
+    counter = replay()
+    recording = time.perf_counter() - started
+
+    exact = Counter(views)
+    top = counter.top(10)
+    truth = exact.most_common(10)
+    errors = [counter.estimate(id) - exact[id] for id in rng.sample(ids, 1000)]
+    print(f"{args.views} views over {args.articles} articles")
+    print(f"top 10 recall {len({id for id, _ in top} & {id for id, _ in truth})}/10; "
+          f"#1 estimated {top[0][1]} vs {truth[0][1]} exact; "
+          f"sampled overcount mean {sum(errors) / len(errors):.1f} max {max(errors)} views "
+          f"(bound e/width of views: {2.718 * args.views / counter.width:.0f})")
+    print(f"memory {sizes[0] / 2 ** 10:.0f} KiB after {args.views // 10} views, "
+          f"{sizes[-1] / 2 ** 10:.0f} KiB after {args.views}")
+    print(f"record() {recording / args.views * 1e6:.2f}us per view")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, "trending.db")
+        repository = Repository(path)
+        repository.seed(synthetic_articles(1000, seed=3), {}, {})
+        repository.close()
+        os.environ["NEWSBLEND_DB"] = path
+        import app
+        client = app.app.test_client()
+        page_ids = rng.choices([str(i) for i in range(1, 1001)], k=args.requests)
+        route_p50s(app, client, page_ids[:500])
+        with_views, without_views = route_p50s(app, client, page_ids)
+        print(f"article route p50 {with_views * 1000:.3f}ms recording views, {without_views * 1000:.3f}ms without")
+
+
+def _zipf_cum_weights(n):
+    total = 0.0
+    for rank in range(n):
+        total += 1.0 / (rank + 1)
+        yield total
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Sustained poll vote throughput through POST /api/polls/<id>/vote on one node.
+
+    python benchmarks/vote_bench.py --threads 8 --seconds 10
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import corpus  # noqa: F401  (puts the backend directory on sys.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--polls", type=int, default=1, help="spread votes over this many polls")
+    args = parser.parse_args()
+
+    db_dir = tempfile.mkdtemp()
+    os.environ["NEWSBLEND_DB"] = os.path.join(db_dir, "votes.db")
+    from app import POLL_VOTES, REPOSITORY, app
+
+    before = sum(sum(REPOSITORY.get_poll_votes(str(p)).values()) for p in range(1, args.polls + 1))
+    stop = threading.Event()
+    sent = [0] * args.threads
+
+    def worker(index):
+        client = app.test_client()
+        n = 0
+        while not stop.is_set():
+            poll_id = str(n % args.polls + 1)
+            response = client.post(f"/api/polls/{poll_id}/vote",
+                                   json={"userId": f"user-{index}-{n}", "option": n % 4})
+            assert response.status_code == 200, response.status_code
+            n += 1
+        sent[index] = n
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    flush_started = time.perf_counter()
+    POLL_VOTES.flush()
+    final_flush_ms = (time.perf_counter() - flush_started) * 1000
+    after = sum(sum(REPOSITORY.get_poll_votes(str(p)).values()) for p in range(1, args.polls + 1))
+
+    total = sum(sent)
+    print(f"{total} votes in {elapsed:.1f}s from {args.threads} threads: {total / elapsed:.0f} votes/s")
+    print(f"persisted {after - before} new votes (final flush {final_flush_ms:.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
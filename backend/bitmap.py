@@ -0,0 +1,190 @@
+from array import array
+from bisect import bisect_left
+from itertools import groupby
+
+# A chunk with more members than this is cheaper to store as a bitset than as an array.
+ARRAY_LIMIT = 4096
+BITSET_BYTES = 1 << 13
+# Arrays up to this long are searched with a linear scan in C, which beats bisecting from Python.
+SCAN_LIMIT = 256
+
+
+def _to_bitset(lows):
+    bits = bytearray(BITSET_BYTES)
+    for low in lows:
+        bits[low >> 3] |= 1 << (low & 7)
+    return bits
+
+
+def _bitset_members(bits):
+    return array("H", (byte_index << 3 | bit for byte_index, byte in enumerate(bits) if byte
+                       for bit in range(8) if byte >> bit & 1))
+
+
+def _count(container):
+    return len(container) if isinstance(container, array) else int.from_bytes(container, "little").bit_count()
+
+
+def _has(lows, low):
+    if len(lows) <= SCAN_LIMIT:
+        return low in lows
+    position = bisect_left(lows, low)
+    return position < len(lows) and lows[position] == low
+
+
+def _intersect(a, b):
+    """Intersect two containers; returns a container, or None if they share nothing."""
+    if isinstance(a, array) and isinstance(b, array):
+        if len(a) > len(b):
+            a, b = b, a
+        # Binary search the larger side: a feed page against a long history is a few probes.
+        result = array("H", (low for low in a if _has(b, low)))
+    elif isinstance(a, array) or isinstance(b, array):
+        lows, bits = (a, b) if isinstance(a, array) else (b, a)
+        result = array("H", (low for low in lows if bits[low >> 3] >> (low & 7) & 1))
+    else:
+        merged = (int.from_bytes(a, "little") & int.from_bytes(b, "little")).to_bytes(BITSET_BYTES, "little")
+        result = bytearray(merged)
+        if _count(result) <= ARRAY_LIMIT:
+            result = _bitset_members(result)
+    return result if _count(result) else None
+
+
+class Bitmap:
+    """A compressed set of integers in [0, 2**32), stored like a roaring bitmap.
+
+    Values are split by their high 16 bits into chunks. A chunk is a sorted
+    array of the low 16 bits (two bytes per member) until it holds ARRAY_LIMIT
+    members, then an 8 KiB bitset. Sparse sets, such as one user's saved articles
+    over a large corpus, cost a few bytes per member; dense ones at most one bit.
+    """
+
+    __slots__ = ("_keys", "_containers")
+
+    def __init__(self, values=()):
+        self._keys = array("H")
+        self._containers = []
+        for key, group in groupby(sorted(set(values)), key=lambda value: value >> 16):
+            lows = array("H", (value & 0xFFFF for value in group))
+            self._keys.append(key)
+            self._containers.append(lows if len(lows) <= ARRAY_LIMIT else _to_bitset(lows))
+
+    def _find(self, key):
+        index = bisect_left(self._keys, key)
+        return index, index < len(self._keys) and self._keys[index] == key
+
+    def add(self, value):
+        """Add `value`; returns False if it was already present."""
+        key, low = value >> 16, value & 0xFFFF
+        index, found = self._find(key)
+        if not found:
+            self._keys.insert(index, key)
+            self._containers.insert(index, array("H", [low]))
+            return True
+        container = self._containers[index]
+        if isinstance(container, array):
+            position = bisect_left(container, low)
+            if position < len(container) and container[position] == low:
+                return False
+            if len(container) < ARRAY_LIMIT:
+                container.insert(position, low)
+                return True
+            container = self._containers[index] = _to_bitset(container)
+        if container[low >> 3] >> (low & 7) & 1:
+            return False
+        container[low >> 3] |= 1 << (low & 7)
+        return True
+
+    def discard(self, value):
+        """Remove `value`; returns False if it was not present."""
+        key, low = value >> 16, value & 0xFFFF
+        index, found = self._find(key)
+        if not found:
+            return False
+        container = self._containers[index]
+        if isinstance(container, array):
+            position = bisect_left(container, low)
+            if position == len(container) or container[position] != low:
+                return False
+            del container[position]
+        else:
+            if not container[low >> 3] >> (low & 7) & 1:
+                return False
+            container[low >> 3] &= ~(1 << (low & 7)) & 0xFF
+            if _count(container) <= ARRAY_LIMIT:
+                container = self._containers[index] = _bitset_members(container)
+        if not container:
+            del self._keys[index]
+            del self._containers[index]
+        return True
+
+    def __contains__(self, value):
+        key, low = value >> 16, value & 0xFFFF
+        if len(self._keys) == 1:
+            # Every value below 65536 shares one chunk, so there is usually no key to search.
+            if self._keys[0] != key:
+                return False
+            container = self._containers[0]
+        else:
+            index, found = self._find(key)
+            if not found:
+                return False
+            container = self._containers[index]
+        if isinstance(container, array):
+            return _has(container, low)
+        return bool(container[low >> 3] >> (low & 7) & 1)
+
+    def among(self, values):
+        """Return the set of `values` that are members; cheaper than `&` for a handful of them.
+
+        Consecutive values usually share a chunk (with one chunk, always), so the
+        chunk is only looked up again when the high bits change.
+        """
+        members = set()
+        keys, containers = self._keys, self._containers
+        key, container = -1, None
+        for value in values:
+            high = value >> 16
+            if high != key:
+                key = high
+                index = bisect_left(keys, high)
+                container = containers[index] if index < len(keys) and keys[index] == high else None
+            if container is None:
+                continue
+            low = value & 0xFFFF
+            if type(container) is bytearray:
+                if container[low >> 3] >> (low & 7) & 1:
+                    members.add(value)
+            elif _has(container, low):
+                members.add(value)
+        return members
+
+    def __len__(self):
+        return sum(map(_count, self._containers))
+
+    def __bool__(self):
+        return bool(self._keys)
+
+    def __iter__(self):
+        for key, container in zip(self._keys, self._containers):
+            high = key << 16
+            lows = container if isinstance(container, array) else _bitset_members(container)
+            for low in lows:
+                yield high | low
+
+    def __and__(self, other):
+        """Intersect chunk by chunk; only chunks present in both are touched."""
+        result = Bitmap()
+        if len(other._keys) < len(self._keys):
+            self, other = other, self
+        for key, container in zip(self._keys, self._containers):
+            index, found = other._find(key)
+            if found:
+                shared = _intersect(container, other._containers[index])
+                if shared is not None:
+                    result._keys.append(key)
+                    result._containers.append(shared)
+        return result
+
+    def __repr__(self):
+        return f"Bitmap({list(self)!r})"
@@ -0,0 +1,148 @@
+import threading
+
+import numpy as np
+
+from search_index import TOKEN_RE
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_SHIFT32 = np.uint64(32)
+
+
+def _shingles(article, size):
+    """Hashes of the article's distinct `size`-word shingles over title and content."""
+    text = " ".join([article.get("title", ""), *article.get("content", [])]).lower()
+    words = np.fromiter(map(hash, TOKEN_RE.findall(text)), dtype=np.int64).view(np.uint64)
+    if len(words) < size:
+        return np.unique(words) if len(words) else np.zeros(1, dtype=np.uint64)
+    shingles = words[:len(words) - size + 1].copy()
+    for offset in range(1, size):
+        shingles = shingles * _MIX + words[offset:len(words) - size + 1 + offset]
+    return np.unique(shingles)
+
+
+class StoryClusters:
+    """Groups near-duplicate articles, such as one wire story carried by several outlets.
+
+    Each article gets a MinHash signature of `num_perm` values over its word shingles,
+    computed for a whole batch at once with NumPy (multiply-shift hashing, no modulo).
+    Signatures are split into `bands` bands; articles that share any band are candidate
+    matches, and a candidate joins the cluster of the best one whose estimated Jaccard
+    similarity is at least `threshold`. Adding an article costs one signature and a few
+    bucket lookups, never a comparison against the whole corpus.
+
+    The first article of a cluster is its representative, so cards stay stable as
+    later copies arrive.
+    """
+
+    def __init__(self, num_perm=64, bands=16, shingle_size=2, threshold=0.5, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Odd multipliers make x -> a * x + b a bijection modulo 2**64.
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(1, 2 ** 63, size=self.rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._signatures = np.zeros((1024, num_perm), dtype=np.uint32)
+        self._ids = []
+        self._index = {}
+        self._sources = []
+        self._cluster_of = []
+        self._members = []
+        self._buckets = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def signatures(self, articles, chunk_shingles=4096):
+        """Return a (len(articles), num_perm) uint32 array of MinHash signatures."""
+        shingles = [_shingles(article, self.shingle_size) for article in articles]
+        result = np.empty((len(shingles), len(self._a)), dtype=np.uint32)
+        start = 0
+        while start < len(shingles):
+            # Group whole articles into chunks so the (shingles x num_perm) product stays small.
+            end, total = start, 0
+            while end < len(shingles) and (end == start or total + len(shingles[end]) <= chunk_shingles):
+                total += len(shingles[end])
+                end += 1
+            values = np.concatenate(shingles[start:end])
+            # In place and in cache-sized chunks: this product is most of the cost.
+            hashed = values[:, None] * self._a
+            hashed += self._b
+            hashed >>= _SHIFT32
+            offsets = np.cumsum([0] + [len(s) for s in shingles[start:end - 1]])
+            result[start:end] = np.minimum.reduceat(hashed, offsets, axis=0)
+            start = end
+        return result
+
+    def _band_keys(self, signatures):
+        """(articles, bands) array of 64-bit keys, one per band of each signature."""
+        banded = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows)
+        return (banded * self._band_mix).sum(axis=2, dtype=np.uint64)
+
+    def add_many(self, items):
+        """Cluster [(article id, article), ...]; ids already clustered are skipped."""
+        with self._lock:
+            items = [(article_id, article) for article_id, article in items
+                     if article_id not in self._index]
+        if not items:
+            return
+        signatures = self.signatures([article for _, article in items])
+        keys = self._band_keys(signatures).tolist()
+
+        with self._lock:
+            needed = len(self._ids) + len(items)
+            if needed > len(self._signatures):
+                grown = np.zeros((max(needed, 2 * len(self._signatures)), self._signatures.shape[1]),
+                                 dtype=np.uint32)
+                grown[:len(self._ids)] = self._signatures[:len(self._ids)]
+                self._signatures = grown
+            for (article_id, article), signature, band_keys in zip(items, signatures, keys):
+                if article_id in self._index:
+                    continue
+                position = len(self._ids)
+                candidates = set()
+                for band, key in enumerate(band_keys):
+                    bucket = self._buckets[band].get(key)
+                    if bucket is None:
+                        self._buckets[band][key] = [position]
+                    else:
+                        candidates.update(bucket)
+                        bucket.append(position)
+                cluster = None
+                if candidates:
+                    candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+                    similarity = (self._signatures[candidates] == signature).mean(axis=1)
+                    best = int(similarity.argmax())
+                    if similarity[best] >= self.threshold:
+                        cluster = self._cluster_of[candidates[best]]
+                if cluster is None:
+                    cluster = len(self._members)
+                    self._members.append([])
+                self._signatures[position] = signature
+                self._ids.append(article_id)
+                self._index[article_id] = position
+                self._sources.append(article.get("source", ""))
+                self._cluster_of.append(cluster)
+                self._members[cluster].append(position)
+
+    def add(self, article_id, article):
+        self.add_many([(article_id, article)])
+
+    def is_representative(self, article_id):
+        """True unless the article is a later copy of a story already in the corpus."""
+        position = self._index.get(article_id)
+        return position is None or self._members[self._cluster_of[position]][0] == position
+
+    def members(self, article_id):
+        """Return [(id, source), ...] for the article's cluster, representative first."""
+        with self._lock:
+            position = self._index.get(article_id)
+            if position is None:
+                return []
+            return [(self._ids[member], self._sources[member])
+                    for member in self._members[self._cluster_of[position]]]
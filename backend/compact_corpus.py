@@ -0,0 +1,187 @@
+import mmap
+import os
+import threading
+from array import array
+from datetime import datetime, timezone
+
+from storage import parse_posted_date
+
+DATE_SEPARATOR = " • Posted: "
+
+
+def format_posted_date(source, wall_clock, zone):
+    """Inverse of parse_posted_date for dates in the app's display format."""
+    when = datetime.fromtimestamp(wall_clock, timezone.utc)
+    hour = when.strftime("%I").lstrip("0")
+    return f"{source}{DATE_SEPARATOR}{when:%b} {when.day}, {when.year} {hour}:{when:%M %p} {zone}"
+
+
+class _Table:
+    """Interned values stored once, referred to by small integer codes."""
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ArticleRecord:
+    __slots__ = ("seq", "title", "subtitle", "source", "category", "posted", "zone", "date", "image", "logo",
+                 "first", "count")
+
+
+class CompactCorpus:
+    """Articles held in memory with as little per-article overhead as possible.
+
+    Each article is a __slots__ record. Source, category, time zone, image and
+    logo are small codes into shared tables. The display date is kept as a
+    wall-clock timestamp and rebuilt on read; dates that do not round-trip are
+    kept as given. Paragraphs are UTF-8 in one blob, located through an offset
+    array, so they are not Python objects at all.
+
+    load() writes the blob for the initial corpus to `path` and maps it
+    read-only. Every process that maps the file (pre-forked workers included)
+    shares its pages through the OS page cache. Articles added later go to an
+    in-process tail; replacing an article leaves its old paragraphs unused in
+    the blob.
+
+    Each record also keeps the article's repository seq number, so callers can
+    map ids to seqs and tell which stored rows they already hold.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._records = {}
+        self._sources = _Table()
+        self._categories = _Table()
+        self._zones = _Table()
+        self._images = _Table()
+        self._logos = _Table()
+        self._ends = array("Q")
+        self._base = b""
+        self._tail = bytearray()
+        self.last_seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, article_id):
+        return article_id in self._records
+
+    def _record(self, seq, article, paragraphs):
+        record = ArticleRecord()
+        record.seq = seq
+        if seq > self.last_seq:
+            self.last_seq = seq
+        record.title = article["title"]
+        record.subtitle = article["subtitle"]
+        record.source = self._sources.code(article["source"])
+        record.category = self._categories.code(article["category"])
+        record.image = self._images.code(article["image"])
+        record.logo = self._logos.code(article["logo"])
+        record.posted = record.zone = record.date = None
+        published = parse_posted_date(article["date"])
+        if published is not None:
+            zone = article["date"].rsplit(" ", 1)[-1]
+            wall_clock = int(published.replace(tzinfo=timezone.utc).timestamp())
+            if format_posted_date(article["source"], wall_clock, zone) == article["date"]:
+                record.posted, record.zone = wall_clock, self._zones.code(zone)
+        if record.posted is None:
+            record.date = article["date"]
+        record.first = len(self._ends)
+        record.count = len(paragraphs)
+        return record
+
+    def load(self, rows):
+        """Add [(seq, id, article), ...] with their paragraphs written to the mapped blob."""
+        if self.path is None:
+            self.add_many(rows)
+            return
+        size = len(self._base) + len(self._tail)
+        with self._lock, open(self.path + ".tmp", "wb") as f:
+            f.write(self._base)
+            f.write(self._tail)
+            for seq, article_id, article in rows:
+                paragraphs = [paragraph.encode("utf-8") for paragraph in article["content"]]
+                self._records[article_id] = self._record(seq, article, paragraphs)
+                for paragraph in paragraphs:
+                    f.write(paragraph)
+                    size += len(paragraph)
+                    self._ends.append(size)
+            f.flush()
+            os.replace(self.path + ".tmp", self.path)
+            if size:
+                with open(self.path, "rb") as blob:
+                    self._base = mmap.mmap(blob.fileno(), 0, access=mmap.ACCESS_READ)
+            self._tail = bytearray()
+
+    def add_many(self, rows):
+        """Add or replace [(seq, id, article), ...], keeping paragraphs in this process's tail."""
+        with self._lock:
+            for seq, article_id, article in rows:
+                paragraphs = [paragraph.encode("utf-8") for paragraph in article["content"]]
+                record = self._record(seq, article, paragraphs)
+                for paragraph in paragraphs:
+                    self._tail += paragraph
+                    self._ends.append(len(self._base) + len(self._tail))
+                self._records[article_id] = record
+
+    def add(self, seq, article_id, article):
+        self.add_many([(seq, article_id, article)])
+
+    def _paragraph(self, index):
+        start = self._ends[index - 1] if index else 0
+        end = self._ends[index]
+        base = len(self._base)
+        if end <= base:
+            return self._base[start:end].decode("utf-8")
+        return bytes(self._tail[start - base:end - base]).decode("utf-8")
+
+    def _article(self, record, content):
+        source = self._sources.values[record.source]
+        article = {
+            "title": record.title,
+            "subtitle": record.subtitle,
+            "category": self._categories.values[record.category],
+            "source": source,
+            "date": record.date if record.posted is None else
+            format_posted_date(source, record.posted, self._zones.values[record.zone]),
+            "image": self._images.values[record.image],
+            "logo": self._logos.values[record.logo],
+        }
+        if content:
+            article["content"] = [self._paragraph(index) for index in range(record.first, record.first + record.count)]
+        return article
+
+    def get(self, article_id, content=True):
+        """Return the article as the repository would, or None; content=False skips the paragraphs."""
+        record = self._records.get(article_id)
+        return self._article(record, content) if record is not None else None
+
+    def seq(self, article_id):
+        record = self._records.get(article_id)
+        return record.seq if record is not None else None
+
+    def seqs(self, article_ids):
+        """Return {id: seq} for the ids held here, like Repository.article_seqs."""
+        records = self._records
+        return {article_id: records[article_id].seq for article_id in article_ids if article_id in records}
+
+    def get_many(self, article_ids, content=True):
+        """Return {id: article} for the ids held here."""
+        records = self._records
+        return {article_id: self._article(records[article_id], content)
+                for article_id in article_ids if article_id in records}
+
+    def items(self):
+        for article_id, record in list(self._records.items()):
+            yield article_id, self._article(record, True)
@@ -0,0 +1,82 @@
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Optional: without it clients are offered gzip only.
+    brotli = None
+
+# Bodies smaller than this are sent as they are; compressing them saves less than it costs.
+MIN_COMPRESS_BYTES = 1024
+
+# Cached bodies are compressed once per version, so spend more CPU for smaller output;
+# bodies built for a single request use fast settings.
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+ONE_OFF_GZIP_LEVEL = 4
+ONE_OFF_BROTLI_QUALITY = 4
+
+# In order of preference when a client accepts several equally.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body, coding, one_off=False):
+    if coding == "br":
+        quality = ONE_OFF_BROTLI_QUALITY if one_off else BROTLI_QUALITY
+        return brotli.compress(body, quality=quality, mode=brotli.MODE_TEXT)
+    # mtime=0 keeps the output, and so its ETag, the same for the same body.
+    return gzip.compress(body, compresslevel=ONE_OFF_GZIP_LEVEL if one_off else GZIP_LEVEL, mtime=0)
+
+
+def compress_stream(chunks, coding):
+    """Compress `chunks` as they are produced, flushing each so none is held back."""
+    if coding == "br":
+        compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=ONE_OFF_BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(ONE_OFF_GZIP_LEVEL, wbits=31)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def negotiate(accept_encodings, size):
+    """Return the coding to send a `size`-byte body with, or None to send it as is."""
+    if size < MIN_COMPRESS_BYTES:
+        return None
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def encoded_body(encoded, body, coding):
+    """Return `body` compressed with `coding`, computing it once into the `encoded` dict.
+
+    Returns None when compressing does not make the body smaller, which is
+    remembered too.
+    """
+    if coding not in encoded:
+        compressed = compress(body, coding)
+        encoded[coding] = compressed if len(compressed) < len(body) else None
+    return encoded[coding]
+
+
+def compress_response(response, accept_encodings):
+    """Compress a JSON response built for this request only, if the client accepts it.
+
+    Responses that are streamed, not JSON or already negotiated (they vary on
+    Accept-Encoding) are left alone.
+    """
+    if (response.direct_passthrough or response.is_streamed or not response.is_json
+            or "accept-encoding" in response.vary):
+        return response
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    coding = negotiate(accept_encodings, len(body))
+    if coding is None:
+        return response
+    compressed = compress(body, coding, one_off=True)
+    if len(compressed) < len(body):
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = coding
+    return response
@@ -0,0 +1,327 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+from feed import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+SORTS = ("top", "newest")
+REACTIONS = ("like", "dislike")
+
+
+class DiscussionNotFound(KeyError):
+    pass
+
+
+class CommentNotFound(KeyError):
+    pass
+
+
+class _Comment:
+    __slots__ = ("id", "parent_id", "user", "comment", "likes", "dislikes", "replies", "created_at")
+
+    def __init__(self, row):
+        for name in self.__slots__:
+            setattr(self, name, row[name])
+
+    @property
+    def score(self):
+        return self.likes - self.dislikes
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "parentId": self.parent_id,
+            "user": self.user,
+            "comment": self.comment,
+            "likes": self.likes,
+            "dislikes": self.dislikes,
+            "replies": self.replies,
+            "createdAt": self.created_at,
+        }
+
+
+class _Thread:
+    """Ordered indexes over the direct children of one parent (or the top level)."""
+
+    __slots__ = ("newest", "top")
+
+    def __init__(self, comments=()):
+        self.newest = sorted(comment.id for comment in comments)
+        self.top = sorted((-comment.score, -comment.id) for comment in comments)
+
+    def add(self, comment):
+        if not self.newest or self.newest[-1] < comment.id:
+            self.newest.append(comment.id)
+        else:
+            insort(self.newest, comment.id)
+        insort(self.top, (-comment.score, -comment.id))
+
+    def rescore(self, comment, old_score):
+        del self.top[bisect_left(self.top, (-old_score, -comment.id))]
+        insort(self.top, (-comment.score, -comment.id))
+
+    def page(self, sort, limit, cursor):
+        """Return (comment ids, next cursor or None) using keyset pagination."""
+        if sort == "newest":
+            end = bisect_left(self.newest, decode_cursor(cursor)) if cursor else len(self.newest)
+            start = max(0, end - limit)
+            ids = self.newest[start:end][::-1]
+            return ids, encode_cursor(ids[-1]) if start > 0 else None
+
+        if cursor:
+            score, comment_id = decode_cursor(cursor, size=2)
+            start = bisect_right(self.top, (-score, -comment_id))
+        else:
+            start = 0
+        keys = self.top[start:start + limit]
+        ids = [-key[1] for key in keys]
+        more = start + limit < len(self.top)
+        return ids, encode_cursor(-keys[-1][0], -keys[-1][1]) if more else None
+
+
+class _Discussion:
+    __slots__ = ("article", "comments", "threads", "version", "loaded_at")
+
+    def __init__(self, article, comments, version=0):
+        self.article = article
+        self.comments = {}
+        children = {None: []}
+        for row in comments:
+            comment = self.comments[row["id"]] = _Comment(row)
+            children.setdefault(comment.parent_id, []).append(comment)
+        self.threads = {parent_id: _Thread(members) for parent_id, members in children.items()}
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+    def thread(self, parent_id):
+        thread = self.threads.get(parent_id)
+        if thread is None:
+            thread = self.threads[parent_id] = _Thread()
+        return thread
+
+
+def _counts(discussion):
+    return {comment_id: (comment.likes, comment.dislikes, comment.replies)
+            for comment_id, comment in discussion.comments.items()}
+
+
+class DiscussionThreads:
+    """Comment threads served from in-memory ordered indexes, with coalesced reactions.
+
+    Each article's comments are loaded once and indexed per parent by newest (id) and
+    by top (likes minus dislikes, newest first on ties), so listing a page is a bisect
+    and a slice. New comments are written through to the repository immediately; like
+    and dislike increments are applied in memory and flushed in one batch every
+    `flush_interval` seconds. Threads are reloaded after `refresh_after` seconds to
+    pick up writes from other processes.
+
+    Subscribers are called with an article id whenever its discussion changes:
+    a comment is posted or reacted to here, or a reload finds it changed.
+    """
+
+    def __init__(self, repository, flush_interval=1.0, refresh_after=5.0):
+        self.repository = repository
+        self.flush_interval = flush_interval
+        self.refresh_after = refresh_after
+        self._discussions = {}
+        self._article_by_comment = {}
+        self._pending = {}
+        self._in_flight = {}
+        self._subscribers = []
+        # Bumped when a flush takes the pending reactions, so a reload can tell whether
+        # storage may hold some of the reactions it is about to add back.
+        self._flushes = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _discussion(self, article_id):
+        discussion = self._discussions.get(article_id)
+        if discussion is not None and time.monotonic() - discussion.loaded_at <= self.refresh_after:
+            return discussion
+        # Storage is read and indexed outside the locks, then swapped in.
+        while True:
+            with self._lock:
+                flushes, flushing = self._flushes, bool(self._in_flight)
+            if flushing:
+                # Storage may or may not have those reactions yet; wait for the flush to end.
+                with self._flush_lock:
+                    continue
+            row = self.repository.get_discussion(article_id)
+            loaded = _Discussion(row["article"], row["comments"]) if row is not None else None
+            with self._lock:
+                current = self._discussions.get(article_id)
+                if current is not discussion:
+                    return current
+                if flushes != self._flushes:
+                    # A flush ran meanwhile; storage may or may not have its reactions.
+                    continue
+                if loaded is None:
+                    return None
+                changed = self._merge(loaded, discussion)
+                self._discussions[article_id] = loaded
+                for comment_id in loaded.comments:
+                    self._article_by_comment[comment_id] = article_id
+            if changed:
+                self._notify(article_id)
+            return loaded
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def _notify(self, article_id):
+        for callback in self._subscribers:
+            callback(article_id)
+
+    def _merge(self, loaded, previous):
+        """Bring what storage does not have yet into `loaded`; call with the lock held.
+
+        Return whether `loaded` differs from `previous`; the version only moves if it does.
+        """
+        if previous is not None:
+            # Comments posted here after storage was read; their reactions are still pending.
+            missed = [comment for comment_id, comment in previous.comments.items()
+                      if comment_id not in loaded.comments]
+            for comment in sorted(missed, key=lambda c: c.id):
+                parent_id = comment.parent_id
+                if parent_id is not None and parent_id not in loaded.comments:
+                    continue
+                row = {name: getattr(comment, name) for name in _Comment.__slots__}
+                row.update(likes=0, dislikes=0, replies=0)
+                loaded.comments[comment.id] = _Comment(row)
+                loaded.thread(parent_id).add(loaded.comments[comment.id])
+                if parent_id is not None:
+                    loaded.comments[parent_id].replies += 1
+        for comment_id, (likes, dislikes) in self._pending.items():
+            comment = loaded.comments.get(comment_id)
+            if comment is not None:
+                old_score = comment.score
+                comment.likes += likes
+                comment.dislikes += dislikes
+                loaded.thread(comment.parent_id).rescore(comment, old_score)
+        if previous is None:
+            return False
+        changed = loaded.article != previous.article or _counts(loaded) != _counts(previous)
+        loaded.version = previous.version + 1 if changed else previous.version
+        return changed
+
+    def version(self, article_id):
+        """Return a counter that changes whenever the article's discussion does, or None."""
+        discussion = self._discussion(article_id)
+        return discussion.version if discussion is not None else None
+
+    def article(self, article_id):
+        discussion = self._discussion(article_id)
+        return discussion.article if discussion is not None else None
+
+    def page(self, article_id, parent_id=None, sort="top", limit=20, cursor=None):
+        """Return ([comment json, ...], next cursor or None) for one page of a thread."""
+        discussion = self._discussion(article_id)
+        if discussion is None:
+            raise DiscussionNotFound(article_id)
+        with self._lock:
+            if parent_id is not None and parent_id not in discussion.comments:
+                raise CommentNotFound(parent_id)
+            thread = discussion.threads.get(parent_id)
+            if thread is None:
+                return [], None
+            ids, next_cursor = thread.page(sort, limit, cursor)
+            return [discussion.comments[comment_id].to_json() for comment_id in ids], next_cursor
+
+    def article_id_for(self, comment_id):
+        article_id = self._article_by_comment.get(comment_id)
+        if article_id is None:
+            article_id = self.repository.get_comment_article(comment_id)
+        return article_id
+
+    def post(self, article_id, user, text, parent_id=None):
+        discussion = self._discussion(article_id)
+        if discussion is None:
+            raise DiscussionNotFound(article_id)
+        if parent_id is not None and parent_id not in discussion.comments:
+            raise CommentNotFound(parent_id)
+        row = {"parent_id": parent_id, "user": user, "comment": text, "likes": 0,
+               "dislikes": 0, "replies": 0, "created_at": int(time.time())}
+        row["id"] = self.repository.add_comment(article_id, row)
+        comment = _Comment(row)
+        with self._lock:
+            discussion = self._discussions[article_id]
+            # A reload that raced with the insert may already have picked it up.
+            if comment.id not in discussion.comments:
+                discussion.comments[comment.id] = comment
+                discussion.thread(parent_id).add(comment)
+                if parent_id is not None:
+                    discussion.comments[parent_id].replies += 1
+            discussion.version += 1
+            self._article_by_comment[comment.id] = article_id
+        self._notify(article_id)
+        return comment.to_json()
+
+    def react(self, comment_id, reaction):
+        """Count a like or dislike and return the comment's live (likes, dislikes)."""
+        article_id = self.article_id_for(comment_id)
+        discussion = self._discussion(article_id) if article_id is not None else None
+        if discussion is None or comment_id not in discussion.comments:
+            raise CommentNotFound(comment_id)
+        with self._lock:
+            discussion = self._discussions[article_id]
+            comment = discussion.comments[comment_id]
+            old_score = comment.score
+            delta = self._pending.setdefault(comment_id, [0, 0])
+            if reaction == "like":
+                comment.likes += 1
+                delta[0] += 1
+            else:
+                comment.dislikes += 1
+                delta[1] += 1
+            discussion.thread(comment.parent_id).rescore(comment, old_score)
+            discussion.version += 1
+            likes, dislikes = comment.likes, comment.dislikes
+        self._notify(article_id)
+        return likes, dislikes
+
+    def flush(self):
+        """Write every pending reaction to the repository in one batch."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._in_flight, self._pending = self._pending, {}
+                self._flushes += 1
+            try:
+                self.repository.add_reactions(self._in_flight)
+            except Exception:
+                with self._lock:
+                    for comment_id, (likes, dislikes) in self._in_flight.items():
+                        delta = self._pending.setdefault(comment_id, [0, 0])
+                        delta[0] += likes
+                        delta[1] += dislikes
+                    self._in_flight = {}
+                raise
+            count = len(self._in_flight)
+            self._in_flight = {}
+            return count
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing comment reactions failed; retrying next interval")
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="reaction-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
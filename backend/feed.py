@@ -0,0 +1,32 @@
+import base64
+
+# Publishers label the same beat differently; filters treat these as one category.
+CATEGORY_ALIASES = {"environment": "climate"}
+
+
+def normalize_category(value):
+    value = (value or "").strip().lower()
+    return CATEGORY_ALIASES.get(value, value)
+
+
+def normalize_source(value):
+    return (value or "").strip().lower()
+
+
+def encode_cursor(*values):
+    """Encode one or more integers as an opaque, URL-safe pagination cursor."""
+    raw = ".".join(str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, size=1):
+    """Decode a cursor from encode_cursor; returns an int, or a tuple when size > 1."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = tuple(int(part) for part in
+                       base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii").split("."))
+    except (ValueError, UnicodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if len(values) != size:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return values[0] if size == 1 else values
@@ -0,0 +1,38 @@
+"""Production server settings: gunicorn -c gunicorn.conf.py app:app
+
+The app is imported once in the master (preload_app) and workers are forked from
+it, so the search index and other loaded content are shared copy-on-write.
+
+Signals to the master:
+    HUP   graceful restart: fork fresh workers, then let the old ones finish
+          their in-flight requests and exit
+    USR2  zero-downtime reload of new code: start a second master alongside
+          the old one; send the old master WINCH then TERM once the new one is up
+    TERM  graceful shutdown
+"""
+import os
+import tempfile
+
+# Workers share request metrics through snapshot files here (see metrics.py).
+os.environ.setdefault("NEWSBLEND_METRICS_DIR", tempfile.mkdtemp(prefix="newsblend-metrics-"))
+
+bind = os.environ.get("NEWSBLEND_BIND", "0.0.0.0:5050")
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "gthread"
+threads = int(os.environ.get("NEWSBLEND_THREADS", 4))
+preload_app = True
+graceful_timeout = 30
+keepalive = 5
+accesslog = os.environ.get("NEWSBLEND_ACCESS_LOG")
+
+
+def when_ready(server):
+    import app
+
+    app.before_fork()
+
+
+def post_fork(server, worker):
+    import app
+
+    app.after_fork()
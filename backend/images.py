@@ -0,0 +1,130 @@
+"""Resized, re-encoded image derivatives with content-hashed file names.
+
+Run offline (or from a background job) after adding images to static/:
+
+    python images.py
+
+Derivatives are written to static/derived/ together with a manifest that
+make_image_url uses to pick the right file. Images without derivatives are
+served as the original file.
+"""
+import hashlib
+import io
+import json
+import os
+import sys
+
+DERIVED_DIR = "derived"
+MANIFEST_NAME = "manifest.json"
+
+# Longest edge in pixels; images are never upscaled.
+VARIANTS = {
+    "thumbnail": 240,
+    "card": 640,
+    "hero": 1280,
+}
+FORMATS = {
+    "webp": {"quality": 80, "method": 6},
+    "avif": {"quality": 55},
+}
+DEFAULT_FORMAT = "webp"
+SOURCE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class DerivativeManifest:
+    """Maps each source image to its derived files by variant and format."""
+
+    def __init__(self, static_dir):
+        self.path = os.path.join(static_dir, DERIVED_DIR, MANIFEST_NAME)
+        self._entries = {}
+        self.reload()
+
+    def reload(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)["images"]
+        except (OSError, ValueError, KeyError):
+            entries = {}
+        self._entries = entries
+
+    def resolve(self, filename, variant, fmt=DEFAULT_FORMAT):
+        """Return the static path to serve for `filename`, falling back to the original."""
+        formats = self._entries.get(filename, {}).get("variants", {}).get(variant)
+        if not formats:
+            return filename
+        return formats.get(fmt) or formats.get(DEFAULT_FORMAT) or filename
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), **FORMATS[fmt])
+    return buffer.getvalue()
+
+
+def build_derivatives(static_dir, formats=None, log=print):
+    """Write missing derivatives for every source image in `static_dir` and update the manifest.
+
+    Sources whose content hash matches the manifest are skipped, so repeated runs only
+    process new or changed images. Derivatives no longer in the manifest are deleted.
+    """
+    from PIL import Image, features
+
+    formats = [fmt for fmt in (formats or FORMATS) if features.check(fmt)]
+    out_dir = os.path.join(static_dir, DERIVED_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            images = json.load(f)["images"]
+    except (OSError, ValueError, KeyError):
+        images = {}
+
+    for filename in sorted(os.listdir(static_dir)):
+        if not filename.lower().endswith(SOURCE_EXTENSIONS):
+            continue
+        source_path = os.path.join(static_dir, filename)
+        with open(source_path, "rb") as f:
+            source_hash = hashlib.sha256(f.read()).hexdigest()
+        entry = images.get(filename)
+        if entry and entry.get("source") == source_hash and set(formats) <= set(entry["formats"]):
+            continue
+
+        stem = os.path.splitext(filename)[0]
+        variants = {}
+        with Image.open(source_path) as original:
+            original.load()
+            if original.mode not in ("RGB", "RGBA"):
+                original = original.convert("RGBA")
+            for variant, size in VARIANTS.items():
+                image = original.copy()
+                image.thumbnail((size, size))
+                variants[variant] = {}
+                for fmt in formats:
+                    data = _encode(image, fmt)
+                    digest = hashlib.sha256(data).hexdigest()[:12]
+                    name = f"{stem}.{variant}.{digest}.{fmt}"
+                    with open(os.path.join(out_dir, name), "wb") as f:
+                        f.write(data)
+                    variants[variant][fmt] = f"{DERIVED_DIR}/{name}"
+                    log(f"{filename} -> {name} ({len(data)} bytes)")
+        images[filename] = {"source": source_hash, "formats": formats, "variants": variants}
+
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"images": images}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+    referenced = {os.path.basename(path) for entry in images.values()
+                  for formats_ in entry["variants"].values() for path in formats_.values()}
+    for name in os.listdir(out_dir):
+        if name != MANIFEST_NAME and name not in referenced:
+            os.remove(os.path.join(out_dir, name))
+    return images
+
+
+if __name__ == "__main__":
+    static_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "static")
+    build_derivatives(static_dir)
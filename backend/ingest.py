@@ -0,0 +1,375 @@
+"""Pull publisher RSS/Atom feeds into the repository.
+
+    python ingest.py                 # poll every feed forever
+    python ingest.py --once          # one pass, then exit
+    python ingest.py --once --feed-base http://127.0.0.1:8765   # fixture feeds, see benchmarks/feed_server.py
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import html
+import logging
+import os
+import random
+import re
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from xml.etree import ElementTree
+
+from storage import Repository
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "NewsBlend-Ingest/1.0"
+
+SOURCE_LOGOS = {
+    "CBC": "cbc_logo.png",
+    "CNN": "cnn_logo.png",
+    "Reuters": "reuters_logo.png",
+    "Bloomberg": "bloomberg_logo.png",
+    "TechCrunch": "techcrunch_logo.png",
+    "BBC": "bbc_logo.png",
+}
+
+# Publisher category labels mapped onto the app's categories; anything else gets the feed's default.
+CATEGORY_KEYWORDS = {
+    "politics": "Politics", "election": "Politics", "government": "Politics",
+    "climate": "Climate", "environment": "Environment", "science": "Climate",
+    "business": "Business", "markets": "Business", "economy": "Business", "finance": "Business",
+    "tech": "Tech", "technology": "Tech", "ai": "Tech", "startups": "Tech",
+    "world": "World", "international": "World",
+}
+
+MAX_PARAGRAPHS = 12
+SUBTITLE_LENGTH = 200
+
+NS = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "content": "http://purl.org/rss/1.0/modules/content/",
+    "media": "http://search.yahoo.com/mrss/",
+}
+
+TAG_RE = re.compile(r"<[^>]+>")
+PARAGRAPH_BREAK_RE = re.compile(r"</p\s*>|<br\s*/?>", re.IGNORECASE)
+IMG_SRC_RE = re.compile(r"<img[^>]+src=[\"']([^\"']+)[\"']", re.IGNORECASE)
+NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+class Feed:
+    """One publisher feed plus its conditional-GET validators and backoff state."""
+
+    __slots__ = ("name", "source", "url", "category", "etag", "last_modified", "failures",
+                 "next_fetch_at")
+
+    def __init__(self, name, source, url, category):
+        self.name = name
+        self.source = source
+        self.url = url
+        self.category = category
+        self.etag = None
+        self.last_modified = None
+        self.failures = 0
+        self.next_fetch_at = 0.0
+
+
+FEEDS = [
+    Feed("cbc", "CBC", "https://www.cbc.ca/webfeed/rss/rss-topstories", "World"),
+    Feed("cnn", "CNN", "http://rss.cnn.com/rss/edition.rss", "World"),
+    Feed("reuters", "Reuters", "https://www.reutersagency.com/feed/?post_type=best", "World"),
+    Feed("bloomberg", "Bloomberg", "https://feeds.bloomberg.com/markets/news.rss", "Business"),
+    Feed("techcrunch", "TechCrunch", "https://techcrunch.com/feed/", "Tech"),
+    Feed("bbc", "BBC", "https://feeds.bbci.co.uk/news/rss.xml", "World"),
+]
+
+
+class FetchError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Parsing
+
+def _text(element, path):
+    found = element.find(path, NS)
+    return (found.text or "").strip() if found is not None else ""
+
+
+def _strip_html(markup):
+    return " ".join(html.unescape(TAG_RE.sub(" ", markup)).split())
+
+
+def _paragraphs(markup):
+    paragraphs = [_strip_html(part) for part in PARAGRAPH_BREAK_RE.split(markup)]
+    return [paragraph for paragraph in paragraphs if paragraph][:MAX_PARAGRAPHS]
+
+
+def _subtitle(summary, paragraphs):
+    text = _strip_html(summary) or (paragraphs[0] if paragraphs else "")
+    if len(text) <= SUBTITLE_LENGTH:
+        return text
+    return text[:SUBTITLE_LENGTH].rsplit(" ", 1)[0] + "…"
+
+
+def _category(labels, default):
+    for label in labels:
+        for word in NON_WORD_RE.split(label.lower()):
+            if word in CATEGORY_KEYWORDS:
+                return CATEGORY_KEYWORDS[word]
+    return default
+
+
+def _posted(source, when):
+    """Format a timestamp the way seed articles write dates, in UTC."""
+    when = when.astimezone(timezone.utc)
+    hour = when.strftime("%I").lstrip("0")
+    return f"{source} • Posted: {when.strftime('%b')} {when.day}, {when.year} {hour}:{when.strftime('%M %p')} UTC"
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return when if when.tzinfo else when.replace(tzinfo=timezone.utc)
+
+
+def _rss_items(root):
+    for item in root.iter("item"):
+        media = item.find("media:content", NS)
+        if media is None:
+            media = item.find("media:thumbnail", NS)
+        enclosure = item.find("enclosure")
+        image = media.get("url") if media is not None else None
+        if image is None and enclosure is not None and enclosure.get("type", "").startswith("image/"):
+            image = enclosure.get("url")
+        yield {
+            "title": _text(item, "title"),
+            "summary": _text(item, "description"),
+            "body": _text(item, "content:encoded"),
+            "published": _text(item, "pubDate"),
+            "categories": [(c.text or "") for c in item.findall("category")],
+            "image": image,
+        }
+
+
+def _atom_entries(root):
+    for entry in root.iter(f"{{{NS['atom']}}}entry"):
+        image = None
+        for link in entry.findall("atom:link", NS):
+            if link.get("rel") == "enclosure" and link.get("type", "").startswith("image/"):
+                image = link.get("href")
+        yield {
+            "title": _text(entry, "atom:title"),
+            "summary": _text(entry, "atom:summary"),
+            "body": _text(entry, "atom:content"),
+            "published": _text(entry, "atom:published") or _text(entry, "atom:updated"),
+            "categories": [c.get("term", "") for c in entry.findall("atom:category", NS)],
+            "image": image,
+        }
+
+
+def parse_feed(body, feed, now=None):
+    """Parse an RSS 2.0 or Atom document into articles shaped like seed_data.ARTICLES."""
+    root = ElementTree.fromstring(body)
+    items = _atom_entries(root) if root.tag == f"{{{NS['atom']}}}feed" else _rss_items(root)
+    now = now or datetime.now(timezone.utc)
+    articles = []
+    for item in items:
+        title = _strip_html(item["title"])
+        if not title:
+            continue
+        paragraphs = _paragraphs(item["body"] or item["summary"])
+        image = item["image"]
+        if image is None:
+            match = IMG_SRC_RE.search(item["body"] or item["summary"])
+            image = html.unescape(match.group(1)) if match else SOURCE_LOGOS.get(feed.source, "")
+        articles.append({
+            "title": title,
+            "subtitle": _subtitle(item["summary"], paragraphs),
+            "category": _category(item["categories"], feed.category),
+            "source": feed.source,
+            "date": _posted(feed.source, _parse_date(item["published"]) or now),
+            "image": image,
+            "logo": SOURCE_LOGOS.get(feed.source, ""),
+            "content": paragraphs or [title],
+        })
+    return articles
+
+
+def content_hash(article):
+    """Hash of the normalized title and body, so reformatted or syndicated copies collide."""
+    text = " ".join([article["title"], *article["content"]]).lower()
+    return hashlib.sha256(" ".join(NON_WORD_RE.split(text)).strip().encode("utf-8")).hexdigest()
+
+
+def article_id_for(digest):
+    """Numeric article id from a content hash; 52 bits so it stays exact as a JS number."""
+    return str(int(digest[:13], 16))
+
+
+# Fetching
+
+class Ingestor:
+    """Polls feeds concurrently and stores new articles, deduplicated by content hash.
+
+    Feeds are fetched on a thread pool driven by asyncio, at most `per_source`
+    at a time per publisher. Each fetch sends the feed's last ETag and
+    Last-Modified, so unchanged feeds cost a 304. A failing feed is retried
+    after an exponential, jittered backoff capped at `max_backoff` seconds;
+    a Retry-After header wins when the server sends one. Articles whose
+    normalized content hash was already seen, in this pass or in storage, are
+    dropped before insertion.
+    """
+
+    def __init__(self, repository, feeds=FEEDS, per_source=2, max_workers=16, timeout=10.0,
+                 interval=300.0, base_backoff=30.0, max_backoff=3600.0, max_bytes=5 * 1024 * 1024):
+        self.repository = repository
+        self.feeds = list(feeds)
+        self.per_source = per_source
+        self.timeout = timeout
+        self.interval = interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._seen = set()
+
+    def close(self):
+        self._executor.shutdown()
+
+    def _fetch(self, feed):
+        """Return the feed body, or None if it has not changed since the last fetch."""
+        headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"}
+        if feed.etag:
+            headers["If-None-Match"] = feed.etag
+        if feed.last_modified:
+            headers["If-Modified-Since"] = feed.last_modified
+        request = urllib.request.Request(feed.url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read(self.max_bytes + 1)
+                if len(body) > self.max_bytes:
+                    raise FetchError(f"feed larger than {self.max_bytes} bytes")
+                if response.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                feed.etag = response.headers.get("ETag")
+                feed.last_modified = response.headers.get("Last-Modified")
+                return body
+        except urllib.error.HTTPError as error:
+            if error.code == 304:
+                return None
+            retry_after = error.headers.get("Retry-After")
+            raise FetchError(f"HTTP {error.code}",
+                             float(retry_after) if retry_after and retry_after.isdigit() else None)
+        except (urllib.error.URLError, OSError) as error:
+            raise FetchError(str(error))
+
+    def _backoff(self, feed, error):
+        feed.failures += 1
+        delay = error.retry_after
+        if delay is None:
+            delay = min(self.max_backoff, self.base_backoff * 2 ** (feed.failures - 1))
+            delay *= random.uniform(0.5, 1.0)
+        feed.next_fetch_at = time.monotonic() + delay
+        logger.warning("Fetching %s failed (%s); retrying in %.0fs", feed.name, error, delay)
+
+    def _fetch_articles(self, feed):
+        """Return the feed's parsed articles, or None if it has not changed."""
+        body = self._fetch(feed)
+        if body is None:
+            return None
+        try:
+            return parse_feed(body, feed)
+        except ElementTree.ParseError as error:
+            raise FetchError(f"invalid feed XML: {error}")
+
+    async def _poll_feed(self, feed, limits, stats):
+        loop = asyncio.get_running_loop()
+        async with limits[feed.source]:
+            try:
+                articles = await loop.run_in_executor(self._executor, self._fetch_articles, feed)
+            except FetchError as error:
+                self._backoff(feed, error)
+                stats["failed"] += 1
+                return []
+        feed.failures = 0
+        feed.next_fetch_at = time.monotonic() + self.interval
+        if articles is None:
+            stats["not_modified"] += 1
+            return []
+        stats["fetched"] += 1
+        return articles
+
+    async def poll_once(self):
+        """Fetch every feed that is due and store what is new; return counters for the pass."""
+        stats = dict.fromkeys(("fetched", "not_modified", "failed", "parsed", "duplicates", "inserted"), 0)
+        now = time.monotonic()
+        due = [feed for feed in self.feeds if feed.next_fetch_at <= now]
+        limits = {feed.source: asyncio.Semaphore(self.per_source) for feed in due}
+        batches = await asyncio.gather(*(self._poll_feed(feed, limits, stats) for feed in due))
+
+        new = {}
+        for articles in batches:
+            for article in articles:
+                stats["parsed"] += 1
+                article_id = article_id_for(content_hash(article))
+                if article_id in self._seen or article_id in new:
+                    stats["duplicates"] += 1
+                    continue
+                new[article_id] = article
+        if new:
+            loop = asyncio.get_running_loop()
+            inserted = await loop.run_in_executor(self._executor, self.repository.insert_new_articles, new)
+            self._seen.update(new)
+            stats["inserted"] = len(inserted)
+            stats["duplicates"] += len(new) - len(inserted)
+        return stats
+
+    async def run(self):
+        """Poll forever, waking when the next feed is due."""
+        while True:
+            stats = await self.poll_once()
+            logger.info("Ingest pass: %s", stats)
+            next_due = min(feed.next_fetch_at for feed in self.feeds)
+            await asyncio.sleep(max(1.0, next_due - time.monotonic()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="run one pass and exit")
+    parser.add_argument("--interval", type=float, default=300.0, help="seconds between polls of a feed")
+    parser.add_argument("--feed-base", help="fetch <feed-base>/<feed name>.xml instead of publisher URLs")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    feeds = FEEDS
+    if args.feed_base:
+        feeds = [Feed(feed.name, feed.source, f"{args.feed_base.rstrip('/')}/{feed.name}.xml", feed.category)
+                 for feed in FEEDS]
+    db_path = os.environ.get("NEWSBLEND_DB",
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), "newsblend.db"))
+    ingestor = Ingestor(Repository(db_path), feeds, interval=args.interval)
+    try:
+        if args.once:
+            logger.info("Ingest pass: %s", asyncio.run(ingestor.poll_once()))
+        else:
+            asyncio.run(ingestor.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ingestor.close()
+
+
+if __name__ == "__main__":
+    main()
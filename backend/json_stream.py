@@ -0,0 +1,100 @@
+import threading
+from collections import OrderedDict
+
+from flask import Response, current_app, request, stream_with_context
+
+from compression import ENCODINGS, compress_stream
+
+# Encoded items are sent in chunks of about this many bytes.
+CHUNK_BYTES = 16 * 1024
+
+
+def encode_list(prefix, fragments, suffix, chunk_bytes=CHUNK_BYTES):
+    """Yield `prefix`, the encoded `fragments` comma-separated, then `suffix()`, in chunks.
+
+    `prefix` ends by opening a JSON array and `suffix` closes it; it is only
+    called once the fragments run out, so it can report what the iteration
+    found (such as the next cursor).
+    """
+    chunk = bytearray(prefix)
+    first = True
+    for fragment in fragments:
+        if not first:
+            chunk += b","
+        chunk += fragment
+        first = False
+        if len(chunk) >= chunk_bytes:
+            yield bytes(chunk)
+            chunk.clear()
+    chunk += suffix()
+    yield bytes(chunk)
+
+
+def streamed_json(chunks, status=200):
+    """A response sent with chunked transfer encoding as `chunks` are produced.
+
+    The generator runs inside the request context, after the view has returned.
+    Chunks are compressed on the way out if the client accepts it.
+    """
+    coding = request.accept_encodings.best_match(ENCODINGS)
+    if coding is not None:
+        chunks = compress_stream(chunks, coding)
+    response = Response(stream_with_context(chunks), status=status, mimetype=current_app.json.mimetype)
+    if coding is not None:
+        response.headers["Content-Encoding"] = coding
+    response.headers["Cache-Control"] = "no-store"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def encode(value):
+    return current_app.json.dumps(value).encode("utf-8")
+
+
+class FragmentCache:
+    """Pre-encoded JSON fragments per article, so unchanged items are never re-serialized.
+
+    An article can have several fragments, one per variant (card shape, host,
+    image format...). invalidate() drops all of an article's fragments; the
+    least recently used articles are dropped beyond `max_articles`.
+    """
+
+    def __init__(self, max_articles=50000):
+        self.max_articles = max_articles
+        self._fragments = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._fragments)
+
+    def get(self, article_id, variant, build):
+        """Return the encoded fragment for (article_id, variant), calling build() to make it."""
+        with self._lock:
+            variants = self._fragments.get(article_id)
+            if variants is not None:
+                self._fragments.move_to_end(article_id)
+                fragment = variants.get(variant)
+                if fragment is not None:
+                    return fragment
+            generation = self._generation
+        fragment = encode(build())
+        with self._lock:
+            # Built from data an invalidate() may have replaced meanwhile; use it but don't keep it.
+            if generation != self._generation:
+                return fragment
+            self._fragments.setdefault(article_id, {})[variant] = fragment
+            while len(self._fragments) > self.max_articles:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def invalidate(self, article_ids):
+        with self._lock:
+            self._generation += 1
+            for article_id in article_ids:
+                self._fragments.pop(article_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._fragments.clear()
@@ -0,0 +1,246 @@
+"""Server-Sent Events stream of new articles and live poll results.
+
+    python live_events.py                  # serve /api/events on 0.0.0.0:5051
+    python live_events.py --port 5051 --tick 0.5
+
+Clients connect with EventSource to /api/events, optionally ?polls=<id>,<id> to
+receive updates for those polls only (new articles are always sent).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+from datetime import timezone
+from urllib.parse import parse_qs, urlsplit
+
+from article_watcher import ArticleWatcher
+from poll_votes import percentages
+from storage import Repository, parse_posted_date
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = "/api/events"
+STREAM_HEADERS = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/event-stream\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Connection: keep-alive\r\n"
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"\r\n"
+    b"retry: 3000\n\n"
+)
+NOT_FOUND = (
+    b"HTTP/1.1 404 Not Found\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 10\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"Not found\n"
+)
+HEARTBEAT = b": ping\n\n"
+
+
+def article_card(article_id, article):
+    published = parse_posted_date(article.get("date"))
+    return {
+        "id": article_id,
+        "title": article["title"],
+        "summary": article["subtitle"],
+        "source": article["source"],
+        "category": article["category"],
+        "publishedDate": published.astimezone(timezone.utc).isoformat() if published else None,
+    }
+
+
+class _Subscriber:
+    __slots__ = ("writer", "polls")
+
+    def __init__(self, writer, polls):
+        self.writer = writer
+        self.polls = polls
+
+
+class Broadcaster:
+    """Fans events out to every connected client from one asyncio event loop.
+
+    Each connection is a coroutine waiting on its socket rather than a thread, so
+    tens of thousands of idle subscribers cost little more than their sockets.
+    Every `tick` seconds the repository is checked for new articles and new poll
+    votes (stored by any API worker), and each event is serialized once and
+    written to every subscriber that wants it. All votes a poll received during
+    one tick become a single event carrying its current percentages.
+
+    Each connection's kernel send buffer is fixed at `send_buffer` bytes, and a
+    client with more than `max_buffer` bytes queued beyond that is disconnected
+    rather than buffered without bound; EventSource reconnects on its own once the
+    client catches up. An idle stream gets a comment line every `heartbeat`
+    seconds so proxies do not time it out.
+    """
+
+    def __init__(self, repository, tick=0.5, max_buffer=64 * 1024, send_buffer=64 * 1024, heartbeat=15.0):
+        self.repository = repository
+        self.tick = tick
+        self.max_buffer = max_buffer
+        self.send_buffer = send_buffer
+        self.heartbeat = heartbeat
+        self.subscribers = set()
+        self.dropped = 0
+        self._event_id = 0
+        self._new_rows = []
+        self._articles = ArticleWatcher(repository)
+        self._articles.subscribe(self._new_rows.extend)
+        self._vote_seq = repository.max_vote_seq()
+
+    # Connections
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 10)
+            while (await asyncio.wait_for(reader.readline(), 10)) not in (b"\r\n", b"\n", b""):
+                pass
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except (asyncio.TimeoutError, ConnectionError, ValueError):
+            writer.close()
+            return
+        url = urlsplit(target)
+        if method != "GET" or url.path != STREAM_PATH:
+            writer.write(NOT_FOUND)
+            writer.close()
+            return
+
+        polls = parse_qs(url.query).get("polls")
+        polls = {poll_id for value in polls for poll_id in value.split(",") if poll_id} if polls else None
+        # A fixed size turns off the kernel's buffer autotuning, which would otherwise hold megabytes.
+        writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer)
+        subscriber = _Subscriber(writer, polls)
+        writer.write(STREAM_HEADERS)
+        self.subscribers.add(subscriber)
+        try:
+            # Clients send nothing after the request; EOF means they went away.
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            writer.close()
+
+    # Events
+
+    def _collect(self):
+        """Read what changed since the last tick; runs in an executor thread."""
+        self._articles.poll()
+        rows = list(self._new_rows)
+        self._new_rows.clear()
+        voted = self.repository.polls_voted_after(self._vote_seq)
+        polls = {}
+        for poll_id, seq in voted.items():
+            self._vote_seq = max(self._vote_seq, seq)
+            poll = self.repository.get_poll(poll_id)
+            if poll is None:
+                continue
+            votes = self.repository.get_poll_votes(poll_id)
+            shares = percentages([votes.get(option, 0) for option in range(len(poll["options"]))])
+            polls[poll_id] = {
+                "pollId": poll_id,
+                "articleId": poll["article_id"],
+                "options": [{"label": option["label"], "percentage": share}
+                            for option, share in zip(poll["options"], shares)],
+            }
+        return [article_card(article_id, article) for _, article_id, article in rows], polls
+
+    def _encode(self, event, data):
+        self._event_id += 1
+        return (f"id: {self._event_id}\nevent: {event}\ndata: "
+                f"{json.dumps(data, separators=(',', ':'))}\n\n").encode()
+
+    def publish(self, articles, polls):
+        """Write one tick's events to every subscriber; returns how many got something."""
+        article_chunk = b"".join(self._encode("article", card) for card in articles)
+        poll_chunks = {poll_id: self._encode("poll", data) for poll_id, data in polls.items()}
+        all_polls = b"".join(poll_chunks.values())
+        delivered = 0
+        for subscriber in list(self.subscribers):
+            if subscriber.polls is None:
+                payload = article_chunk + all_polls
+            else:
+                payload = article_chunk + b"".join(
+                    chunk for poll_id, chunk in poll_chunks.items() if poll_id in subscriber.polls)
+            if payload:
+                delivered += self._send(subscriber, payload)
+        return delivered
+
+    def _send(self, subscriber, payload):
+        transport = subscriber.writer.transport
+        if transport.is_closing():
+            self.subscribers.discard(subscriber)
+            return 0
+        if transport.get_write_buffer_size() > self.max_buffer:
+            self.subscribers.discard(subscriber)
+            self.dropped += 1
+            transport.abort()
+            return 0
+        subscriber.writer.write(payload)
+        return 1
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        idle_since = loop.time()
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                articles, polls = await loop.run_in_executor(None, self._collect)
+            except Exception:
+                logger.exception("Checking for live updates failed; retrying next tick")
+                continue
+            if articles or polls:
+                dropped = self.dropped
+                self.publish(articles, polls)
+                if self.dropped > dropped:
+                    logger.warning("Disconnected %d slow subscribers", self.dropped - dropped)
+                idle_since = loop.time()
+            elif loop.time() - idle_since >= self.heartbeat:
+                for subscriber in list(self.subscribers):
+                    self._send(subscriber, HEARTBEAT)
+                idle_since = loop.time()
+
+
+async def serve(repository, host, port, tick):
+    broadcaster = Broadcaster(repository, tick=tick)
+    server = await asyncio.start_server(broadcaster.handle, host, port, backlog=4096)
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopped.set)
+    logger.info("Streaming live events on http://%s:%d%s", host, port, STREAM_PATH)
+    ticker = asyncio.create_task(broadcaster.run())
+    await stopped.wait()
+    ticker.cancel()
+    server.close()
+    for subscriber in list(broadcaster.subscribers):
+        subscriber.writer.close()
+    await server.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5051)
+    parser.add_argument("--tick", type=float, default=0.5, help="seconds between checks for updates")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    db_path = os.environ.get("NEWSBLEND_DB",
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), "newsblend.db"))
+    repository = Repository(db_path)
+    try:
+        asyncio.run(serve(repository, args.host, args.port, args.tick))
+    finally:
+        repository.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Request
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+PHASES = ("handler", "serialization", "send")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Request:
+    __slots__ = ("route", "started", "serialization", "thread_id", "samples")
+
+    def __init__(self):
+        self.route = "unmatched"
+        self.started = time.perf_counter()
+        self.serialization = 0.0
+        self.thread_id = threading.get_ident()
+        self.samples = 0
+
+
+# The request the current thread is handling; cheaper to reach than Flask's request proxy.
+_current = threading.local()
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that charges dumps() time to the current request's serialization phase."""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        body = super().dumps(obj, **kwargs)
+        sample = getattr(_current, "sample", None)
+        if sample is not None:
+            sample.serialization += time.perf_counter() - started
+        return body
+
+
+class RoutedRequest(Request):
+    """Flask request class that labels the current request's metrics when routing matches a URL rule."""
+
+    _url_rule = None
+
+    @property
+    def url_rule(self):
+        return self._url_rule
+
+    @url_rule.setter
+    def url_rule(self, rule):
+        self._url_rule = rule
+        sample = getattr(_current, "sample", None)
+        if sample is not None and rule is not None:
+            sample.route = rule.rule
+
+
+def _observe(histogram, buckets, value):
+    """Add one observation to a [per-bucket counts..., sum] list."""
+    histogram[bisect_left(buckets, value)] += 1
+    histogram[-1] += value
+
+
+class _TimedBody:
+    """Wraps a WSGI response iterable to time the send phase and count body bytes.
+
+    With `sent` already known from Content-Length, chunks are passed through
+    without counting.
+    """
+
+    __slots__ = ("metrics", "sample", "status", "iterable", "sent", "send_started")
+
+    def __init__(self, metrics, sample, status, iterable, sent=None):
+        self.metrics = metrics
+        self.sample = sample
+        self.status = status
+        self.iterable = iterable
+        self.sent = sent
+        self.send_started = time.perf_counter()
+
+    def __iter__(self):
+        if self.sent is not None:
+            return iter(self.iterable)
+        self.sent = 0
+        return self._counted()
+
+    def _counted(self):
+        for chunk in self.iterable:
+            self.sent += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            close = getattr(self.iterable, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self.metrics._finish(self.sample, self.status, self.sent or 0, self.send_started)
+
+
+class RequestMetrics:
+    """Per-route latency histograms, response sizes, status codes and in-flight requests.
+
+    `wrap(app)` installs a WSGI middleware that times each request in three phases:
+    handler (the view, minus JSON serialization), serialization (time spent in the
+    app's JSON provider, see TimedJSONProvider) and send (iterating the response body
+    out to the server). Requests are labelled with their URL rule if the app uses
+    RoutedRequest as its request class. Recording takes one lock per request; see
+    benchmarks/metrics_bench.py for what it costs.
+
+    File responses made with the server's wsgi.file_wrapper are returned as they
+    are, so the server can still send them with sendfile(); their send phase is
+    recorded when the server closes them.
+
+    With `directory` set, each process writes a snapshot there every `flush_interval`
+    seconds and render() merges the snapshots, so a scrape of any gunicorn worker
+    reports the whole server.
+
+    If `profile_slow_after` is set (seconds), a sampler thread records the stacks of
+    requests that have been running longer than that every `sample_interval` seconds
+    and keeps collapsed-stack counts per route, readable with render_profile().
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0, profile_slow_after=None,
+                 sample_interval=0.01):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.profile_slow_after = profile_slow_after
+        self.sample_interval = sample_interval
+        self._phases = {}
+        self._sizes = {}
+        self._statuses = {}
+        self._profile = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Recording
+
+    def wrap(self, wsgi_app):
+        def middleware(environ, start_response):
+            sample = _current.sample = _Request()
+            # A single dict store or pop is atomic, so only _finish() takes the lock.
+            self._in_flight[id(sample)] = sample
+            status = ["500", None]
+
+            def capture_status(status_line, headers, exc_info=None):
+                status[0] = status_line[:3]
+                for name, value in headers:
+                    if name.lower() == "content-length":
+                        status[1] = int(value)
+                return start_response(status_line, headers, exc_info)
+
+            try:
+                iterable = wsgi_app(environ, capture_status)
+            except BaseException:
+                self._finish(sample, "500", 0, time.perf_counter())
+                raise
+            file_wrapper = environ.get("wsgi.file_wrapper")
+            if isinstance(file_wrapper, type) and isinstance(iterable, file_wrapper):
+                return self._timed_file(sample, status[0], iterable, status[1] or 0)
+            return _TimedBody(self, sample, status[0], iterable, status[1])
+
+        return middleware
+
+    def _timed_file(self, sample, status, wrapper, size):
+        """Record `wrapper` when the server closes it, handing the server the same object."""
+        send_started = time.perf_counter()
+        close = getattr(wrapper, "close", None)
+
+        def close_and_record():
+            try:
+                if close is not None:
+                    close()
+            finally:
+                self._finish(sample, status, size, send_started)
+
+        wrapper.close = close_and_record
+        return wrapper
+
+    def _finish(self, sample, status, sent, send_started):
+        finished = time.perf_counter()
+        if getattr(_current, "sample", None) is sample:
+            _current.sample = None
+        handler = send_started - sample.started - sample.serialization
+        route = sample.route
+        self._in_flight.pop(id(sample), None)
+        with self._lock:
+            phases = self._phases.get(route)
+            if phases is None:
+                phases = self._phases[route] = [[0] * (len(LATENCY_BUCKETS) + 2) for _ in PHASES]
+                self._sizes[route] = [0] * (len(SIZE_BUCKETS) + 2)
+            _observe(phases[0], LATENCY_BUCKETS, handler)
+            _observe(phases[1], LATENCY_BUCKETS, sample.serialization)
+            _observe(phases[2], LATENCY_BUCKETS, finished - send_started)
+            _observe(self._sizes[route], SIZE_BUCKETS, sent)
+            key = (route, status)
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+        if sample.samples:
+            logger.warning("Slow request to %s took %.0fms (%d profile samples)",
+                           route, (finished - sample.started) * 1000, sample.samples)
+
+    # Sampling profiler
+
+    def _sample_slow_requests(self):
+        now = time.perf_counter()
+        slow = [sample for sample in list(self._in_flight.values())
+                if now - sample.started >= self.profile_slow_after]
+        if not slow:
+            return
+        frames = sys._current_frames()
+        for sample in slow:
+            frame = frames.get(sample.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            key = (sample.route, ";".join(reversed(stack)))
+            sample.samples += 1
+            with self._lock:
+                self._profile[key] = self._profile.get(key, 0) + 1
+
+    # Snapshots
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "phases": {route: [list(h) for h in phases] for route, phases in self._phases.items()},
+                "sizes": {route: list(h) for route, h in self._sizes.items()},
+                "statuses": [[route, status, count] for (route, status), count in self._statuses.items()],
+                "profile": [[route, stack, count] for (route, stack), count in self._profile.items()],
+                "in_flight": len(self._in_flight),
+            }
+
+    def flush(self):
+        """Write this process's snapshot to the shared directory."""
+        if self.directory is None:
+            return
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + ".tmp", path)
+
+    def _snapshots(self):
+        own = self.snapshot()
+        if self.directory is None:
+            return [own]
+        snapshots = [own]
+        own_name = f"{os.getpid()}.json"
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json") or name == own_name:
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            # Counters from exited workers still count; their in-flight requests do not.
+            if not _alive(int(name[:-5])):
+                snapshot["in_flight"] = 0
+            snapshots.append(snapshot)
+        return snapshots
+
+    def _merged(self):
+        phases, sizes, statuses, profile, in_flight = {}, {}, {}, {}, 0
+        for snapshot in self._snapshots():
+            for route, histograms in snapshot["phases"].items():
+                merged = phases.setdefault(route, [[0] * len(h) for h in histograms])
+                for total, histogram in zip(merged, histograms):
+                    total[:] = [a + b for a, b in zip(total, histogram)]
+            for route, histogram in snapshot["sizes"].items():
+                merged = sizes.setdefault(route, [0] * len(histogram))
+                merged[:] = [a + b for a, b in zip(merged, histogram)]
+            for route, status, count in snapshot["statuses"]:
+                statuses[route, status] = statuses.get((route, status), 0) + count
+            for route, stack, count in snapshot["profile"]:
+                profile[route, stack] = profile.get((route, stack), 0) + count
+            in_flight += snapshot["in_flight"]
+        return phases, sizes, statuses, profile, in_flight
+
+    # Export
+
+    def render(self):
+        """Return every metric in Prometheus text exposition format."""
+        phases, sizes, statuses, _, in_flight = self._merged()
+        lines = [
+            "# HELP newsblend_request_phase_seconds Request latency by route and phase.",
+            "# TYPE newsblend_request_phase_seconds histogram",
+        ]
+        for route in sorted(phases):
+            for phase, histogram in zip(PHASES, phases[route]):
+                _histogram_lines(lines, "newsblend_request_phase_seconds",
+                                 f'route="{_escape(route)}",phase="{phase}"', LATENCY_BUCKETS, histogram)
+        lines += [
+            "# HELP newsblend_response_bytes Response body size by route.",
+            "# TYPE newsblend_response_bytes histogram",
+        ]
+        for route in sorted(sizes):
+            _histogram_lines(lines, "newsblend_response_bytes", f'route="{_escape(route)}"',
+                             SIZE_BUCKETS, sizes[route])
+        lines += [
+            "# HELP newsblend_responses_total Responses by route and status code.",
+            "# TYPE newsblend_responses_total counter",
+        ]
+        for (route, status), count in sorted(statuses.items()):
+            lines.append(f'newsblend_responses_total{{route="{_escape(route)}",status="{status}"}} {count}')
+        lines += [
+            "# HELP newsblend_requests_in_flight Requests currently being handled.",
+            "# TYPE newsblend_requests_in_flight gauge",
+            f"newsblend_requests_in_flight {in_flight}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def render_profile(self):
+        """Return slow-request samples as collapsed stacks, one "route;frames count" per line."""
+        profile = self._merged()[3]
+        return "".join(f"{route};{stack} {count}\n"
+                       for (route, stack), count in sorted(profile.items(), key=lambda item: -item[1]))
+
+    # Background thread
+
+    def _run(self):
+        interval = self.sample_interval if self.profile_slow_after is not None else self.flush_interval
+        last_flush = time.monotonic()
+        while not self._stop.wait(interval):
+            try:
+                if self.profile_slow_after is not None:
+                    self._sample_slow_requests()
+                if time.monotonic() - last_flush >= self.flush_interval:
+                    last_flush = time.monotonic()
+                    self.flush()
+            except Exception:
+                logger.exception("Recording request metrics failed; retrying next interval")
+
+    def start(self):
+        if self._thread is None and (self.directory is not None or self.profile_slow_after is not None):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="request-metrics", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(lines, name, labels, buckets, histogram):
+    cumulative = 0
+    for bound, count in zip(buckets, histogram):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    count = cumulative + histogram[len(buckets)]
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram[-1]}")
+    lines.append(f"{name}_count{{{labels}}} {count}")
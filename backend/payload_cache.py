@@ -0,0 +1,213 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+
+from compression import encoded_body, negotiate
+
+# Clients may keep a copy but must revalidate; a matching ETag costs a 304 with no body.
+API_CACHE_CONTROL = "public, no-cache"
+
+
+class _Entry:
+    """One serialized body and what is known about it; bodies are never modified."""
+
+    __slots__ = ("version", "body", "etag", "tags", "expires", "encoded")
+
+    def __init__(self, version, body, etag, tags=frozenset(), expires=0.0):
+        self.version = version
+        self.body = body
+        self.etag = etag
+        self.tags = tags
+        self.expires = expires
+        # Compressed copies by coding, filled in as clients ask for them.
+        self.encoded = {}
+
+
+class _Fill:
+    """A body being built; other requests missing on the same key wait for it."""
+
+    __slots__ = ("done", "built", "entry")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.built = False
+        self.entry = None
+
+
+class PayloadCache:
+    """Serialized JSON bodies keyed by (route key, request context).
+
+    The context is whatever else the body depends on, such as the host base URL
+    embedded in image links. At most `max_entries` bodies are kept, least
+    recently used first out, and none is served more than `ttl` seconds after
+    it was built.
+
+    Each entry carries dependency tags such as "article:3" or "feed".
+    invalidate() drops exactly the entries carrying a changed tag and advances
+    the content version; everything else stays cached across versions. A request
+    pinned to a version (see snapshots.SnapshotStore) passes it to get() and is
+    only served bodies built at or before it, so it never sees content from a
+    later version. Bodies are only stored while their version is current.
+
+    A body whose tags are invalidated while it is being built is returned but
+    not stored, since it may predate the change.
+
+    Concurrent misses on the same key share one build: the first request builds
+    the body and the rest wait for it instead of all hitting storage at once.
+
+    Compressed copies of a body are made the first time a client asks for that
+    coding and kept with the entry, so each version is compressed once.
+    """
+
+    def __init__(self, max_entries=4096, ttl=300.0):
+        self.version = 1
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tagged = {}
+        self._fills = {}
+        # Tags invalidated while builds are running, with the invalidation count at the time.
+        self._invalidations = 0
+        self._dropped = {}
+        self._building = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def bump(self, version=None):
+        """Advance the content version and drop every body."""
+        with self._lock:
+            self.version = version if version is not None else self.version + 1
+            self._entries.clear()
+            self._tagged.clear()
+
+    def invalidate(self, tags, version=None):
+        """Drop the bodies carrying any of `tags`; `version` also becomes the current version."""
+        with self._lock:
+            if version is not None:
+                self.version = version
+            self._invalidations += 1
+            for tag in tags:
+                if self._building:
+                    self._dropped[tag] = self._invalidations
+                for slot in self._tagged.pop(tag, ()):
+                    self._drop(slot)
+
+    def _drop(self, slot):
+        entry = self._entries.pop(slot, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            slots = self._tagged.get(tag)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del self._tagged[tag]
+
+    def _store(self, slot, entry):
+        self._drop(slot)
+        self._entries[slot] = entry
+        for tag in entry.tags:
+            self._tagged.setdefault(tag, set()).add(slot)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def get(self, key, context, build, version=None, tags=()):
+        """Return the entry for the key, building it on a miss; None if build() is.
+
+        `tags` lists what the body depends on, or is a function of the built
+        payload returning them when that is only known afterwards.
+        """
+        slot = (key, context)
+        fill = leader = None
+        with self._lock:
+            if version is None:
+                version = self.version
+            entry = self._entries.get(slot)
+            if entry is not None and entry.version <= version and entry.expires > time.monotonic():
+                self._entries.move_to_end(slot)
+                return entry
+            if version == self.version:
+                fill = self._fills.get((slot, version))
+                if fill is None:
+                    fill = leader = self._fills[slot, version] = _Fill()
+
+        if fill is not None and leader is None:
+            fill.done.wait()
+            if fill.built:
+                return fill.entry
+            # The build failed; try again here rather than hand every waiter the error.
+
+        with self._lock:
+            self._building += 1
+            started = self._invalidations
+        try:
+            payload = build()
+            if payload is None:
+                entry = None
+            else:
+                body = current_app.json.dumps(payload).encode("utf-8") + b"\n"
+                depends_on = tags(payload) if callable(tags) else tags
+                entry = _Entry(version, body, hashlib.sha1(body).hexdigest(), frozenset(depends_on),
+                               time.monotonic() + self.ttl)
+                with self._lock:
+                    dropped = self._dropped
+                    if version == self.version and not any(dropped.get(tag, 0) > started for tag in entry.tags):
+                        self._store(slot, entry)
+            if leader is not None:
+                leader.entry, leader.built = entry, True
+            return entry
+        finally:
+            with self._lock:
+                self._building -= 1
+                if not self._building:
+                    self._dropped.clear()
+                if leader is not None:
+                    del self._fills[slot, version]
+            if leader is not None:
+                leader.done.set()
+
+
+payload_cache = PayloadCache()
+
+
+def conditional_json(key, build, status=200, context=None, vary=None, version=None, tags=()):
+    """Serve the cached body for `key`, or a 304 if the client already has it.
+
+    The body is sent compressed when the client accepts it and it is large
+    enough, from the copy cached with it.
+
+    `build` is only called on a cache miss; if it returns None so does this, and
+    the caller answers with its own 404. `context` defaults to the host base URL;
+    pass `vary` with the request headers that feed into it so shared caches key
+    on them too. `version` is the content version the request is pinned to and
+    `tags` what the body depends on, see PayloadCache.get.
+    """
+    if context is None:
+        context = request.host_url
+    entry = payload_cache.get(key, context, build, version, tags)
+    if entry is None:
+        return None
+    body, etag = entry.body, entry.etag
+    coding = negotiate(request.accept_encodings, len(body))
+    compressed = encoded_body(entry.encoded, body, coding) if coding else None
+    if compressed is not None:
+        # Each coding is its own representation, with its own validator.
+        body, etag = compressed, f"{etag}-{coding}"
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, status=status, mimetype=current_app.json.mimetype)
+    if compressed is not None:
+        response.headers["Content-Encoding"] = coding
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = API_CACHE_CONTROL
+    response.vary.add("Accept-Encoding")
+    if vary:
+        response.vary.add(vary)
+    return response
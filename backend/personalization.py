@@ -0,0 +1,238 @@
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+
+from search_index import tokenize
+from storage import parse_posted_date
+
+logger = logging.getLogger(__name__)
+
+# How much one event of each kind says about a user's interests. An unsave says nothing
+# itself; it cancels the user's earlier saves of that article.
+EVENT_WEIGHTS = {"read": 1.0, "vote": 2.0, "save": 3.0, "unsave": 0.0}
+
+_DF_BUCKETS = 1 << 20
+_SIGN_BIT = np.uint64(1 << 40)
+_DIM_SHIFT = np.uint64(20)
+
+
+def _token_hashes(article):
+    text = " ".join([article.get("title", ""), article.get("subtitle", ""), *article.get("content", [])])
+    return np.fromiter(map(hash, tokenize(text)), dtype=np.int64).view(np.uint64)
+
+
+class ArticleVectors:
+    """TF-IDF vectors for every article in one float32 matrix, ranked against user profiles.
+
+    Tokens are hashed into `dims` signed buckets (the hashing trick), so the matrix
+    has a fixed width and no vocabulary has to be kept. Document frequencies are
+    counted per token hash and grow as articles arrive; a new batch is weighted with
+    the IDF of the corpus at that point and earlier rows are left as they are.
+    Rows are L2-normalized, so a profile's dot product with a row is its cosine
+    similarity.
+
+    rank() scores the whole corpus with one matrix-vector product and picks the top
+    results with argpartition. Recency decays exponentially with `half_life`
+    seconds: a score is log(similarity) + age in half-lives * log(2), which ranks
+    the same as similarity * 0.5 ** age without overflowing for old articles.
+    """
+
+    def __init__(self, dims=128, half_life=48 * 3600.0):
+        self.dims = dims
+        self.half_life = half_life
+        self._df = np.zeros(_DF_BUCKETS, dtype=np.int32)
+        self._documents = 0
+        self._matrix = np.zeros((1024, dims), dtype=np.float32)
+        self._recency = np.zeros(1024, dtype=np.float64)
+        self._epoch = None
+        self._ids = []
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _vectorize(self, articles):
+        """Return a (len(articles), dims) float32 array of normalized TF-IDF rows."""
+        hashes = [np.unique(_token_hashes(article), return_counts=True) for article in articles]
+        tokens = np.concatenate([h for h, _ in hashes] or [np.zeros(0, dtype=np.uint64)])
+        counts = np.concatenate([c for _, c in hashes] or [np.zeros(0, dtype=np.int64)])
+        rows = np.repeat(np.arange(len(articles)), [len(h) for h, _ in hashes])
+
+        buckets = (tokens % np.uint64(_DF_BUCKETS)).astype(np.int64)
+        with self._lock:
+            self._df += np.bincount(buckets, minlength=_DF_BUCKETS).astype(np.int32)
+            self._documents += len(articles)
+            idf = np.log((1 + self._documents) / (1 + self._df[buckets])) + 1
+
+        weights = (1 + np.log(counts)) * idf
+        weights[(tokens & _SIGN_BIT) != 0] *= -1
+        columns = ((tokens >> _DIM_SHIFT) % np.uint64(self.dims)).astype(np.int64)
+        vectors = np.bincount(rows * self.dims + columns, weights=weights,
+                              minlength=len(articles) * self.dims).reshape(len(articles), self.dims)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return (vectors / norms).astype(np.float32)
+
+    def _published(self, article):
+        published = parse_posted_date(article.get("date"))
+        return published.timestamp() if published is not None else None
+
+    def add_many(self, items):
+        """Add or replace the vectors for [(article id, article), ...]."""
+        if not items:
+            return
+        vectors = self._vectorize([article for _, article in items])
+        published = [self._published(article) for _, article in items]
+
+        with self._lock:
+            if self._epoch is None:
+                self._epoch = min((p for p in published if p is not None), default=time.time())
+            needed = len(self._ids) + len(items)
+            if needed > len(self._matrix):
+                size = max(needed, 2 * len(self._matrix))
+                matrix = np.zeros((size, self.dims), dtype=np.float32)
+                matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+                recency = np.zeros(size, dtype=np.float64)
+                recency[:len(self._ids)] = self._recency[:len(self._ids)]
+                # Readers holding the old arrays keep a consistent view.
+                self._matrix, self._recency = matrix, recency
+            for (article_id, _), vector, when in zip(items, vectors, published):
+                position = self._index.get(article_id)
+                if position is None:
+                    position = len(self._ids)
+                    self._ids.append(article_id)
+                    self._index[article_id] = position
+                self._matrix[position] = vector
+                # Undated articles rank as if published at the epoch.
+                self._recency[position] = ((when - self._epoch if when is not None else 0.0)
+                                           / self.half_life * math.log(2))
+
+    def add(self, article_id, article):
+        self.add_many([(article_id, article)])
+
+    def profile(self, events):
+        """Build a unit interest vector from [(article id, kind), ...], or None if nothing matched.
+
+        Events are newest first, so an unsave drops the saves of that article before it.
+        """
+        positions, weights, unsaved = [], [], set()
+        for article_id, kind in events:
+            if kind == "unsave":
+                unsaved.add(article_id)
+                continue
+            if kind == "save" and article_id in unsaved:
+                continue
+            position = self._index.get(article_id)
+            if position is not None:
+                positions.append(position)
+                weights.append(EVENT_WEIGHTS.get(kind, 1.0))
+        if not positions:
+            return None
+        vector = np.asarray(weights, dtype=np.float32) @ self._matrix[positions]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def rank(self, profile, exclude=(), limit=20):
+        """Return [(article id, score), ...] for the best `limit` articles, best first.
+
+        Without a profile articles are ranked by recency alone.
+        """
+        with self._lock:
+            count = len(self._ids)
+            matrix, recency, ids = self._matrix, self._recency, self._ids
+        if not count:
+            return []
+        if profile is None:
+            scores = recency[:count].copy()
+        else:
+            similarity = matrix[:count] @ profile
+            np.maximum(similarity, 1e-6, out=similarity)
+            scores = np.log(similarity, dtype=np.float64)
+            scores += recency[:count]
+        excluded = [self._index[article_id] for article_id in exclude if article_id in self._index]
+        scores[excluded] = -np.inf
+        limit = min(limit, count)
+        top = np.argpartition(scores, count - limit)[count - limit:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(ids[position], float(scores[position])) for position in top
+                if scores[position] != -np.inf]
+
+
+class UserActivity:
+    """Reads, votes and saves per user, persisted write-behind like poll votes.
+
+    record() only appends to a pending list; a background thread writes pending
+    events to the repository in one batch every `flush_interval` seconds. events()
+    merges what is stored with what is still pending. Events accepted since the
+    last flush are lost if the process dies.
+    """
+
+    def __init__(self, repository, flush_interval=1.0, history=200):
+        self.repository = repository
+        self.flush_interval = flush_interval
+        self.history = history
+        self._pending = []
+        self._in_flight = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, user_id, article_id, kind):
+        if kind not in EVENT_WEIGHTS:
+            raise ValueError(f"Unknown event kind: {kind}")
+        with self._lock:
+            self._pending.append((user_id, article_id, kind, int(time.time())))
+
+    def events(self, user_id):
+        """Return the user's latest [(article id, kind), ...], newest first."""
+        with self._lock:
+            unsaved = [event for event in self._in_flight + self._pending if event[0] == user_id]
+        stored = self.repository.get_user_events(user_id, self.history)
+        events = [(article_id, kind) for _, article_id, kind, _ in reversed(unsaved)]
+        events += [(article_id, kind) for article_id, kind, _ in stored]
+        return events[:self.history]
+
+    def flush(self):
+        """Write every pending event to the repository in one batch."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._in_flight = batch
+            if not batch:
+                return 0
+            try:
+                self.repository.add_user_events(batch)
+            except Exception:
+                # Put the batch back so the next flush retries it.
+                with self._lock:
+                    self._pending[:0] = batch
+                    self._in_flight = []
+                raise
+            with self._lock:
+                self._in_flight = []
+            return len(batch)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing user activity failed; retrying next interval")
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="user-activity-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
@@ -0,0 +1,232 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PollNotFound(KeyError):
+    pass
+
+
+class InvalidOption(ValueError):
+    pass
+
+
+class AlreadyVoted(ValueError):
+    pass
+
+
+def percentages(counts):
+    total = sum(counts)
+    if not total:
+        return [0] * len(counts)
+    return [round(100 * count / total) for count in counts]
+
+
+class _Shard:
+    __slots__ = ("lock", "deltas", "pending")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deltas = {}
+        self.pending = []
+
+
+class _Poll:
+    __slots__ = ("definition", "article_id", "option_count", "base", "voters", "loaded_at")
+
+    def __init__(self, definition, base, voters):
+        self.definition = definition
+        self.article_id = definition["article_id"]
+        self.option_count = len(definition["options"])
+        self.base = base
+        self.voters = voters
+        self.loaded_at = time.monotonic()
+
+
+class PollVotes:
+    """Live poll vote counts with write-behind persistence.
+
+    A vote lands in one of `shards` small lock-protected buckets (picked by poll and
+    user, so a user's duplicate check and increment share one lock) and is written to
+    the repository in batches every `flush_interval` seconds. Live counts are the
+    persisted base plus whatever is still pending. Bases are re-read from storage
+    every `refresh_after` seconds to pick up votes flushed by other processes; the
+    repository's unique voter key is the final dedup across processes. Questions,
+    options and each article's poll id are kept too, so serving a poll needs no
+    query beyond those refreshes.
+
+    Subscribers are called with a poll id whenever that poll's displayed
+    percentages may have moved: after a vote that moves them, and after a flush
+    or refresh changes the stored counts.
+
+    Votes accepted since the last flush are lost if the process dies.
+    """
+
+    def __init__(self, repository, shards=16, flush_interval=1.0, refresh_after=5.0):
+        self.repository = repository
+        self.flush_interval = flush_interval
+        self.refresh_after = refresh_after
+        self._shards = [_Shard() for _ in range(shards)]
+        self._polls = {}
+        self._poll_ids = {}
+        self._in_flight = {}
+        self._subscribers = []
+        self._polls_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _load(self, poll_id):
+        poll = self.repository.get_poll(poll_id)
+        if poll is None:
+            return None
+        votes = self.repository.get_poll_votes(poll_id)
+        base = [votes.get(option, 0) for option in range(len(poll["options"]))]
+        return _Poll(poll, base, self.repository.get_poll_voters(poll_id))
+
+    def _poll(self, poll_id):
+        poll = self._polls.get(poll_id)
+        if poll is None:
+            loaded = self._load(poll_id)
+            if loaded is None:
+                return None
+            with self._polls_lock:
+                poll = self._polls.setdefault(poll_id, loaded)
+        elif time.monotonic() - poll.loaded_at > self.refresh_after:
+            self._refresh(poll_id, poll)
+        return poll
+
+    def _refresh(self, poll_id, poll):
+        with self._flush_lock:
+            votes = self.repository.get_poll_votes(poll_id)
+            base = [votes.get(option, 0) for option in range(poll.option_count)]
+            changed, poll.base = base != poll.base, base
+            poll.voters |= self.repository.get_poll_voters(poll_id)
+            poll.loaded_at = time.monotonic()
+        if changed:
+            self._notify(poll_id)
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def _notify(self, poll_id):
+        for callback in self._subscribers:
+            callback(poll_id)
+
+    def article_id(self, poll_id):
+        """Return the id of the article the poll belongs to, or None if it does not exist."""
+        poll = self._poll(poll_id)
+        return poll.article_id if poll is not None else None
+
+    def definition(self, poll_id):
+        """Return the poll's stored {article_id, question, options}, or None if it does not exist."""
+        poll = self._poll(poll_id)
+        return poll.definition if poll is not None else None
+
+    def poll_id_for(self, article_id):
+        """Return the id of the article's poll, or None; re-read every `refresh_after` seconds."""
+        entry = self._poll_ids.get(article_id)
+        now = time.monotonic()
+        if entry is None or now - entry[1] > self.refresh_after:
+            entry = self._poll_ids[article_id] = (self.repository.get_poll_id_for_article(article_id), now)
+        return entry[0]
+
+    def forget(self, poll_id):
+        """Drop cached state for a poll whose options changed in storage."""
+        with self._polls_lock:
+            self._polls.pop(poll_id, None)
+
+    def vote(self, poll_id, user_id, option):
+        """Record one vote and return the poll's live counts."""
+        poll = self._poll(poll_id)
+        if poll is None:
+            raise PollNotFound(poll_id)
+        if not 0 <= option < poll.option_count:
+            raise InvalidOption(option)
+
+        shard = self._shards[hash((poll_id, user_id)) % len(self._shards)]
+        with shard.lock:
+            if user_id in poll.voters:
+                raise AlreadyVoted(user_id)
+            poll.voters.add(user_id)
+            key = (poll_id, option)
+            shard.deltas[key] = shard.deltas.get(key, 0) + 1
+            shard.pending.append((poll_id, user_id, option))
+        counts = self.counts(poll_id)
+        before = list(counts)
+        before[option] -= 1
+        if percentages(before) != percentages(counts):
+            self._notify(poll_id)
+        return counts
+
+    def counts(self, poll_id):
+        """Return live vote counts per option, or None if the poll does not exist."""
+        poll = self._poll(poll_id)
+        if poll is None:
+            return None
+        counts = list(poll.base)
+        for source in [self._in_flight] + [shard.deltas for shard in self._shards]:
+            for option in range(poll.option_count):
+                counts[option] += source.get((poll_id, option), 0)
+        return counts
+
+    def flush(self):
+        """Write every pending vote to the repository in one batch."""
+        with self._flush_lock:
+            batch = []
+            in_flight = self._in_flight = {}
+            for shard in self._shards:
+                with shard.lock:
+                    if not shard.pending:
+                        continue
+                    batch.extend(shard.pending)
+                    for key, delta in shard.deltas.items():
+                        in_flight[key] = in_flight.get(key, 0) + delta
+                    shard.pending, shard.deltas = [], {}
+            if not batch:
+                return 0
+            try:
+                accepted = self.repository.record_votes(batch)
+            except Exception:
+                # Put the batch back so the next flush retries it.
+                for vote in batch:
+                    poll_id, user_id, option = vote
+                    shard = self._shards[hash((poll_id, user_id)) % len(self._shards)]
+                    with shard.lock:
+                        shard.pending.append(vote)
+                        shard.deltas[poll_id, option] = shard.deltas.get((poll_id, option), 0) + 1
+                self._in_flight = {}
+                raise
+            for (poll_id, option), count in accepted.items():
+                poll = self._polls.get(poll_id)
+                if poll is not None:
+                    poll.base[option] += count
+            # Storage turned away votes another process had already counted for the same user.
+            rejected = {poll_id for (poll_id, option), count in in_flight.items()
+                        if accepted.get((poll_id, option), 0) != count}
+            self._in_flight = {}
+        for poll_id in rejected:
+            self._notify(poll_id)
+        return len(batch)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing poll votes failed; retrying next interval")
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="poll-vote-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
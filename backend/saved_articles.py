@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+
+from bitmap import Bitmap
+
+
+class _Saved:
+    __slots__ = ("bitmap", "loaded_at")
+
+    def __init__(self, bitmap):
+        self.bitmap = bitmap
+        self.loaded_at = time.monotonic()
+
+
+class SavedArticles:
+    """Each user's saved articles as a Bitmap over article seq numbers.
+
+    Seq numbers are dense ordinals assigned as articles are stored, so a user's
+    set costs a few bytes per saved article rather than a set of id strings, and
+    "which of these articles are saved" is a few membership probes. Saves are
+    written through to the repository, which stays the source of truth; a
+    user's bitmap is loaded on first use, re-read after `refresh_after` seconds
+    to pick up saves made through other processes, and the least recently used
+    users beyond `max_users` are dropped.
+    """
+
+    def __init__(self, repository, refresh_after=5.0, max_users=1_000_000):
+        self.repository = repository
+        self.refresh_after = refresh_after
+        self.max_users = max_users
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bitmap(self, user_id):
+        with self._lock:
+            saved = self._users.get(user_id)
+            if saved is not None and time.monotonic() - saved.loaded_at <= self.refresh_after:
+                self._users.move_to_end(user_id)
+                return saved.bitmap
+        bitmap = Bitmap(self.repository.get_saved_seqs(user_id))
+        with self._lock:
+            self._users[user_id] = _Saved(bitmap)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return bitmap
+
+    def save(self, user_id, seq):
+        self.repository.add_saved_article(user_id, seq, int(time.time()))
+        bitmap = self._bitmap(user_id)
+        with self._lock:
+            bitmap.add(seq)
+
+    def unsave(self, user_id, seq):
+        self.repository.remove_saved_article(user_id, seq)
+        bitmap = self._bitmap(user_id)
+        with self._lock:
+            bitmap.discard(seq)
+
+    def is_saved(self, user_id, seq):
+        bitmap = self._bitmap(user_id)
+        with self._lock:
+            return seq in bitmap
+
+    def saved_among(self, user_id, seqs):
+        """Return the set of `seqs` the user has saved."""
+        bitmap = self._bitmap(user_id)
+        with self._lock:
+            return bitmap.among(seqs)
+
+    def saved(self, user_id):
+        """Return the user's saved seq numbers, newest article first."""
+        bitmap = self._bitmap(user_id)
+        with self._lock:
+            return sorted(bitmap, reverse=True)
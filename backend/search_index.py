@@ -0,0 +1,246 @@
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+
+from feed import normalize_category, normalize_source
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Very common words match nearly every article; leaving them out keeps posting lists short.
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+""".split())
+
+# Repeating a field's tokens is a cheap way to weight it in BM25 term frequency.
+FIELD_WEIGHTS = (("title", 3), ("subtitle", 2))
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    """In-memory inverted index over article titles, subtitles and content, ranked with BM25.
+
+    The last query token also matches as a prefix so partially typed words still hit.
+    Documents can be added, replaced or removed one at a time.
+
+    Work per query is bounded whatever the corpus size:
+
+    - Terms that appear in more than `champion_size` documents only nominate
+      candidates from their highest-impact postings (a champion list: tf
+      normalized by document length, as BM25 weighs it). Every candidate is
+      then scored exactly, over all query terms. When the champions cannot
+      fill the page (a deep offset, or a facet filter that rejects most of
+      them), every posting is nominated instead.
+    - The last token expands to at most `max_expansions` terms, and to no more
+      than `max_prefix_postings` postings between them.
+    - Terms nominate best first, each down its list by falling impact, and stop
+      once no document not yet seen could reach the current top
+      `offset + limit`.
+
+    Without a facet filter `total` counts at least every document of the most
+    common term; with one it is a lower bound.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, max_expansions=16, prefix_weight=0.5,
+                 champion_size=256, max_prefix_postings=1024):
+        self.k1 = k1
+        self.b = b
+        self.max_expansions = max_expansions
+        self.prefix_weight = prefix_weight
+        self.champion_size = champion_size
+        self.max_prefix_postings = max_prefix_postings
+        self._postings = {}
+        self._champions = {}
+        self._terms = []
+        self._doc_terms = {}
+        self._doc_len = {}
+        self._doc_facets = {}
+        self._total_len = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def add(self, doc_id, article):
+        tokens = []
+        for field, weight in FIELD_WEIGHTS:
+            tokens.extend(tokenize(article.get(field, "")) * weight)
+        for paragraph in article.get("content", []):
+            tokens.extend(tokenize(paragraph))
+        counts = Counter(tokens)
+
+        with self._lock:
+            self._remove(doc_id)
+            length = len(tokens)
+            norm = self._norm(length, (self._total_len + length) / (len(self._doc_len) + 1))
+            for term, tf in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    insort(self._terms, term)
+                postings[doc_id] = tf
+                champions = self._champions.get(term)
+                if champions is not None and tf / (tf + norm) > champions[0][0]:
+                    heapq.heapreplace(champions, (tf / (tf + norm), doc_id))
+            self._doc_terms[doc_id] = tuple(counts)
+            self._doc_len[doc_id] = length
+            self._doc_facets[doc_id] = (normalize_category(article.get("category")),
+                                        normalize_source(article.get("source")))
+            self._total_len += length
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            champions = self._champions.get(term)
+            if champions is not None and any(champion == doc_id for _, champion in champions):
+                del self._champions[term]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+        self._total_len -= self._doc_len.pop(doc_id)
+        del self._doc_facets[doc_id]
+
+    def _norm(self, length, avg_len):
+        return self.k1 * (1 - self.b + self.b * length / avg_len)
+
+    def _candidates(self, term, postings, avg_len):
+        """Return the documents `term` nominates: all of them, or its champion list if common."""
+        if len(postings) <= self.champion_size:
+            return postings
+        champions = self._champions.get(term)
+        if champions is None:
+            doc_len = self._doc_len
+            champions = heapq.nlargest(
+                self.champion_size,
+                ((tf / (tf + self._norm(doc_len[doc_id], avg_len)), doc_id) for doc_id, tf in postings.items()))
+            heapq.heapify(champions)
+            self._champions[term] = champions
+        return [doc_id for _, doc_id in champions]
+
+    def _expand(self, token):
+        expanded = {token: 1.0} if token in self._postings else {}
+        budget = self.max_prefix_postings
+        start = bisect_left(self._terms, token)
+        for term in self._terms[start:start + self.max_expansions]:
+            if not term.startswith(token):
+                break
+            if term in expanded:
+                continue
+            budget -= min(len(self._postings[term]), self.champion_size)
+            if budget < 0:
+                break
+            expanded[term] = self.prefix_weight
+        return expanded
+
+    def search(self, query, category=None, source=None, limit=20, offset=0):
+        """Return (total hits, [(doc_id, score), ...]) for one page of ranked results."""
+        # The last word may still be mid-typing, so it is kept even if it is a stopword.
+        words = TOKEN_RE.findall(query.lower())
+        if not words:
+            return 0, []
+        tokens = [word for word in words[:-1] if word not in STOPWORDS] + words[-1:]
+        category = normalize_category(category)
+        source = normalize_source(source)
+
+        with self._lock:
+            accepts = None
+            if category or source:
+                facets = self._doc_facets
+
+                def accepts(doc_id):
+                    return ((not category or facets[doc_id][0] == category)
+                            and (not source or facets[doc_id][1] == source))
+            total, scores = self._score(tokens, offset + limit, accepts)
+
+        top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: item[1])
+        return total, top[offset:]
+
+    def _score(self, tokens, k, accepts=None):
+        """Return (a lower bound on the matches, {doc_id: score} covering the top `k`)."""
+        weighted_terms = {}
+        for token in tokens[:-1]:
+            if token in self._postings:
+                weighted_terms[token] = 1.0
+        for term, weight in self._expand(tokens[-1]).items():
+            weighted_terms[term] = max(weighted_terms.get(term, 0.0), weight)
+
+        n_docs = len(self._doc_len)
+        if not n_docs or not weighted_terms:
+            return 0, {}
+        avg_len = self._total_len / n_docs
+        terms = []
+        for term, weight in weighted_terms.items():
+            postings = self._postings[term]
+            df = len(postings)
+            idf = weight * math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            terms.append((term, idf * (self.k1 + 1), postings))
+
+        scores = self._rank([(idf_k1, postings, self._candidates(term, postings, avg_len))
+                             for term, idf_k1, postings in terms], k, accepts, avg_len)
+        if len(scores) < k and any(len(postings) > self.champion_size for _, _, postings in terms):
+            # The champion lists ran out before the page did: a deep offset, or a facet
+            # filter that turned most of them away. Nominate from every posting instead.
+            scores = self._rank([(idf_k1, postings, postings) for _, idf_k1, postings in terms],
+                                k, accepts, avg_len)
+
+        if accepts is not None:
+            return len(scores), scores
+        # Every document of the most common term matches, scored or not.
+        return max(len(scores), max(len(postings) for _, _, postings in terms)), scores
+
+    def _rank(self, terms, k, accepts, avg_len):
+        """Score the documents [(idf * (k1 + 1), postings, candidates), ...] nominate for the top `k`."""
+        doc_len = self._doc_len
+        norm = self._norm
+
+        def contribution(doc_id, idf_k1, postings):
+            tf = postings.get(doc_id)
+            if tf is None:
+                return 0.0
+            return idf_k1 * tf / (tf + norm(doc_len[doc_id], avg_len))
+
+        # Each term nominates its documents by falling contribution. A document no term
+        # has nominated yet scores at most its contribution from this term, plus the
+        # best any later term can give, plus what each earlier term's unvisited
+        # documents could still get from it. Once that is below the k-th best score so
+        # far, the rest of this term's documents cannot make the page either.
+        ranked = []
+        for idf_k1, postings, candidates in terms:
+            ranked.append(sorted(((contribution(doc_id, idf_k1, postings), doc_id) for doc_id in candidates),
+                                 reverse=True))
+        order = sorted(range(len(terms)), key=lambda i: ranked[i][0][0], reverse=True)
+        remaining = sum(ranked[i][0][0] for i in order)
+        scores = {}
+        top = []
+        for i in order:
+            remaining -= ranked[i][0][0]
+            # Documents outside a champion list contribute no more than its weakest member.
+            unvisited = ranked[i][-1][0] if len(ranked[i]) < len(terms[i][1]) else 0.0
+            for best, doc_id in ranked[i]:
+                threshold = top[0] if len(top) >= k else 0.0
+                if best + remaining < threshold:
+                    unvisited = best
+                    break
+                if doc_id in scores or (accepts is not None and not accepts(doc_id)):
+                    continue
+                score = scores[doc_id] = sum(contribution(doc_id, idf_k1, postings)
+                                             for idf_k1, postings, _ in terms)
+                if len(top) < k:
+                    heapq.heappush(top, score)
+                elif score > top[0]:
+                    heapq.heapreplace(top, score)
+            remaining += unvisited
+        return scores
@@ -0,0 +1,81 @@
+import threading
+import weakref
+from bisect import bisect_right
+
+
+class ContentSnapshot:
+    """One published version of the content the read path serves; never modified.
+
+    Holds the publish-time index behind /latest, the ranked breaking stories and
+    the first page of the featured feed for each category, already resolved to
+    (id, article, story sources) so serving it needs no queries.
+    """
+
+    __slots__ = ("version", "times", "ids", "breaking_stories", "featured_pages", "__weakref__")
+
+    def __init__(self, version, times=(), ids=(), breaking_stories=(), featured_pages=None):
+        self.version = version
+        self.times = times
+        self.ids = ids
+        self.breaking_stories = breaking_stories
+        self.featured_pages = featured_pages or {}
+
+    def latest(self, since=None, limit=20):
+        """Return ids published after `since` (seconds since the epoch), newest first."""
+        start = bisect_right(self.times, since) if since is not None else 0
+        start = max(start, len(self.ids) - limit)
+        return list(reversed(self.ids[start:]))
+
+    def latest_since(self, since):
+        """Return the `since` that latest() treats the same: the newest publish time not after it.
+
+        Every `since` between two publish times selects the same ids, so callers can
+        key on this instead of the raw value. None means no article is that old.
+        """
+        if since is None:
+            return None
+        start = bisect_right(self.times, since)
+        return self.times[start - 1] if start else None
+
+    def breaking(self, limit=10):
+        """Return [(story id, score), ...] for the top `limit` stories, best first."""
+        return list(self.breaking_stories[:limit])
+
+    def featured(self, category, limit):
+        """Return (items, next `after`) for a precomputed first page, or None if it is not held."""
+        page = self.featured_pages.get(category)
+        if page is None:
+            return None
+        items, after = page
+        if limit > len(items):
+            # A short page is the whole feed; a full one may continue past what is held.
+            return (items, None) if after is None else None
+        return items[:limit], (None if limit == len(items) and after is None else items[limit - 1][1])
+
+
+class SnapshotStore:
+    """The current ContentSnapshot, replaced whole by writers and read without locks.
+
+    A request reads `current` once and keeps that object for its lifetime, so it
+    sees one consistent version even if a writer publishes mid-request. update()
+    builds the next version from a callback while holding a writer-only lock,
+    then publishes it with a single reference assignment. Earlier versions are
+    freed as soon as the last request holding one finishes; live_versions()
+    reports which are still around.
+    """
+
+    def __init__(self):
+        self.current = ContentSnapshot(0)
+        self._write_lock = threading.Lock()
+        self._published = weakref.WeakSet()
+
+    def update(self, build):
+        """Publish build(next version) and return it."""
+        with self._write_lock:
+            snapshot = build(self.current.version + 1)
+            self._published.add(snapshot)
+            self.current = snapshot
+            return snapshot
+
+    def live_versions(self):
+        return sorted(snapshot.version for snapshot in list(self._published))
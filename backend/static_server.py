@@ -0,0 +1,130 @@
+import mimetypes
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from flask import Response, abort, request
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+
+
+class _Asset:
+    __slots__ = ("path", "size", "mtime", "etag", "mimetype", "body", "cost", "checked_at")
+
+    def __init__(self, path, stat, body=None):
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.etag = f"{int(stat.st_mtime_ns):x}-{stat.st_size:x}"
+        if body is not None:
+            self.etag += f"-{zlib.adler32(body):x}"
+        self.mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.body = body
+        self.cost = len(body) if body is not None else 0
+        self.checked_at = time.monotonic()
+
+
+class StaticServer:
+    """Serves files under `root` with conditional GET and byte ranges.
+
+    Files up to `small_file_limit` bytes are kept in a bounded LRU together with their
+    ETag and Last-Modified, so hot assets like publisher logos never touch the disk.
+    Larger files only have their metadata cached and are streamed through the
+    server's wsgi.file_wrapper, which lets servers such as gunicorn use sendfile(2).
+    Cached entries are re-stat'ed at most every `revalidate_after` seconds; paths
+    under an immutable prefix never are.
+    """
+
+    def __init__(self, root, small_file_limit=256 * 1024, max_bytes=64 * 1024 * 1024,
+                 max_entries=4096, revalidate_after=5.0, immutable_prefixes=(),
+                 cache_control="public, max-age=3600", immutable_cache_control=None):
+        self.root = root
+        self.small_file_limit = small_file_limit
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.revalidate_after = revalidate_after
+        self.immutable_prefixes = tuple(immutable_prefixes)
+        self.cache_control = cache_control
+        self.immutable_cache_control = immutable_cache_control or cache_control
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def _is_immutable(self, filename):
+        return filename.startswith(self.immutable_prefixes)
+
+    def _lookup(self, filename):
+        with self._lock:
+            asset = self._cache.get(filename)
+            if asset is not None:
+                self._cache.move_to_end(filename)
+        if asset is None:
+            return None
+        if self._is_immutable(filename) or time.monotonic() - asset.checked_at < self.revalidate_after:
+            return asset
+        try:
+            stat = os.stat(asset.path)
+        except OSError:
+            self._evict(filename)
+            return None
+        if stat.st_mtime != asset.mtime or stat.st_size != asset.size:
+            self._evict(filename)
+            return None
+        asset.checked_at = time.monotonic()
+        return asset
+
+    def _evict(self, filename):
+        with self._lock:
+            asset = self._cache.pop(filename, None)
+            if asset is not None:
+                self._cached_bytes -= asset.cost
+
+    def _store(self, filename, asset):
+        with self._lock:
+            old = self._cache.pop(filename, None)
+            if old is not None:
+                self._cached_bytes -= old.cost
+            self._cache[filename] = asset
+            self._cached_bytes += asset.cost
+            while self._cache and (self._cached_bytes > self.max_bytes
+                                   or len(self._cache) > self.max_entries):
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= evicted.cost
+
+    def _load(self, filename):
+        path = safe_join(self.root, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        body = None
+        if stat.st_size <= self.small_file_limit:
+            with open(path, "rb") as f:
+                body = f.read()
+        asset = _Asset(path, stat, body)
+        self._store(filename, asset)
+        return asset
+
+    def serve(self, filename):
+        asset = self._lookup(filename)
+        if asset is None:
+            asset = self._load(filename)
+            if asset is None:
+                abort(404)
+
+        if asset.body is not None:
+            response = Response(asset.body, mimetype=asset.mimetype)
+        else:
+            try:
+                f = open(asset.path, "rb")
+            except OSError:
+                abort(404)
+            response = Response(wrap_file(request.environ, f), mimetype=asset.mimetype,
+                                direct_passthrough=True)
+            response.content_length = asset.size
+        response.set_etag(asset.etag)
+        response.last_modified = asset.mtime
+        response.headers["Cache-Control"] = (
+            self.immutable_cache_control if self._is_immutable(filename) else self.cache_control)
+        return response.make_conditional(request, accept_ranges=True, complete_length=asset.size)
@@ -0,0 +1,490 @@
+import json
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from feed import normalize_category, normalize_source
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    subtitle TEXT NOT NULL,
+    category TEXT NOT NULL,
+    category_key TEXT NOT NULL,
+    source TEXT NOT NULL,
+    source_key TEXT NOT NULL,
+    date TEXT NOT NULL,
+    published_at INTEGER,
+    image TEXT NOT NULL,
+    logo TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_category ON articles (category_key, seq);
+CREATE INDEX IF NOT EXISTS articles_source ON articles (source_key, seq);
+CREATE INDEX IF NOT EXISTS articles_category_source ON articles (category_key, source_key, seq);
+CREATE INDEX IF NOT EXISTS articles_published_at ON articles (published_at);
+
+CREATE TABLE IF NOT EXISTS polls (
+    id TEXT PRIMARY KEY,
+    article_id TEXT NOT NULL REFERENCES articles (id),
+    question TEXT NOT NULL,
+    options TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS polls_article ON polls (article_id);
+
+CREATE TABLE IF NOT EXISTS poll_votes (
+    poll_id TEXT NOT NULL REFERENCES polls (id),
+    option INTEGER NOT NULL,
+    votes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (poll_id, option)
+);
+
+CREATE TABLE IF NOT EXISTS poll_voters (
+    poll_id TEXT NOT NULL REFERENCES polls (id),
+    user_id TEXT NOT NULL,
+    option INTEGER NOT NULL,
+    PRIMARY KEY (poll_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    article_id TEXT NOT NULL REFERENCES articles (id),
+    user TEXT NOT NULL,
+    comment TEXT NOT NULL,
+    likes INTEGER NOT NULL DEFAULT 0,
+    dislikes INTEGER NOT NULL DEFAULT 0,
+    replies INTEGER NOT NULL DEFAULT 0,
+    parent_id INTEGER REFERENCES comments (id),
+    created_at INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS comments_article ON comments (article_id, id);
+
+CREATE TABLE IF NOT EXISTS user_events (
+    user_id TEXT NOT NULL,
+    article_id TEXT NOT NULL REFERENCES articles (id),
+    kind TEXT NOT NULL,
+    created_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS user_events_user ON user_events (user_id, created_at);
+
+CREATE TABLE IF NOT EXISTS saved_articles (
+    user_id TEXT NOT NULL,
+    article_seq INTEGER NOT NULL REFERENCES articles (seq),
+    saved_at INTEGER NOT NULL,
+    PRIMARY KEY (user_id, article_seq)
+) WITHOUT ROWID;
+"""
+
+# Columns added after the first release, for databases created before them.
+MIGRATIONS = {
+    "comments": {
+        "parent_id": "INTEGER REFERENCES comments (id)",
+        "created_at": "INTEGER NOT NULL DEFAULT 0",
+    },
+}
+
+ARTICLE_COLUMNS = "seq, id, title, subtitle, category, source, date, image, logo, content"
+
+UPSERT_ARTICLE = """
+INSERT INTO articles (id, title, subtitle, category, category_key, source, source_key,
+                      date, published_at, image, logo, content)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    title = excluded.title, subtitle = excluded.subtitle,
+    category = excluded.category, category_key = excluded.category_key,
+    source = excluded.source, source_key = excluded.source_key,
+    date = excluded.date, published_at = excluded.published_at,
+    image = excluded.image, logo = excluded.logo, content = excluded.content
+"""
+
+# Ingested articles are never overwritten; the first copy of a story wins.
+INSERT_NEW_ARTICLE = """
+INSERT INTO articles (id, title, subtitle, category, category_key, source, source_key,
+                      date, published_at, image, logo, content)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO NOTHING
+"""
+
+SELECT_ARTICLE = f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE id = ?"
+SELECT_ARTICLES_AFTER = f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE seq > ? ORDER BY seq LIMIT ?"
+SELECT_MAX_SEQ = "SELECT COALESCE(MAX(seq), 0) FROM articles"
+
+# One statement per filter combination so each is planned once and hits its own index.
+FEED_PAGE = {
+    (False, False): f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE seq > ? "
+                    "ORDER BY seq LIMIT ? OFFSET ?",
+    (True, False): f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE category_key = ? AND seq > ? "
+                   "ORDER BY seq LIMIT ? OFFSET ?",
+    (False, True): f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE source_key = ? AND seq > ? "
+                   "ORDER BY seq LIMIT ? OFFSET ?",
+    (True, True): f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE category_key = ? AND source_key = ? "
+                  "AND seq > ? ORDER BY seq LIMIT ? OFFSET ?",
+}
+FEED_COUNT = {
+    (False, False): "SELECT COUNT(*) FROM articles",
+    (True, False): "SELECT COUNT(*) FROM articles WHERE category_key = ?",
+    (False, True): "SELECT COUNT(*) FROM articles WHERE source_key = ?",
+    (True, True): "SELECT COUNT(*) FROM articles WHERE category_key = ? AND source_key = ?",
+}
+
+SELECT_POLL = "SELECT id, article_id, question, options FROM polls WHERE id = ?"
+SELECT_ARTICLE_POLL_ID = "SELECT id FROM polls WHERE article_id = ? ORDER BY id LIMIT 1"
+UPSERT_POLL = """
+INSERT INTO polls (id, article_id, question, options) VALUES (?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    article_id = excluded.article_id, question = excluded.question, options = excluded.options
+"""
+# Seeded polls carry display percentages; they become the starting vote counts.
+SEED_POLL_VOTES = "INSERT OR IGNORE INTO poll_votes (poll_id, option, votes) VALUES (?, ?, ?)"
+SELECT_POLL_VOTES = "SELECT option, votes FROM poll_votes WHERE poll_id = ?"
+SELECT_POLL_VOTERS = "SELECT user_id FROM poll_voters WHERE poll_id = ?"
+INSERT_POLL_VOTER = "INSERT OR IGNORE INTO poll_voters (poll_id, user_id, option) VALUES (?, ?, ?)"
+# poll_voters rows are only ever inserted, so its rowid orders votes by arrival.
+SELECT_MAX_VOTE_SEQ = "SELECT COALESCE(MAX(rowid), 0) FROM poll_voters"
+SELECT_POLLS_VOTED_AFTER = "SELECT poll_id, MAX(rowid) FROM poll_voters WHERE rowid > ? GROUP BY poll_id"
+ADD_POLL_VOTES = """
+INSERT INTO poll_votes (poll_id, option, votes) VALUES (?, ?, ?)
+ON CONFLICT (poll_id, option) DO UPDATE SET votes = votes + excluded.votes
+"""
+
+SELECT_DISCUSSION = """
+SELECT a.subtitle, a.source, a.category, a.image, a.logo,
+       c.id AS comment_id, c.parent_id, c.user, c.comment, c.likes, c.dislikes, c.replies,
+       c.created_at
+FROM articles a LEFT JOIN comments c ON c.article_id = a.id
+WHERE a.id = ?
+ORDER BY c.id
+"""
+INSERT_COMMENT = ("INSERT INTO comments (article_id, parent_id, user, comment, likes, dislikes, "
+                  "replies, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+SELECT_COMMENT_ARTICLE = "SELECT article_id FROM comments WHERE id = ?"
+INCREMENT_REPLIES = "UPDATE comments SET replies = replies + 1 WHERE id = ?"
+ADD_REACTIONS = "UPDATE comments SET likes = likes + ?, dislikes = dislikes + ? WHERE id = ?"
+
+INSERT_USER_EVENT = "INSERT INTO user_events (user_id, article_id, kind, created_at) VALUES (?, ?, ?, ?)"
+SELECT_USER_EVENTS = ("SELECT article_id, kind, created_at FROM user_events WHERE user_id = ? "
+                      "ORDER BY created_at DESC LIMIT ?")
+SELECT_CATEGORIES = "SELECT DISTINCT category_key FROM articles ORDER BY category_key"
+SELECT_ARTICLE_SEQS = "SELECT id, seq FROM articles WHERE id IN ({})"
+SELECT_ARTICLES_BY_SEQ = f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE seq IN ({{}})"
+SELECT_SAVED_SEQS = "SELECT article_seq FROM saved_articles WHERE user_id = ?"
+INSERT_SAVED_ARTICLE = "INSERT OR IGNORE INTO saved_articles (user_id, article_seq, saved_at) VALUES (?, ?, ?)"
+DELETE_SAVED_ARTICLE = "DELETE FROM saved_articles WHERE user_id = ? AND article_seq = ?"
+
+POSTED_RE = re.compile(r"Posted:\s*(?P<when>.+?)\s+(?P<tz>[A-Z]{2,4})\s*$")
+TZ_OFFSETS = {
+    "UTC": 0, "GMT": 0, "BST": 1, "CET": 1, "CEST": 2,
+    "EST": -5, "EDT": -4, "CST": -6, "CDT": -5, "MST": -7, "MDT": -6, "PST": -8, "PDT": -7,
+}
+
+
+def parse_posted_date(date):
+    """Parse "CBC • Posted: Mar 26, 2025 11:27 PM EDT" into an aware datetime, or None."""
+    match = POSTED_RE.search(date or "")
+    if not match or match.group("tz") not in TZ_OFFSETS:
+        return None
+    try:
+        when = datetime.strptime(match.group("when"), "%b %d, %Y %I:%M %p")
+    except ValueError:
+        return None
+    return when.replace(tzinfo=timezone(timedelta(hours=TZ_OFFSETS[match.group("tz")])))
+
+
+def _article_from_row(row):
+    return {
+        "title": row["title"],
+        "subtitle": row["subtitle"],
+        "category": row["category"],
+        "source": row["source"],
+        "date": row["date"],
+        "image": row["image"],
+        "logo": row["logo"],
+        "content": json.loads(row["content"]),
+    }
+
+
+class Repository:
+    """Articles, polls and discussions stored in SQLite.
+
+    Each thread gets its own connection (WAL mode, so readers never block the writer),
+    and every query uses a constant SQL string so sqlite3's per-connection statement
+    cache keeps it prepared. Connection context managers commit on success and roll
+    back on error.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            for table, columns in MIGRATIONS.items():
+                existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+                for name, declaration in columns.items():
+                    if name not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA foreign_keys = ON")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def is_empty(self):
+        return self._connect().execute("SELECT 1 FROM articles LIMIT 1").fetchone() is None
+
+    def seed(self, articles, polls, comments):
+        with self._connect() as conn:
+            for article_id, article in articles.items():
+                self._save_article(conn, article_id, article)
+            for poll_id, poll in polls.items():
+                self._save_poll(conn, poll_id, poll)
+            for article_id, thread in comments.items():
+                for comment in thread:
+                    self._add_comment(conn, article_id, comment)
+
+    # Articles
+
+    def get_article(self, article_id):
+        row = self._connect().execute(SELECT_ARTICLE, (article_id,)).fetchone()
+        return _article_from_row(row) if row else None
+
+    def get_articles(self, article_ids):
+        """Return {id: article} for the ids that exist."""
+        article_ids = list(article_ids)
+        if not article_ids:
+            return {}
+        placeholders = ",".join("?" * len(article_ids))
+        rows = self._connect().execute(
+            f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE id IN ({placeholders})", article_ids)
+        return {row["id"]: _article_from_row(row) for row in rows}
+
+    def iter_articles(self):
+        for row in self._connect().execute(f"SELECT {ARTICLE_COLUMNS} FROM articles ORDER BY seq"):
+            yield row["id"], _article_from_row(row)
+
+    def iter_article_rows(self):
+        """Yield (seq, id, article) for every article, oldest first, like articles_after."""
+        for row in self._connect().execute(f"SELECT {ARTICLE_COLUMNS} FROM articles ORDER BY seq"):
+            yield row["seq"], row["id"], _article_from_row(row)
+
+    def articles_after(self, seq, limit=1000):
+        """Return [(seq, id, article), ...] for articles stored after `seq`, oldest first."""
+        rows = self._connect().execute(SELECT_ARTICLES_AFTER, (seq, limit))
+        return [(row["seq"], row["id"], _article_from_row(row)) for row in rows]
+
+    def max_seq(self):
+        return self._connect().execute(SELECT_MAX_SEQ).fetchone()[0]
+
+    def list_feed_page(self, category=None, source=None, limit=20, after=None, offset=0):
+        """Return ([(id, article), ...], next `after` value or None) in feed order."""
+        category = normalize_category(category)
+        source = normalize_source(source)
+        params = [value for value in (category, source) if value]
+        params += [after if after is not None else -1, limit + 1, offset]
+        rows = self._connect().execute(FEED_PAGE[bool(category), bool(source)], params).fetchall()
+        page = rows[:limit]
+        next_after = page[-1]["seq"] if len(rows) > limit else None
+        return [(row["id"], _article_from_row(row)) for row in page], next_after
+
+    def list_categories(self):
+        """Return every normalized category key in use."""
+        return [row[0] for row in self._connect().execute(SELECT_CATEGORIES)]
+
+    def count_articles(self, category=None, source=None):
+        category = normalize_category(category)
+        source = normalize_source(source)
+        params = [value for value in (category, source) if value]
+        return self._connect().execute(FEED_COUNT[bool(category), bool(source)], params).fetchone()[0]
+
+    def save_article(self, article_id, article):
+        with self._connect() as conn:
+            self._save_article(conn, article_id, article)
+
+    def insert_new_articles(self, articles):
+        """Insert {id: article} in one transaction, skipping ids already stored.
+
+        Returns the ids that were inserted.
+        """
+        inserted = []
+        with self._connect() as conn:
+            for article_id, article in articles.items():
+                if self._save_article(conn, article_id, article, INSERT_NEW_ARTICLE):
+                    inserted.append(article_id)
+        return inserted
+
+    def _save_article(self, conn, article_id, article, statement=UPSERT_ARTICLE):
+        published_at = parse_posted_date(article.get("date"))
+        return conn.execute(statement, (
+            article_id, article["title"], article["subtitle"],
+            article["category"], normalize_category(article["category"]),
+            article["source"], normalize_source(article["source"]),
+            article["date"], int(published_at.timestamp()) if published_at else None,
+            article["image"], article["logo"], json.dumps(article["content"]),
+        )).rowcount
+
+    # Polls
+
+    def get_poll(self, poll_id):
+        row = self._connect().execute(SELECT_POLL, (poll_id,)).fetchone()
+        if row is None:
+            return None
+        return {"article_id": row["article_id"], "question": row["question"],
+                "options": json.loads(row["options"])}
+
+    def get_poll_id_for_article(self, article_id):
+        row = self._connect().execute(SELECT_ARTICLE_POLL_ID, (article_id,)).fetchone()
+        return row[0] if row else None
+
+    def save_poll(self, poll_id, poll):
+        with self._connect() as conn:
+            self._save_poll(conn, poll_id, poll)
+
+    def _save_poll(self, conn, poll_id, poll):
+        conn.execute(UPSERT_POLL, (poll_id, poll["article_id"], poll["question"],
+                                   json.dumps(poll["options"])))
+        conn.executemany(SEED_POLL_VOTES, [
+            (poll_id, option, entry.get("percentage", 0))
+            for option, entry in enumerate(poll["options"])
+        ])
+
+    def get_poll_votes(self, poll_id):
+        """Return {option index: persisted vote count}."""
+        return dict(self._connect().execute(SELECT_POLL_VOTES, (poll_id,)).fetchall())
+
+    def get_poll_voters(self, poll_id):
+        return {row[0] for row in self._connect().execute(SELECT_POLL_VOTERS, (poll_id,))}
+
+    def max_vote_seq(self):
+        return self._connect().execute(SELECT_MAX_VOTE_SEQ).fetchone()[0]
+
+    def polls_voted_after(self, seq):
+        """Return {poll_id: latest vote seq} for polls with votes stored after `seq`."""
+        return dict(self._connect().execute(SELECT_POLLS_VOTED_AFTER, (seq,)).fetchall())
+
+    def record_votes(self, votes):
+        """Persist a batch of (poll_id, user_id, option) votes in one transaction.
+
+        Votes from users who already voted on the poll are dropped. Returns
+        {(poll_id, option): accepted votes}.
+        """
+        accepted = {}
+        with self._connect() as conn:
+            for poll_id, user_id, option in votes:
+                if conn.execute(INSERT_POLL_VOTER, (poll_id, user_id, option)).rowcount:
+                    accepted[poll_id, option] = accepted.get((poll_id, option), 0) + 1
+            conn.executemany(ADD_POLL_VOTES, [
+                (poll_id, option, count) for (poll_id, option), count in accepted.items()
+            ])
+        return accepted
+
+    # Discussions
+
+    def get_discussion(self, article_id):
+        """Return {"article": ..., "comments": [...]} with article fields joined in, or None."""
+        rows = self._connect().execute(SELECT_DISCUSSION, (article_id,)).fetchall()
+        if not rows:
+            return None
+        article = rows[0]
+        comments = [
+            {"id": row["comment_id"], "parent_id": row["parent_id"], "user": row["user"],
+             "comment": row["comment"], "likes": row["likes"], "dislikes": row["dislikes"],
+             "replies": row["replies"], "created_at": row["created_at"]}
+            for row in rows if row["comment_id"] is not None
+        ]
+        return {
+            "article": {
+                "summary": article["subtitle"],
+                "source": article["source"],
+                "category": article["category"],
+                "image": article["image"],
+                "logo": article["logo"],
+            },
+            "comments": comments,
+        }
+
+    def add_comment(self, article_id, comment):
+        """Insert a comment (a reply if it has a parent_id) and return its id."""
+        with self._connect() as conn:
+            comment_id = self._add_comment(conn, article_id, comment)
+            if comment.get("parent_id") is not None:
+                conn.execute(INCREMENT_REPLIES, (comment["parent_id"],))
+        return comment_id
+
+    def _add_comment(self, conn, article_id, comment):
+        return conn.execute(INSERT_COMMENT, (
+            article_id, comment.get("parent_id"), comment["user"], comment["comment"],
+            comment.get("likes", 0), comment.get("dislikes", 0), comment.get("replies", 0),
+            comment.get("created_at", 0),
+        )).lastrowid
+
+    def get_comment_article(self, comment_id):
+        row = self._connect().execute(SELECT_COMMENT_ARTICLE, (comment_id,)).fetchone()
+        return row[0] if row else None
+
+    def add_reactions(self, deltas):
+        """Apply {comment_id: (likes, dislikes)} increments in one transaction."""
+        with self._connect() as conn:
+            conn.executemany(ADD_REACTIONS, [
+                (likes, dislikes, comment_id) for comment_id, (likes, dislikes) in deltas.items()
+            ])
+
+    # User activity
+
+    def add_user_events(self, events):
+        """Persist a batch of (user_id, article_id, kind, created_at) events in one transaction."""
+        with self._connect() as conn:
+            conn.executemany(INSERT_USER_EVENT, events)
+
+    def get_user_events(self, user_id, limit=200):
+        """Return the user's latest [(article_id, kind, created_at), ...], newest first."""
+        return [tuple(row) for row in self._connect().execute(SELECT_USER_EVENTS, (user_id, limit))]
+
+    # Saved articles
+
+    def article_seqs(self, article_ids):
+        """Return {id: seq} for the ids that exist; seq numbers are dense article ordinals."""
+        article_ids = list(article_ids)
+        if not article_ids:
+            return {}
+        rows = self._connect().execute(SELECT_ARTICLE_SEQS.format(",".join("?" * len(article_ids))),
+                                       article_ids)
+        return dict(rows.fetchall())
+
+    def get_articles_by_seq(self, seqs):
+        """Return {seq: (id, article)} for the seq numbers that exist."""
+        seqs = list(seqs)
+        if not seqs:
+            return {}
+        rows = self._connect().execute(SELECT_ARTICLES_BY_SEQ.format(",".join("?" * len(seqs))), seqs)
+        return {row["seq"]: (row["id"], _article_from_row(row)) for row in rows}
+
+    def get_saved_seqs(self, user_id):
+        return [row[0] for row in self._connect().execute(SELECT_SAVED_SEQS, (user_id,))]
+
+    def add_saved_article(self, user_id, seq, saved_at):
+        with self._connect() as conn:
+            conn.execute(INSERT_SAVED_ARTICLE, (user_id, seq, saved_at))
+
+    def remove_saved_article(self, user_id, seq):
+        with self._connect() as conn:
+            conn.execute(DELETE_SAVED_ARTICLE, (user_id, seq))
@@ -0,0 +1,39 @@
+import importlib
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    os.environ["NEWSBLEND_DB"] = str(tmp_path_factory.mktemp("db") / "newsblend.db")
+    app = importlib.import_module("app")
+    return app.app.test_client()
+
+
+def test_saved_articles_appear_in_personalized_with_the_flag(client):
+    headers = {"X-User-Id": "reader"}
+    articles = client.get("/api/articles/personalized?limit=100", headers=headers).json["data"]["articles"]
+    article_id = articles[0]["id"]
+
+    response = client.post("/api/user/articles/save", json={"articleId": article_id}, headers=headers)
+    assert response.status_code == 200
+    articles = client.get("/api/articles/personalized?limit=100", headers=headers).json["data"]["articles"]
+    assert {item["id"]: item["saved"] for item in articles}[article_id] is True
+
+    client.post("/api/user/articles/save", json={"articleId": article_id, "saved": False}, headers=headers)
+    articles = client.get("/api/articles/personalized?limit=100", headers=headers).json["data"]["articles"]
+    assert {item["id"]: item["saved"] for item in articles}[article_id] is False
+
+
+def test_vote_returns_labelled_options(client):
+    response = client.post("/api/polls/1/vote", json={"userId": "voter", "option": 1})
+    assert response.status_code == 200
+    assert [option["label"] for option in response.json["options"]][1] == "More action is needed"
+    assert client.post("/api/polls/missing/vote", json={"userId": "voter", "option": 0}).status_code == 404
+
+
+def test_bundle_carries_the_articles_poll(client):
+    bundle = client.get("/api/articles/1/bundle").json
+    assert bundle["poll"]["id"] == "1"
+    assert bundle["poll"]["question"].startswith("Do you think enough is being done")
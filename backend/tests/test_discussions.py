@@ -0,0 +1,25 @@
+from discussions import DiscussionThreads
+
+
+class FakeRepository:
+    def __init__(self):
+        self.comments = [{"id": 1, "parent_id": None, "user": "ann", "comment": "First",
+                          "likes": 2, "dislikes": 0, "replies": 0, "created_at": "2024-01-01"}]
+
+    def get_discussion(self, article_id):
+        return {"article": {"id": article_id}, "comments": [dict(row) for row in self.comments]}
+
+
+def test_reload_only_notifies_when_the_discussion_changed():
+    repository = FakeRepository()
+    threads = DiscussionThreads(repository, refresh_after=0)
+    notified = []
+    threads.subscribe(notified.append)
+
+    version = threads.version("a1")
+    assert threads.version("a1") == version
+    assert notified == []
+
+    repository.comments[0]["likes"] = 3
+    assert threads.version("a1") != version
+    assert notified == ["a1"]
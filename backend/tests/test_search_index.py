@@ -0,0 +1,39 @@
+from search_index import SearchIndex
+
+
+def article(index, category="World", repeats=1):
+    return {
+        "title": f"Story {index}",
+        "subtitle": "",
+        "category": category,
+        "source": "CBC",
+        "content": ["climate " * repeats + "filler " * (index % 7)],
+    }
+
+
+def test_pages_past_the_champion_lists():
+    index = SearchIndex(champion_size=256)
+    for i in range(600):
+        index.add(str(i), article(i))
+
+    seen = []
+    for offset in range(0, 600, 20):
+        total, hits = index.search("climate", limit=20, offset=offset)
+        assert total == 600
+        assert len(hits) == 20
+        seen.extend(doc_id for doc_id, _ in hits)
+    assert len(set(seen)) == 600
+
+
+def test_facet_filter_on_a_common_term_sees_every_match():
+    index = SearchIndex(champion_size=256)
+    for i in range(600):
+        index.add(str(i), article(i, repeats=5))
+    # Fewer mentions than anything else, so none of these are champions.
+    science = {str(i) for i in range(600, 615)}
+    for doc_id in science:
+        index.add(doc_id, article(int(doc_id), category="Science"))
+
+    total, hits = index.search("climate", category="Science", limit=20)
+    assert total == 15
+    assert {doc_id for doc_id, _ in hits} == science
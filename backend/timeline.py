@@ -0,0 +1,89 @@
+import heapq
+import math
+import threading
+from bisect import bisect_right
+
+from storage import parse_posted_date
+
+
+class ArticleTimeline:
+    """Articles in publish order, plus a maintained top-k of breaking stories.
+
+    Publish times are parsed once from the display dates when articles are added
+    and kept sorted (feeds mostly deliver in order, so insertion is usually an
+    append). Requests read them through the immutable copies freeze() returns,
+    see snapshots.ContentSnapshot.
+
+    A story's breaking score is log(outlets covering it) + its age in half-lives *
+    log(2): coverage decayed by half every `half_life` seconds. Decay applies to
+    every story at the same rate, so the ordering never changes with the clock and
+    only has to be updated when a story is published or picked up by another
+    outlet. The best `size` stories are kept in a min-heap, so ranking them never
+    looks at the rest of the corpus. Undated articles are left out of both.
+    """
+
+    def __init__(self, clusters, size=50, half_life=6 * 3600.0):
+        self.clusters = clusters
+        self.size = size
+        self.half_life = half_life
+        self._times = []
+        self._entries = []
+        self._published = {}
+        self._heap = []
+        self._top = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _score(self, published, outlets):
+        return math.log(outlets) + published / self.half_life * math.log(2)
+
+    def add_many(self, items):
+        """Index [(article id, article), ...]; call after the articles are clustered."""
+        with self._lock:
+            stories = set()
+            for article_id, article in items:
+                published = parse_posted_date(article.get("date"))
+                if published is None or article_id in self._published:
+                    continue
+                published = published.timestamp()
+                self._published[article_id] = published
+                entry = (published, article_id)
+                if not self._entries or entry >= self._entries[-1]:
+                    self._entries.append(entry)
+                    self._times.append(published)
+                else:
+                    position = bisect_right(self._entries, entry)
+                    self._entries.insert(position, entry)
+                    self._times.insert(position, published)
+                stories.add(article_id)
+            for article_id in stories:
+                members = self.clusters.members(article_id) or [(article_id, None)]
+                story_id = members[0][0]
+                published = self._published.get(story_id)
+                if published is not None:
+                    self._offer(story_id, self._score(published, len({source for _, source in members})))
+
+    def add(self, article_id, article):
+        self.add_many([(article_id, article)])
+
+    def _offer(self, story_id, score):
+        if story_id in self._top:
+            if score > self._top[story_id]:
+                self._top[story_id] = score
+                self._heap = [(value, id) for id, value in self._top.items()]
+                heapq.heapify(self._heap)
+        elif len(self._heap) < self.size:
+            self._top[story_id] = score
+            heapq.heappush(self._heap, (score, story_id))
+        elif score > self._heap[0][0]:
+            _, evicted = heapq.heapreplace(self._heap, (score, story_id))
+            del self._top[evicted]
+            self._top[story_id] = score
+
+    def freeze(self):
+        """Return (publish times, ids, [(story id, score), ...] best first) as immutable tuples."""
+        with self._lock:
+            breaking = sorted(((id, score) for score, id in self._heap), key=lambda item: -item[1])
+            return tuple(self._times), tuple(id for _, id in self._entries), tuple(breaking)
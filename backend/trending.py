@@ -0,0 +1,100 @@
+import threading
+import time
+from array import array
+
+import numpy as np
+
+
+class ViewCounter:
+    """Article views over the last `window` seconds, in memory that never grows.
+
+    Views are counted in a count-min sketch: `depth` rows of `width` counters,
+    each view adding one to a counter per row. Row i uses h1 + i * h2, with h1
+    and h2 the two halves of the id's hash, which works as well as independent
+    hashes at the cost of one. An article's estimate is the smallest of its
+    counters. It is never below the true count and, with probability
+    1 - e**-depth, over it by at most e / width of all views in the window.
+
+    The window slides in `buckets` steps. Each step has its own sketch, and a
+    running total of the live ones answers estimates with `depth` lookups. When a
+    step expires its sketch is subtracted from the total and reused.
+
+    The most viewed articles are tracked as up to `capacity` candidates. A view
+    of an article that is not a candidate replaces the weakest one once its
+    estimate is higher. Candidates are re-estimated whenever the window moves.
+
+    Counts are per process; under gunicorn each worker ranks the views it served.
+    """
+
+    def __init__(self, window=3600.0, buckets=12, width=4096, depth=4, capacity=200, clock=time.monotonic):
+        self.window = window
+        self.width = width
+        self.depth = depth
+        self.capacity = capacity
+        self._clock = clock
+        self._step = window / buckets
+        self._sketches = [array("I", bytes(4 * width * depth)) for _ in range(buckets)]
+        self._total = array("I", bytes(4 * width * depth))
+        self._epoch = int(clock() // self._step)
+        self._candidates = {}
+        self._weakest = None
+        self._lock = threading.Lock()
+
+    def _cells(self, article_id):
+        key = hash(article_id)
+        first, step, width = key & 0xFFFFFFFF, (key >> 32 & 0xFFFFFFFF) | 1, self.width
+        return [row * width + (first + row * step) % width for row in range(self.depth)]
+
+    def _estimate(self, cells):
+        return min(map(self._total.__getitem__, cells))
+
+    def _advance(self, now):
+        epoch = int(now // self._step)
+        if epoch == self._epoch:
+            return
+        total = np.frombuffer(self._total, dtype=np.uint32)
+        for expired in range(max(self._epoch + 1, epoch - len(self._sketches) + 1), epoch + 1):
+            sketch = self._sketches[expired % len(self._sketches)]
+            total -= np.frombuffer(sketch, dtype=np.uint32)
+            np.frombuffer(sketch, dtype=np.uint32)[:] = 0
+        self._epoch = epoch
+        self._candidates = {id: self._estimate(self._cells(id)) for id in self._candidates}
+        self._candidates = {id: views for id, views in self._candidates.items() if views}
+        self._weakest = None
+
+    def record(self, article_id):
+        cells = self._cells(article_id)
+        with self._lock:
+            self._advance(self._clock())
+            sketch, total = self._sketches[self._epoch % len(self._sketches)], self._total
+            for cell in cells:
+                sketch[cell] += 1
+                total[cell] += 1
+            views = self._estimate(cells)
+            candidates = self._candidates
+            if article_id in candidates or len(candidates) < self.capacity:
+                # Raising any other candidate leaves the weakest one as it was.
+                if self._weakest == article_id or article_id not in candidates:
+                    self._weakest = None
+                candidates[article_id] = views
+                return
+            if self._weakest is None:
+                self._weakest = min(candidates, key=candidates.get)
+            if views > candidates[self._weakest]:
+                del candidates[self._weakest]
+                candidates[article_id] = views
+                self._weakest = None
+
+    def estimate(self, article_id):
+        """Return the estimated views of `article_id` in the current window."""
+        cells = self._cells(article_id)
+        with self._lock:
+            self._advance(self._clock())
+            return self._estimate(cells)
+
+    def top(self, limit=10):
+        """Return [(article id, estimated views), ...] for the most viewed articles, most first."""
+        with self._lock:
+            self._advance(self._clock())
+            ranked = sorted(self._candidates.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
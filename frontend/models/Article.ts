@@ -26,6 +26,18 @@ export interface Article {
   summary?: string;
   /** Optional keywords or tags */
   tags?: string[];
+  /** Whether the current user has saved this article (per-user feeds only) */
+  saved?: boolean;
+  /** Every outlet carrying this story, this article first (featured, breaking and latest feeds) */
+  sources?: ArticleSource[];
+}
+
+/**
+ * One outlet's copy of a story that the featured feed shows as a single card
+ */
+export interface ArticleSource {
+  id: string;
+  source: string;
 }
 
 /**
@@ -58,6 +70,8 @@ export interface ArticleApiResponse {
   status: string;
   data: {
     articles: Article[];
+    /** Opaque cursor for the next page of the feed, null on the last page */
+    nextCursor?: string | null;
     /** Optional pagination info */
     pagination?: {
       currentPage: number;
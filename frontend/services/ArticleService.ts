@@ -37,15 +37,18 @@ export const getFeaturedArticles = async (): Promise<Article[]> => {
 };
 
 /**
- * Fetch personalized articles for the user
+ * Fetch articles ranked for the user from their reads, votes and saves
  *
+ * @param userId ID of the current user; without one articles are ranked by recency
  * @returns Promise with personalized articles
  */
-export const getPersonalizedArticles = async (): Promise<Article[]> => {
+export const getPersonalizedArticles = async (
+  userId?: string
+): Promise<Article[]> => {
   try {
-    // For now, reuse featured articles as personalized articles
-    // In a real implementation, this would call a separate endpoint
-    const response = await fetch(`${API_URL}/articles/featured`);
+    const response = await fetch(`${API_URL}/articles/personalized`, {
+      headers: userId ? { "X-User-Id": userId } : {},
+    });
     if (!response.ok) {
       throw new Error("Failed to fetch personalized articles");
     }
@@ -59,21 +62,19 @@ export const getPersonalizedArticles = async (): Promise<Article[]> => {
 };
 
 /**
- * Fetch breaking news articles
+ * Fetch the top breaking stories: the most widely covered recent stories
  *
+ * @param limit Number of stories to return
  * @returns Promise with breaking news articles
  */
-export const getBreakingNewsArticles = async (): Promise<Article[]> => {
+export const getBreakingNewsArticles = async (limit = 1): Promise<Article[]> => {
   try {
-    // For now, reuse featured articles and filter to get the first one as breaking news
-    // In a real implementation, this would call a separate endpoint
-    const response = await fetch(`${API_URL}/articles/featured`);
+    const response = await fetch(`${API_URL}/articles/breaking?limit=${limit}`);
     if (!response.ok) {
       throw new Error("Failed to fetch breaking news");
     }
     const data: ArticleApiResponse = await response.json();
-    // Just return the first article as breaking news
-    return data.data.articles.slice(0, 1);
+    return data.data.articles;
   } catch (error) {
     console.error("Error fetching breaking news:", error);
     return [];
@@ -81,15 +82,15 @@ export const getBreakingNewsArticles = async (): Promise<Article[]> => {
 };
 
 /**
- * Fetch more news articles
+ * Fetch the newest articles, optionally only those published after `since`
  *
- * @returns Promise with more news articles
+ * @param since publishedDate of the newest article already shown
+ * @returns Promise with more news articles, newest first
  */
-export const getMoreNewsArticles = async (): Promise<Article[]> => {
+export const getMoreNewsArticles = async (since?: string): Promise<Article[]> => {
   try {
-    // For now, reuse featured articles as more news
-    // In a real implementation, this would call a separate endpoint
-    const response = await fetch(`${API_URL}/articles/featured`);
+    const query = since ? `?since=${encodeURIComponent(since)}` : "";
+    const response = await fetch(`${API_URL}/articles/latest${query}`);
     if (!response.ok) {
       throw new Error("Failed to fetch more news");
     }
@@ -111,38 +112,24 @@ export const searchArticles = async (
   params: ArticleSearchParams
 ): Promise<Article[]> => {
   try {
-    // Since we don't have a dedicated search endpoint yet,
-    // we'll fetch all articles from the featured endpoint and filter them
-    const response = await fetch(`${API_URL}/articles/featured`);
-    if (!response.ok) {
-      throw new Error("Failed to fetch articles for search");
+    const query = new URLSearchParams();
+    query.append("q", params.query ?? "");
+    if (params.category) query.append("category", params.category);
+    if (params.source) query.append("source", params.source);
+    if (params.limit) {
+      query.append("limit", String(params.limit));
+      if (params.page) {
+        query.append("offset", String((params.page - 1) * params.limit));
+      }
     }
 
-    const data: ArticleApiResponse = await response.json();
-    const allArticles = data.data.articles;
-
-    if (!params.query && !params.category && !params.source) {
-      return allArticles;
+    const response = await fetch(`${API_URL}/search?${query.toString()}`);
+    if (!response.ok) {
+      throw new Error("Failed to search articles");
     }
 
-    return allArticles.filter((article) => {
-      const matchesQuery =
-        !params.query ||
-        article.title.toLowerCase().includes(params.query.toLowerCase()) ||
-        (article.summary &&
-          article.summary.toLowerCase().includes(params.query.toLowerCase())) ||
-        article.source.toLowerCase().includes(params.query.toLowerCase());
-
-      const matchesCategory =
-        !params.category ||
-        article.category.toLowerCase() === params.category.toLowerCase();
-
-      const matchesSource =
-        !params.source ||
-        article.source.toLowerCase() === params.source.toLowerCase();
-
-      return matchesQuery && matchesCategory && matchesSource;
-    });
+    const data: ArticleApiResponse = await response.json();
+    return data.data.articles;
   } catch (error) {
     console.error("Error searching articles:", error);
     return [];
@@ -150,26 +137,32 @@ export const searchArticles = async (
 };
 
 /**
- * Save an article to user's bookmarks
+ * Save an article to the user's bookmarks, or remove it
  *
  * @param articleId ID of the article to save
+ * @param userId ID of the current user
+ * @param saved Pass false to remove the bookmark
  * @returns Promise with success status
  */
-export const saveArticle = async (articleId: string): Promise<boolean> => {
+export const saveArticle = async (
+  articleId: string,
+  userId: string,
+  saved = true
+): Promise<boolean> => {
   try {
-    // When using real backend, uncomment this:
-    // const response = await fetch(`${API_URL}/user/articles/save`, {
-    //   method: 'POST',
-    //   headers: {
-    //     'Content-Type': 'application/json',
-    //   },
-    //   body: JSON.stringify({ articleId }),
-    // });
-    // const data = await response.json();
-    // return data.status === 'success';
-
-    console.log("Article saved:", articleId);
-    return true;
+    const response = await fetch(`${API_URL}/user/articles/save`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "X-User-Id": userId,
+      },
+      body: JSON.stringify({ articleId, saved }),
+    });
+    if (!response.ok) {
+      throw new Error("Failed to save article");
+    }
+    const data = await response.json();
+    return data.status === "success";
   } catch (error) {
     console.error("Error saving article:", error);
     return false;
@@ -177,39 +170,50 @@ export const saveArticle = async (articleId: string): Promise<boolean> => {
 };
 
 /**
- * Get user's saved articles
+ * Get user's saved articles, most recently published first
  *
+ * @param userId ID of the current user
  * @returns Promise with saved articles
  */
-export const getSavedArticles = async (): Promise<Article[]> => {
+export const getSavedArticles = async (userId: string): Promise<Article[]> => {
   try {
-    // When using real backend, uncomment this:
-    // const response = await fetch(`${API_URL}/user/articles/saved`);
-    // const data: ArticleApiResponse = await response.json();
-    // return data.data.articles;
-
-    // For now, return mock saved articles
-    return [
-      {
-        id: "b1",
-        title: "Here's a breakdown of the newly announced tariffs by country",
-        source: "CNN",
-        category: "Politics",
-        imageUrl: require("../assets/logo.png"),
-        sourceLogo: require("../assets/logo.png"),
-      },
-      {
-        id: "m1",
-        title:
-          "Could Trump's tariffs spell the end of Canadian-made NHL jerseys?",
-        source: "CBC",
-        category: "Politics",
-        imageUrl: require("../assets/logo.png"),
-        sourceLogo: require("../assets/logo.png"),
-      },
-    ];
+    const response = await fetch(`${API_URL}/user/articles/saved`, {
+      headers: { "X-User-Id": userId },
+    });
+    if (!response.ok) {
+      throw new Error("Failed to fetch saved articles");
+    }
+    const data: ArticleApiResponse = await response.json();
+    return data.data.articles;
   } catch (error) {
     console.error("Error fetching saved articles:", error);
     return [];
   }
 };
+
+/**
+ * Check which of the given articles the user has saved
+ *
+ * @param articleIds IDs of the articles shown, e.g. one feed page
+ * @param userId ID of the current user
+ * @returns Promise with the saved subset of articleIds
+ */
+export const getSavedArticleIds = async (
+  articleIds: string[],
+  userId: string
+): Promise<string[]> => {
+  try {
+    const query = encodeURIComponent(articleIds.join(","));
+    const response = await fetch(`${API_URL}/user/articles/saved?ids=${query}`, {
+      headers: { "X-User-Id": userId },
+    });
+    if (!response.ok) {
+      throw new Error("Failed to check saved articles");
+    }
+    const data = await response.json();
+    return data.data.ids;
+  } catch (error) {
+    console.error("Error checking saved articles:", error);
+    return [];
+  }
+};